@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+# run the api reads on a thread pool, see core.async_views
+os.environ.setdefault('ASYNC_READS', '1')
 
-application = get_asgi_application()
+# get_asgi_application() with a handler streaming off the event loop
+django.setup(set_prefix=False)
+
+from core.async_views import StreamingASGIHandler  # noqa: E402
+
+application = StreamingASGIHandler()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 import os
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,6 +54,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.QueryDetectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,18 +89,133 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# DB_ENGINE=django.db.backends.sqlite3 runs without postgres, e.g. for
+# tests; recipe search then falls back to substring matching
+#
+# connections are kept open for DB_CONN_MAX_AGE seconds (empty for no
+# limit, 0 to close after every request) and checked before reuse unless
+# DB_CONN_HEALTH_CHECKS=0. Set DB_POOLER=transaction when DB_HOST/DB_PORT
+# point at a transaction pooling bouncer (e.g. pgbouncer); server side
+# cursors do not survive the switch of server connection between
+# transactions there
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'core.backends.postgresql')
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '60')
+DB_POOLER = os.environ.get('DB_POOLER', '')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.environ.get('DB_NAME'),
+        'ENGINE': DB_ENGINE,
+        'NAME': os.environ.get(
+            'DB_NAME',
+            BASE_DIR / 'db.sqlite3' if DB_ENGINE.endswith('sqlite3') else None,
+        ),
         'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
-                               
+        'CONN_MAX_AGE': int(DB_CONN_MAX_AGE) if DB_CONN_MAX_AGE else None,
+        'CONN_HEALTH_CHECKS': bool(
+            int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1))
+        ),
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER == 'transaction',
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# local memory by default, point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. memcached) when running more than one process
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# per-user list response cache, 0 turns it off. Writes served by one
+# process must reach the versions read by all, so it is only on by
+# default with a shared CACHE_BACKEND
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.environ.get(
+    'API_CACHE_TIMEOUT',
+    0 if CACHES[API_CACHE_ALIAS]['BACKEND'].endswith('.LocMemCache') else 300,
+))
+
+# token -> user resolutions kept per process for TOKEN_CACHE_TIMEOUT
+# seconds (0 turns it off), and in the TOKEN_CACHE_ALIAS cache when set
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TIMEOUT = int(os.environ.get('TOKEN_CACHE_TIMEOUT', 60))
+TOKEN_CACHE_ALIAS = os.environ.get('TOKEN_CACHE_ALIAS') or None
+
+# signed tokens from /api/user/token/ with token_type=signed, lifetimes
+# in seconds; revoked ones are listed in the 'tokens' cache, which must
+# be shared between processes and must not evict entries (e.g. the
+# database cache, or redis with maxmemory-policy noeviction). Signed
+# tokens are off until TOKEN_REVOCATION_CACHE_BACKEND is set
+SIGNED_TOKEN_LIFETIME = int(os.environ.get('SIGNED_TOKEN_LIFETIME', 3600))
+SIGNED_TOKEN_REFRESH_LIFETIME = int(
+    os.environ.get('SIGNED_TOKEN_REFRESH_LIFETIME', 86400)
+)
+TOKEN_REVOCATION_ALIAS = None
+if os.environ.get('TOKEN_REVOCATION_CACHE_BACKEND'):
+    CACHES['tokens'] = {
+        'BACKEND': os.environ['TOKEN_REVOCATION_CACHE_BACKEND'],
+        'LOCATION': os.environ.get('TOKEN_REVOCATION_CACHE_LOCATION', ''),
+    }
+    if CACHES['tokens']['BACKEND'].endswith('.DatabaseCache'):
+        # culls a third of the entries past MAX_ENTRIES otherwise
+        CACHES['tokens']['OPTIONS'] = {'MAX_ENTRIES': 10 ** 9}
+    TOKEN_REVOCATION_ALIAS = 'tokens'
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+# PASSWORD_HASHER (argon2, bcrypt or pbkdf2) hashes new passwords, the
+# others still check existing hashes, which are rehashed with the chosen
+# hasher and costs on the next login. argon2 needs argon2-cffi and bcrypt
+# needs bcrypt, pbkdf2 is used when the library is missing
+
+PASSWORD_HASHER_CLASSES = {
+    'argon2': 'core.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'core.hashers.TunedBCryptSHA256PasswordHasher',
+    'pbkdf2': 'core.hashers.TunedPBKDF2PasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2')
+if PASSWORD_HASHER != 'pbkdf2' and find_spec(PASSWORD_HASHER) is None:
+    PASSWORD_HASHER = 'pbkdf2'
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CLASSES.items()
+    if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+# KiB
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 19456)
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1)
+)
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 260000)
+)
+
+# attempts on /api/user/token/ per client address and email, and how
+# long a wrong email and password pair is refused without checking it
+LOGIN_THROTTLE_RATE = os.environ.get('LOGIN_THROTTLE_RATE', '30/min') or None
+LOGIN_FAILURE_CACHE_TIMEOUT = int(
+    os.environ.get('LOGIN_FAILURE_CACHE_TIMEOUT', 60)
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -140,6 +258,29 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT ='/vol/web/static'
 
+# threads rendering recipe image renditions in the background, 0 renders
+# them in the upload request
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+
+# time requests per view, exposed as Server-Timing headers and as
+# histograms at /api/metrics/ for staff users; off removes the middleware
+# entirely
+PERF_METRICS = bool(int(os.environ.get('PERF_METRICS', 0)))
+# send the Server-Timing header to clients when PERF_METRICS is on
+PERF_SERVER_TIMING = bool(int(os.environ.get('PERF_SERVER_TIMING', 1)))
+
+# report statements a request runs more than QUERY_REPEAT_LIMIT times,
+# 'log' or 'raise'; empty removes the detector. Statements slower than
+# SLOW_QUERY_MS are logged while it is on
+QUERY_DETECTOR = os.environ.get('QUERY_DETECTOR', '')
+QUERY_REPEAT_LIMIT = int(os.environ.get('QUERY_REPEAT_LIMIT', 5))
+SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 100))
+
+# over ASGI, run the api reads on ASYNC_READ_THREADS threads instead of
+# the one thread django gives sync views; app.asgi turns it on
+ASYNC_READS = bool(int(os.environ.get('ASYNC_READS', 0)))
+ASYNC_READ_THREADS = int(os.environ.get('ASYNC_READ_THREADS', 16))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -149,8 +290,23 @@ AUTH_USER_MODEL ='core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    # json through orjson, the drf classes take over when it is missing
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# upper bound for the page_size query parameter on list endpoints
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True
 }
\ No newline at end of file
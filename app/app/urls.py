@@ -22,6 +22,8 @@ from drf_spectacular.views import (
 from django.conf.urls.static import static
 from django.conf import settings
 
+from core.views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(),name ='api-schema'),
@@ -29,6 +31,7 @@ urlpatterns = [
     path('api/user/',include('user.urls')),
     path('api/recipe/',include('recipe.urls')),
     path('api/movie/',include('movie.urls')),
+    path('api/metrics/', metrics, name='metrics'),
 ]
 
 if settings.DEBUG:
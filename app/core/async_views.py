@@ -0,0 +1,190 @@
+'''
+async read paths for the api views when served over ASGI
+
+django 3.2 runs every sync view of an ASGI request on one shared thread,
+and drf views are sync, so behind app.asgi a slow request would hold up
+all the others. With ASYNC_READS on, the read requests (GET, HEAD,
+OPTIONS) of the wrapped views run on a pool of ASYNC_READ_THREADS
+threads instead, each keeping its own database connection, while the
+event loop multiplexes the clients. Writes keep the shared thread, as
+for any other sync view
+
+django 3.2 also iterates streaming responses on the event loop, where
+the database is off limits and every chunk would hold up the other
+clients, so app.asgi serves them with StreamingASGIHandler, producing
+the body on a thread of its own a few chunks ahead of the loop
+'''
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Semaphore, Thread
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections, connections
+from django.urls import URLPattern
+from rest_framework.permissions import SAFE_METHODS
+
+
+_executor = None
+_executor_lock = Lock()
+_end = object()
+
+# chunks a streamed body is produced ahead of the event loop
+STREAM_AHEAD = 8
+
+
+def is_enabled():
+    return getattr(settings, 'ASYNC_READS', False)
+
+
+def get_threads():
+    return getattr(settings, 'ASYNC_READ_THREADS', 16)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_threads(),
+                thread_name_prefix='async-reads',
+            )
+        return _executor
+
+
+def _read(view, request, *args, **kwargs):
+    # the request signals that recycle connections fire on another
+    # thread, so do their work for the connections of this one
+    close_old_connections()
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def _produce(content, loop, chunks, room, stop):
+    def put(item):
+        while not stop.is_set():
+            if room.acquire(timeout=0.1):
+                loop.call_soon_threadsafe(chunks.put_nowait, item)
+                return True
+        return False
+
+    try:
+        for chunk in content:
+            if not put(chunk):
+                break
+    except Exception as exc:
+        put(exc)
+    finally:
+        if hasattr(content, 'close'):
+            content.close()
+        connections.close_all()
+        put(_end)
+
+
+async def stream_in_thread(content):
+    '''
+    iterate content on a new thread, yielding its chunks here without
+    blocking the event loop
+    '''
+    chunks = asyncio.Queue()
+    # chunks the thread may produce before this side takes them
+    room = Semaphore(STREAM_AHEAD)
+    stop = Event()
+    Thread(
+        target=_produce,
+        args=(content, asyncio.get_running_loop(), chunks, room, stop),
+        name='async-stream',
+        daemon=True,
+    ).start()
+    try:
+        while True:
+            chunk = await chunks.get()
+            room.release()
+            if chunk is _end:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        stop.set()
+
+
+class StreamingASGIHandler(ASGIHandler):
+    '''
+    ASGIHandler sending streaming bodies from stream_in_thread, where
+    django 3.2 iterates them on the event loop
+    '''
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        headers = [
+            (
+                header.encode('ascii') if isinstance(header, str) else header,
+                value.encode('latin1') if isinstance(value, str) else value,
+            )
+            for header, value in response.items()
+        ]
+        headers.extend(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+        body = stream_in_thread(iter(response))
+        try:
+            async for part in body:
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        finally:
+            await body.aclose()
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def async_reads(view):
+    '''a coroutine view running the reads of view on the read pool'''
+    write = sync_to_async(view, thread_sensitive=True)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return await write(request, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_executor(),
+            functools.partial(_read, view, request, *args, **kwargs),
+        )
+
+    return wrapper
+
+
+def async_read_patterns(urlpatterns):
+    '''
+    urlpatterns with their views wrapped by async_reads when ASYNC_READS
+    is on, unchanged otherwise so WSGI keeps calling the views directly
+    '''
+    if not is_enabled():
+        return urlpatterns
+    return [
+        URLPattern(
+            pattern.pattern,
+            async_reads(pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        )
+        if isinstance(pattern, URLPattern) else pattern
+        for pattern in urlpatterns
+    ]
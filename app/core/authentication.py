@@ -0,0 +1,189 @@
+'''
+token authentication that remembers which user a token belongs to
+
+resolved tokens, and the users of signed tokens, are kept in a bounded
+in-process LRU for TOKEN_CACHE_TIMEOUT seconds, and, with
+TOKEN_CACHE_ALIAS set, in that shared cache so other processes skip the
+lookup too. Deleting a token
+or saving its user drops the entries of this process and of the shared
+cache (see core.signals); other processes, and changes made without
+signals, e.g. queryset.update(), see the change once the entries expire
+'''
+
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as translate
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from core import tokens
+
+
+def get_timeout():
+    return getattr(settings, 'TOKEN_CACHE_TIMEOUT', 0)
+
+
+def get_shared_cache():
+    alias = getattr(settings, 'TOKEN_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def _shared_key(key):
+    # raw tokens are credentials, keep them out of the shared cache
+    return 'token-auth:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    '''
+    thread safe mapping of at most maxsize entries expiring after
+    timeout seconds, the least recently used entry is evicted first
+    '''
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LRUCache(getattr(settings, 'TOKEN_CACHE_SIZE', 10000))
+
+
+def invalidate(*keys):
+    '''forget the users of the tokens keys'''
+    for key in keys:
+        local_cache.delete(key)
+    shared = get_shared_cache()
+    if shared is not None and keys:
+        shared.delete_many([_shared_key(key) for key in keys])
+
+
+def _user_key(user_id):
+    return f'user:{user_id}'
+
+
+def invalidate_user(user_id):
+    '''forget the user and the users of every token of the user'''
+    invalidate(_user_key(user_id), *Token.objects.filter(
+        user_id=user_id,
+    ).values_list('key', flat=True))
+
+
+def get_user(user_id):
+    '''the user with user_id from the caches or the database, or None'''
+    timeout = get_timeout()
+    key = _user_key(user_id)
+    shared = get_shared_cache()
+    user = local_cache.get(key) if timeout else None
+    if user is None and timeout and shared is not None:
+        user = shared.get(_shared_key(key))
+        if user is not None:
+            local_cache.set(key, user, timeout)
+    if user is None:
+        try:
+            user = get_user_model().objects.get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        if timeout:
+            local_cache.set(key, user, timeout)
+            if shared is not None:
+                shared.set(_shared_key(key), user, timeout)
+    return copy.copy(user)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    '''
+    TokenAuthentication without the token and user query on every request
+    '''
+
+    def authenticate_credentials(self, key):
+        timeout = get_timeout()
+        if not timeout:
+            return super().authenticate_credentials(key)
+
+        resolved = local_cache.get(key)
+        shared = get_shared_cache()
+        if resolved is None and shared is not None:
+            resolved = shared.get(_shared_key(key))
+            if resolved is not None:
+                local_cache.set(key, resolved, timeout)
+        if resolved is None:
+            # raises AuthenticationFailed for unknown and inactive users
+            resolved = super().authenticate_credentials(key)
+            local_cache.set(key, resolved, timeout)
+            if shared is not None:
+                shared.set(_shared_key(key), resolved, timeout)
+
+        user, token = resolved
+        # a copy per request, views may change the user they are given
+        return copy.copy(user), token
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    '''
+    signed tokens from core.tokens, as "Authorization: Bearer <token>"
+
+    the signature and expiry are checked without the database, the user
+    comes from the caches above
+    '''
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed(translate('Invalid token header.'))
+        try:
+            payload = tokens.verify(auth[1].decode())
+        except (UnicodeError, tokens.InvalidToken) as exc:
+            raise AuthenticationFailed(str(exc))
+
+        user = get_user(payload['u'])
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(translate('User inactive or deleted.'))
+        return user, payload
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,42 @@
+'''
+postgres backend with connection health checks
+
+django 3.2 only drops a persistent connection once a query on it has
+failed. With CONN_HEALTH_CHECKS in the database settings a reused
+connection is tested the first time it is needed in each request, and
+replaced when the server or the network dropped it in the meantime
+'''
+
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    def connect(self):
+        # a fresh connection needs no checking, set first as connect()
+        # itself goes through ensure_connection()
+        self.health_check_done = True
+        super().connect()
+
+    def ensure_connection(self):
+        if (self.connection is not None
+                and not self.health_check_done
+                and not self.in_atomic_block):
+            self.check_health()
+        super().ensure_connection()
+
+    def check_health(self):
+        '''close the connection when it no longer answers'''
+        self.health_check_done = True
+        if (self.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not self.is_usable()):
+            self.close()
+
+    def close_if_unusable_or_obsolete(self):
+        # called as each request starts and finishes
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
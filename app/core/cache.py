@@ -0,0 +1,93 @@
+'''
+per-user response cache for the api list endpoints
+
+cached entries are keyed on a version number kept per user and
+namespace; writes bump the version instead of hunting down every entry,
+and the stale entries simply age out of the cache
+'''
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+RECIPES = 'recipes'
+MOVIES = 'movies'
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'API_CACHE_TIMEOUT', 0)
+
+
+def _version_key(namespace, user_id):
+    return f'api-cache-version:{namespace}:{user_id}'
+
+
+def _fresh_version():
+    # time based so an evicted counter never restarts at an old value
+    return time.time_ns() // 1000
+
+
+def get_version(namespace, user_id):
+    '''current version of the namespace for the user'''
+    cache = get_cache()
+    key = _version_key(namespace, user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace, user_id):
+    '''make every cached entry of the namespace for the user stale'''
+    cache = get_cache()
+    key = _version_key(namespace, user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+def invalidate(namespace, user_id):
+    '''
+    bump now for read-your-writes and again on commit, so a reader that
+    cached the old rows before the commit is not left serving them
+    '''
+    bump_version(namespace, user_id)
+    transaction.on_commit(lambda: bump_version(namespace, user_id))
+
+
+def normalize_params(query_params, names, text=()):
+    '''
+    query params reduced to a stable form, list values sorted; the
+    params named in text are free text and only stripped
+    '''
+    normalized = []
+    for name in names:
+        value = query_params.get(name)
+        if value is None:
+            continue
+        if name in text:
+            value = value.strip()
+        else:
+            parts = sorted({part.strip() for part in value.split(',')})
+            value = ','.join(parts)
+        normalized.append(f'{name}={value}')
+    return '&'.join(normalized)
+
+
+def response_key(endpoint, namespace, request, params):
+    '''cache key for the response of endpoint to request'''
+    version = get_version(namespace, request.user.pk)
+    digest = hashlib.sha1(
+        f'{request.get_host()}?{params}'.encode('utf-8')
+    ).hexdigest()
+    return f'api-cache:{endpoint}:{request.user.pk}:{version}:{digest}'
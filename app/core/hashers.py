@@ -0,0 +1,52 @@
+'''
+password hashers with their cost taken from the settings
+
+django rehashes a password on the next successful login when its hash
+was made by another hasher than the first of PASSWORD_HASHERS, or with
+other costs than the current ones, so changing either upgrades the
+stored hashes as users come back
+'''
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    '''argon2 with PASSWORD_ARGON2_TIME_COST, _MEMORY_COST, _PARALLELISM'''
+
+    @property
+    def time_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2_TIME_COST', 2)
+
+    @property
+    def memory_cost(self):
+        # KiB
+        return getattr(settings, 'PASSWORD_ARGON2_MEMORY_COST', 19456)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'PASSWORD_ARGON2_PARALLELISM', 1)
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    '''bcrypt with PASSWORD_BCRYPT_ROUNDS'''
+
+    @property
+    def rounds(self):
+        return getattr(settings, 'PASSWORD_BCRYPT_ROUNDS', 12)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    '''pbkdf2 with PASSWORD_PBKDF2_ITERATIONS'''
+
+    @property
+    def iterations(self):
+        return getattr(
+            settings,
+            'PASSWORD_PBKDF2_ITERATIONS',
+            PBKDF2PasswordHasher.iterations,
+        )
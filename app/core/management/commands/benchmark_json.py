@@ -0,0 +1,119 @@
+'''
+command comparing the json renderers and parsers on list sized payloads
+'''
+
+import datetime
+import io
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core import models
+from core import summary
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+from recipe.serializers import RecipeSummarySerializer
+
+
+class Command(BaseCommand):
+    '''
+    render a page of recipes as the list endpoint does, and a page of
+    movie rows holding raw Decimal and date values, with JSONRenderer and
+    with FastJSONRenderer, then parse the result back with both parsers.
+    Both must produce the same bytes; nothing touches the database
+    '''
+    help = 'Compare the stdlib and fast json renderers and parsers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='renders and parses to time per case',
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write('orjson is not installed, both sides use json')
+        count = options['recipes']
+        payloads = {
+            'recipes': self._page(
+                RecipeSummarySerializer(self._recipes(count), many=True).data,
+            ),
+            'movies': self._page(self._movies(count)),
+        }
+
+        self.stdout.write(
+            f'{"":<20}{"json":>12}{"fast":>12}{"speedup":>10}'
+        )
+        for name, data in payloads.items():
+            body = JSONRenderer().render(data)
+            if FastJSONRenderer().render(data) != body:
+                raise CommandError(f'the renderers disagree on {name}')
+            self._row(
+                f'render {name}', options['repeat'],
+                lambda: JSONRenderer().render(data),
+                lambda: FastJSONRenderer().render(data),
+            )
+            self._row(
+                f'parse {name}', options['repeat'],
+                lambda: JSONParser().parse(io.BytesIO(body)),
+                lambda: FastJSONParser().parse(io.BytesIO(body)),
+            )
+            self.stdout.write(f'{name}: {count} rows, {len(body)} bytes')
+
+    def _page(self, results):
+        return {'next': None, 'previous': None, 'results': results}
+
+    def _recipes(self, count):
+        return [
+            models.Recipe(
+                id=number,
+                title=f'recipe number {number}',
+                time_minutes=number % 120,
+                price=Decimal(number % 10000) / 100,
+                link=f'https://example.com/recipes/{number}',
+                summary=summary.of(
+                    tags=[
+                        models.Tag(id=tag, name=f'tag {tag}')
+                        for tag in range(number % 7, number % 7 + 4)
+                    ],
+                    ingredients=[
+                        models.Ingredients(id=item, name=f'ingredient {item}')
+                        for item in range(number % 11, number % 11 + 8)
+                    ],
+                ),
+            )
+            for number in range(1, count + 1)
+        ]
+
+    def _movies(self, count):
+        first = datetime.date(1950, 1, 1)
+        return [
+            {
+                'id': number,
+                'name': f'movie number {number}',
+                'release_date': first + datetime.timedelta(days=number),
+                'ratings': Decimal(number % 100) / 10,
+                'director': 'director',
+                'producer': 'producer',
+            }
+            for number in range(1, count + 1)
+        ]
+
+    def _row(self, case, repeat, baseline, fast):
+        baseline_ms = self._time(repeat, baseline)
+        fast_ms = self._time(repeat, fast)
+        self.stdout.write(
+            f'{case:<20}{baseline_ms:>10.2f}ms{fast_ms:>10.2f}ms'
+            f'{baseline_ms / fast_ms:>9.1f}x'
+        )
+
+    def _time(self, repeat, call):
+        call()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            call()
+        return (time.perf_counter() - started) * 1000 / repeat
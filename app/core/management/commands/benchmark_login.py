@@ -0,0 +1,92 @@
+'''
+command measuring token login throughput
+'''
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from user.serializers import TokenSerializer
+
+
+EMAIL = 'benchmark-login@example.com'
+PASSWORD = 'benchmark-password'
+
+# the django defaults before the tuned hashers and the login guards
+BASELINE = {
+    'PASSWORD_HASHERS': [
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    ],
+    'LOGIN_FAILURE_CACHE_TIMEOUT': 0,
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    '''
+    log a throwaway user in repeatedly, with good and with bad
+    credentials, first with the django defaults and then with the
+    current settings; nothing is left in the database
+    '''
+    help = 'Compare login throughput of the default and current hashers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--logins', type=int, default=20,
+            help='logins to time per case',
+        )
+
+    def handle(self, *args, **options):
+        logins = options['logins']
+        baseline = self._measure(logins, **BASELINE)
+        current = self._measure(logins)
+
+        self.stdout.write(f'{"":<28}{"baseline":>12}{"current":>12}')
+        for case in baseline:
+            self.stdout.write(
+                f'{case:<28}{baseline[case]:>10.1f}/s'
+                f'{current[case]:>10.1f}/s'
+            )
+        self.stdout.write(
+            f'current hasher: {settings.PASSWORD_HASHERS[0]}'
+        )
+
+    def _measure(self, logins, **overrides):
+        results = {}
+        with override_settings(**overrides):
+            try:
+                with transaction.atomic():
+                    get_user_model().objects.create_user(
+                        email=EMAIL, password=PASSWORD,
+                    )
+                    results['good credentials'] = self._rate(
+                        logins, self._login, PASSWORD,
+                    )
+                    results['repeated bad credentials'] = self._rate(
+                        logins, self._login, 'wrong-password',
+                    )
+                    raise Rollback
+            except Rollback:
+                pass
+        return results
+
+    def _login(self, password):
+        serializer = TokenSerializer(data={
+            'email': EMAIL, 'password': password,
+        })
+        return serializer.is_valid()
+
+    def _rate(self, logins, login, password):
+        # the first login may rehash the stored password
+        login(password)
+        started = time.perf_counter()
+        for _ in range(logins):
+            login(password)
+        return logins / (time.perf_counter() - started)
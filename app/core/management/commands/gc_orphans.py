@@ -0,0 +1,61 @@
+'''
+command deleting the tags, ingredients and characters nothing links to
+'''
+
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import orphans
+
+
+class Command(BaseCommand):
+    '''
+    delete orphaned tags, ingredients and characters in batches of
+    --batch-size rows, each in its own short transaction, sleeping
+    --sleep seconds between batches to leave the database to live
+    traffic. Rows linked to a recipe or movie within --grace hours are
+    kept. --dry-run only reports how many rows would be deleted
+    '''
+    help = 'Delete tags, ingredients and characters no longer in use'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--sleep', type=float, default=0.1,
+            help='seconds to pause between batches',
+        )
+        parser.add_argument(
+            '--grace', type=float, default=24,
+            help='hours rows are kept after they were last linked',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='report the orphans instead of deleting them',
+        )
+
+    def handle(self, *args, **options):
+        grace = datetime.timedelta(hours=options['grace'])
+        total = 0
+        for model in orphans.MODELS:
+            name = f'{model.__name__} rows'
+            if options['dry_run']:
+                count = orphans.orphaned(model.objects.all(), grace).count()
+                self.stdout.write(f'{count} orphaned {name}')
+            else:
+                count = self._collect(model, grace, options)
+                self.stdout.write(f'deleted {count} orphaned {name}')
+            total += count
+        verb = 'would delete' if options['dry_run'] else 'deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} orphans'))
+
+    def _collect(self, model, grace, options):
+        deleted = 0
+        for number, ids in enumerate(
+            orphans.batches(model, options['batch_size'], grace),
+        ):
+            if number and options['sleep']:
+                time.sleep(options['sleep'])
+            deleted += orphans.delete(model, ids, grace)
+        return deleted
@@ -0,0 +1,349 @@
+'''
+command driving api workloads and reporting latency percentiles as json
+'''
+
+import io
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib import error, request as urlrequest
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.management.commands.seed_benchmark import EMAIL, PASSWORD
+
+
+QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+# records per recipe_bulk request
+BULK_RECORDS = 500
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    '''
+    serves requests from a fixed pool of threads, so database
+    connections are kept and reused as under a real application server
+    '''
+
+    def __init__(self, *args, workers, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        # close the connections of every pool thread, the barrier makes
+        # each thread take exactly one of these
+        barrier = threading.Barrier(self.workers)
+
+        def close():
+            barrier.wait()
+            connections.close_all()
+
+        for _ in range(self.workers):
+            self.pool.submit(close)
+        self.pool.shutdown()
+
+
+def percentile(ordered, fraction):
+    '''nearest rank percentile of an ordered list'''
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def jpeg():
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), (200, 120, 40)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class Client:
+    '''minimal json api client over urllib'''
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.token = None
+
+    def call(self, method, path, data=None, files=None):
+        '''(status, body, queries or None)'''
+        headers = {}
+        body = None
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        if files:
+            boundary = uuid.uuid4().hex
+            headers['Content-Type'] = (
+                f'multipart/form-data; boundary={boundary}'
+            )
+            body = b''.join(
+                f'--{boundary}\r\nContent-Disposition: form-data; '
+                f'name="{name}"; filename="{name}.jpg"\r\n'
+                f'Content-Type: image/jpeg\r\n\r\n'.encode()
+                + content + b'\r\n'
+                for name, content in files.items()
+            ) + f'--{boundary}--\r\n'.encode()
+        elif isinstance(data, bytes):
+            # already encoded json lines
+            headers['Content-Type'] = 'application/x-ndjson'
+            body = data
+        elif data is not None:
+            headers['Content-Type'] = 'application/json'
+            body = json.dumps(data).encode()
+        req = urlrequest.Request(
+            self.base_url + path, data=body, headers=headers, method=method,
+        )
+        try:
+            with urlrequest.urlopen(req) as res:
+                status, content, timing = (
+                    res.status, res.read(), res.headers.get('Server-Timing'),
+                )
+        except error.HTTPError as exc:
+            status, content, timing = (
+                exc.code, exc.read(), exc.headers.get('Server-Timing'),
+            )
+        match = QUERIES.search(timing or '')
+        return status, content, int(match.group(1)) if match else None
+
+    def json(self, method, path, data=None):
+        status, content, _ = self.call(method, path, data)
+        if status >= 400:
+            raise CommandError(f'{method} {path} answered {status}')
+        return json.loads(content)
+
+
+class Workloads:
+    '''the requests of each workload, picked from the seeded data'''
+
+    def __init__(self, client, rng):
+        self.client = client
+        self.random = rng
+        self.image = jpeg()
+        recipes = client.json(
+            'GET', reverse('recipe:recipe-list') + '?page_size=500',
+        )['results']
+        movies = client.json(
+            'GET', reverse('movie:movie-list') + '?page_size=500',
+        )['results']
+        tags = client.json(
+            'GET', reverse('recipe:tag-list') + '?page_size=500',
+        )['results']
+        if not recipes or not movies or not tags:
+            raise CommandError('no data to load test, run seed_benchmark')
+        self.recipe_ids = [recipe['id'] for recipe in recipes]
+        self.movie_ids = [movie['id'] for movie in movies]
+        self.tags = tags
+
+    def names(self):
+        return sorted(name for name in dir(self) if name.startswith('w_'))
+
+    def w_recipe_list(self):
+        return 'GET', reverse('recipe:recipe-list'), None, None
+
+    def w_recipe_detail(self):
+        recipe_id = self.random.choice(self.recipe_ids)
+        path = reverse('recipe:recipe-detail', args=[recipe_id])
+        return 'GET', path, None, None
+
+    def w_recipe_filter(self):
+        tags = ','.join(
+            str(tag['id']) for tag in self.random.sample(self.tags, 2)
+        )
+        path = reverse('recipe:recipe-list') + f'?tags={tags}'
+        return 'GET', path, None, None
+
+    def _recipe(self):
+        return {
+            'title': 'load test recipe',
+            'time_minutes': 20,
+            'price': '7.50',
+            'tags': [
+                {'name': tag['name']}
+                for tag in self.random.sample(self.tags, 3)
+            ],
+            'ingredients': [{'name': 'load test ingredient'}],
+        }
+
+    def w_recipe_create(self):
+        return 'POST', reverse('recipe:recipe-list'), self._recipe(), None
+
+    def w_recipe_bulk(self):
+        body = '\n'.join(
+            json.dumps(self._recipe()) for _ in range(BULK_RECORDS)
+        ).encode()
+        return 'POST', reverse('recipe:recipe-bulk'), body, None
+
+    def w_recipe_update(self):
+        recipe_id = self.random.choice(self.recipe_ids)
+        path = reverse('recipe:recipe-detail', args=[recipe_id])
+        data = {'time_minutes': self.random.randint(5, 90)}
+        return 'PATCH', path, data, None
+
+    def w_recipe_upload(self):
+        recipe_id = self.random.choice(self.recipe_ids)
+        path = reverse('recipe:recipe-upload-image', args=[recipe_id])
+        return 'POST', path, None, {'image': self.image}
+
+    def w_tag_list(self):
+        return 'GET', reverse('recipe:tag-list'), None, None
+
+    def w_ingredient_list(self):
+        return 'GET', reverse('recipe:ingredients-list'), None, None
+
+    def w_movie_list(self):
+        return 'GET', reverse('movie:movie-list'), None, None
+
+    def w_movie_detail(self):
+        movie_id = self.random.choice(self.movie_ids)
+        path = reverse('movie:movie-detail', args=[movie_id])
+        return 'GET', path, None, None
+
+
+class Command(BaseCommand):
+    '''
+    run each workload against a seeded benchmark user and print one json
+    document with, per workload, the request rate, latency percentiles
+    and the database queries per request; a recipe_bulk request imports
+    BULK_RECORDS recipes. Without --url the app is
+    served in process with PERF_METRICS on, which supplies the query
+    counts; a remote server only reports them when it has it on too
+    '''
+    help = 'Load test the recipe and movie apis'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', help='server to test, by default one started here',
+        )
+        parser.add_argument(
+            '--workloads', default='',
+            help='comma separated workloads, all by default',
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--server-threads', type=int, default=8,
+            help='threads of the in process server',
+        )
+        parser.add_argument('--email', default=EMAIL.format(0))
+        parser.add_argument('--password', default=PASSWORD)
+        parser.add_argument(
+            '--label', default='',
+            help='recorded in the report, e.g. a branch',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['url']:
+            report = self._run(options['url'], options)
+        else:
+            with override_settings(
+                PERF_METRICS=True,
+                PERF_SERVER_TIMING=True,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, '127.0.0.1'],
+            ):
+                report = self._run_local(options)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def _run_local(self, options):
+        server = PooledWSGIServer(
+            ('127.0.0.1', 0),
+            QuietRequestHandler,
+            workers=options['server_threads'],
+        )
+        server.set_app(get_wsgi_application())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            return self._run(
+                'http://%s:%s' % server.server_address[:2], options,
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _run(self, url, options):
+        client = Client(url)
+        client.token = client.json('POST', reverse('user:token'), {
+            'email': options['email'], 'password': options['password'],
+        })['token']
+        workloads = Workloads(client, random.Random(options['seed']))
+        names = [
+            name.strip() for name in options['workloads'].split(',')
+            if name.strip()
+        ] or [name[2:] for name in workloads.names()]
+        unknown = set(names) - {name[2:] for name in workloads.names()}
+        if unknown:
+            raise CommandError(
+                f'unknown workloads: {", ".join(sorted(unknown))}'
+            )
+
+        return {
+            'label': options['label'],
+            'url': url,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'workloads': {
+                name: self._measure(
+                    client,
+                    getattr(workloads, f'w_{name}'),
+                    options['requests'],
+                    options['concurrency'],
+                )
+                for name in names
+            },
+        }
+
+    def _measure(self, client, workload, requests, concurrency):
+        calls = [workload() for _ in range(requests)]
+
+        def timed(call):
+            method, path, data, files = call
+            started = time.perf_counter()
+            status, _, queries = client.call(method, path, data, files)
+            return time.perf_counter() - started, status, queries
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(timed, calls))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(seconds * 1000 for seconds, _, _ in results)
+        queries = [count for _, _, count in results if count is not None]
+        return {
+            'requests': len(results),
+            'errors': sum(status >= 400 for _, status, _ in results),
+            'rps': round(len(results) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'queries_per_request': (
+                round(sum(queries) / len(queries), 2) if queries else None
+            ),
+        }
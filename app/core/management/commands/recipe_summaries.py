@@ -0,0 +1,43 @@
+'''
+command rebuilding or verifying the denormalized recipe summaries
+'''
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import models
+from core import summary
+
+
+class Command(BaseCommand):
+    '''
+    recompute Recipe.summary of every recipe, or with --verify only
+    compare the stored summaries with the tags and ingredients and fail
+    when any is out of date
+    '''
+    help = 'Backfill or verify the recipe summaries used by recipe lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='report stale summaries instead of rebuilding them',
+        )
+
+    def handle(self, *args, **options):
+        recipes = models.Recipe.objects.all()
+        if not options['verify']:
+            summary.update_summaries(recipes)
+            self.stdout.write(self.style.SUCCESS(
+                f'rebuilt {recipes.count()} recipe summaries'
+            ))
+            return
+
+        stale = summary.stale(recipes)
+        if stale:
+            sample = ', '.join(str(pk) for pk in stale[:10])
+            raise CommandError(
+                f'{len(stale)} stale recipe summaries, e.g. recipes {sample}; '
+                'run recipe_summaries to rebuild them'
+            )
+        self.stdout.write(
+            self.style.SUCCESS('recipe summaries are up to date')
+        )
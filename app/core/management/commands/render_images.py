@@ -0,0 +1,44 @@
+'''
+command rendering the recipe images left pending
+'''
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import models
+from recipe import images
+
+
+class Command(BaseCommand):
+    '''
+    render the renditions of every recipe whose image is still pending,
+    e.g. because the process holding its job stopped. Images uploaded
+    less than --min-age seconds ago are left to the workers that may
+    still hold their jobs; run at startup, before any worker takes
+    uploads, 0 renders them all
+    '''
+    help = 'Render the recipe images left pending by lost jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=float, default=0,
+            help='seconds since the upload before an image is rendered',
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - datetime.timedelta(
+            seconds=options['min_age'],
+        )
+        pending = models.Recipe.objects.filter(
+            image_status=models.Recipe.IMAGE_PENDING,
+            updated_at__lte=before,
+        ).exclude(image='').values_list('pk', 'image').order_by('pk')
+        rendered = 0
+        for recipe_id, name in pending.iterator():
+            if images.process(recipe_id, name) is not None:
+                rendered += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'rendered {rendered} pending images')
+        )
@@ -0,0 +1,163 @@
+'''
+command seeding benchmark users with realistic data volumes
+'''
+
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import models
+from core import search
+from core import summary
+from core import usage
+
+
+EMAIL = 'benchmark-{}@example.com'
+PASSWORD = 'benchmark-password'
+BATCH_SIZE = 1000
+
+WORDS = (
+    'spicy', 'roasted', 'chicken', 'tomato', 'garlic', 'lemon', 'pasta',
+    'curry', 'salad', 'soup', 'grilled', 'baked', 'fresh', 'creamy',
+    'sweet', 'smoky', 'rice', 'beans', 'noodles', 'mushroom', 'ginger',
+    'honey', 'pepper', 'cheese', 'bread', 'fish', 'beef', 'pork', 'tofu',
+)
+
+
+class Command(BaseCommand):
+    '''
+    create benchmark users, each with recipes linked to tags and
+    ingredients and movies linked to characters, written in batches.
+    Existing benchmark users are deleted first, so a run always ends with
+    the same volumes; --seed makes the content repeatable too
+    '''
+    help = 'Seed benchmark users with recipes and movies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=500)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument(
+            '--tags-per-recipe', type=int, default=4,
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8,
+        )
+        parser.add_argument('--movies', type=int, default=500)
+        parser.add_argument('--characters', type=int, default=1000)
+        parser.add_argument(
+            '--characters-per-movie', type=int, default=40,
+        )
+        parser.add_argument('--password', default=PASSWORD)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.options = options
+        for number in range(options['users']):
+            with transaction.atomic():
+                user = self._user(EMAIL.format(number))
+                self._recipes(user)
+                self._movies(user)
+            self.stdout.write(f'seeded {user.email}')
+        self.stdout.write(self.style.SUCCESS(
+            f'seeded {options["users"]} users, password '
+            f'{options["password"]!r}'
+        ))
+
+    def _user(self, email):
+        get_user_model().objects.filter(email=email).delete()
+        return get_user_model().objects.create_user(
+            email=email, password=self.options['password'],
+        )
+
+    def _phrase(self, words):
+        return ' '.join(self.random.sample(WORDS, words))
+
+    def _named(self, model, user, count, label):
+        model.objects.bulk_create(
+            [model(user=user, name=f'{label} {i}') for i in range(count)],
+            batch_size=BATCH_SIZE,
+        )
+        return self._owned_ids(model, user)
+
+    def _link(self, through, owner_column, owner_ids, column, ids, per):
+        per = min(per, len(ids))
+        rows = []
+        for owner_id in owner_ids:
+            for linked in self.random.sample(ids, per):
+                rows.append(
+                    through(**{owner_column: owner_id, column: linked})
+                )
+                if len(rows) >= BATCH_SIZE:
+                    through.objects.bulk_create(rows)
+                    rows = []
+        through.objects.bulk_create(rows)
+
+    def _owned_ids(self, model, user):
+        return list(
+            model.objects.filter(user=user).order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    def _recipes(self, user):
+        options = self.options
+        tag_ids = self._named(models.Tag, user, options['tags'], 'tag')
+        ingredient_ids = self._named(
+            models.Ingredients, user, options['ingredients'], 'ingredient',
+        )
+        models.Recipe.objects.bulk_create([
+            models.Recipe(
+                user=user,
+                title=self._phrase(3),
+                description=self._phrase(12),
+                time_minutes=self.random.randint(5, 240),
+                price=Decimal(self.random.randint(100, 9999)) / 100,
+            )
+            for _ in range(options['recipes'])
+        ], batch_size=BATCH_SIZE)
+        recipe_ids = self._owned_ids(models.Recipe, user)
+        self._link(
+            models.Recipe.tags.through, 'recipe_id', recipe_ids,
+            'tag_id', tag_ids, options['tags_per_recipe'],
+        )
+        self._link(
+            models.Recipe.ingredients.through, 'recipe_id', recipe_ids,
+            'ingredients_id', ingredient_ids,
+            options['ingredients_per_recipe'],
+        )
+        # bulk writes send no signals
+        recipes = models.Recipe.objects.filter(user=user)
+        search.update_search_vector(recipes)
+        summary.update_summaries(recipes)
+        usage.backfill(models.Tag.objects.filter(user=user))
+        usage.backfill(models.Ingredients.objects.filter(user=user))
+
+    def _movies(self, user):
+        options = self.options
+        character_ids = self._named(
+            models.Characters, user, options['characters'], 'character',
+        )
+        first = datetime.date(1950, 1, 1)
+        models.Movie.objects.bulk_create([
+            models.Movie(
+                user=user,
+                name=self._phrase(2),
+                release_date=first + datetime.timedelta(
+                    days=self.random.randint(0, 27000),
+                ),
+                ratings=Decimal(self.random.randint(0, 100)) / 10,
+            )
+            for _ in range(options['movies'])
+        ], batch_size=BATCH_SIZE)
+        self._link(
+            models.Movie.characters.through, 'movie_id',
+            self._owned_ids(models.Movie, user),
+            'characters_id', character_ids,
+            options['characters_per_movie'],
+        )
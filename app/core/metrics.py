@@ -0,0 +1,120 @@
+'''
+in-process request histograms, rendered in the prometheus text format
+
+every process keeps its own counts, so a scraper has to reach each
+worker (or sum what it is given); they start over on restart
+'''
+
+import bisect
+import threading
+
+
+SECONDS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERIES = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+)
+
+
+class Histogram:
+    '''cumulative bucket counts per view, like a prometheus histogram'''
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(view)
+            if series is None:
+                # counts per bucket, the last one being +Inf, then the sum
+                series = self._series[view] = [0] * (len(self.buckets) + 1)
+                series.append(0)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        '''(view, [(le, cumulative count)], sum, count) per view'''
+        with self._lock:
+            series = {
+                view: list(counts) for view, counts in self._series.items()
+            }
+        for view in sorted(series):
+            counts = series[view]
+            total = 0
+            buckets = []
+            for le, count in zip(self.buckets + ('+Inf',), counts[:-1]):
+                total += count
+                buckets.append((le, total))
+            yield view, buckets, counts[-1], total
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} histogram',
+        ]
+        for view, buckets, total, count in self.samples():
+            label = _escape(view)
+            for le, cumulative in buckets:
+                lines.append(
+                    f'{self.name}_bucket{{view="{label}",le="{le}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total:g}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {count}')
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_duration = Histogram(
+    'api_request_duration_seconds', 'Wall time of the request.', SECONDS,
+)
+db_duration = Histogram(
+    'api_db_duration_seconds', 'Time spent in database queries.', SECONDS,
+)
+db_queries = Histogram(
+    'api_db_queries', 'Database queries run by the request.', QUERIES,
+)
+serialize_duration = Histogram(
+    'api_serialize_duration_seconds',
+    'Time in the view outside database queries, serializers mostly.',
+    SECONDS,
+)
+render_duration = Histogram(
+    'api_render_duration_seconds', 'Time rendering the response.', SECONDS,
+)
+response_size = Histogram(
+    'api_response_size_bytes', 'Size of the response body.', BYTES,
+)
+
+HISTOGRAMS = (
+    request_duration,
+    db_duration,
+    db_queries,
+    serialize_duration,
+    render_duration,
+    response_size,
+)
+
+
+def render():
+    '''every histogram in the prometheus text exposition format'''
+    return '\n'.join(histogram.render() for histogram in HISTOGRAMS) + '\n'
+
+
+def clear():
+    for histogram in HISTOGRAMS:
+        histogram.clear()
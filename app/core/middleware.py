@@ -0,0 +1,169 @@
+'''
+per-request timing, sent back as Server-Timing and kept in core.metrics,
+and the opt-in repeated and slow query detector
+
+both remove themselves from the chain when they are loaded switched off,
+so they cost nothing per request
+'''
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core import metrics, queries
+
+
+logger = logging.getLogger(__name__)
+
+
+UNRESOLVED = 'unresolved'
+
+
+def view_name(view_func, method):
+    '''RecipeView.list for viewsets, TokenView.post for api views'''
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        cls = getattr(view_func, 'view_class', None)
+    if cls is None:
+        return getattr(view_func, '__qualname__', UNRESOLVED)
+    actions = getattr(view_func, 'actions', None) or {}
+    return f'{cls.__name__}.{actions.get(method, method)}'
+
+
+class RequestTimer:
+    '''what one request spent where'''
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = UNRESOLVED
+        self.view_started = None
+        self.view_finished = None
+        self.rendered = None
+        self.queries = 0
+        self.db = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper hook, timing every query of the request
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def rendered_callback(self, response):
+        self.rendered = time.perf_counter()
+
+    def timings(self, finished):
+        '''milliseconds per server-timing metric'''
+        serialize = render = 0.0
+        if self.view_started is not None:
+            view_finished = self.view_finished or finished
+            serialize = max(view_finished - self.view_started - self.db, 0.0)
+            if self.rendered is not None:
+                render = self.rendered - view_finished
+        return {
+            'total': finished - self.started,
+            'db': self.db,
+            'serialize': serialize,
+            'render': render,
+        }
+
+
+class PerformanceMiddleware:
+    '''
+    time requests by resolved view: wall time, database queries and
+    their time, time in the view outside of queries (serializers mostly),
+    response rendering and size
+
+    goes first in MIDDLEWARE so the wall time covers the other middleware
+    '''
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_METRICS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'PERF_SERVER_TIMING', True)
+
+    def __call__(self, request):
+        timer = RequestTimer()
+        request._request_timer = timer
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        self.record(timer, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timer = request._request_timer
+        timer.view = view_name(view_func, request.method.lower())
+        timer.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # drf responses are rendered after the view returns
+        timer = request._request_timer
+        timer.view_finished = time.perf_counter()
+        response.add_post_render_callback(timer.rendered_callback)
+        return response
+
+    def record(self, timer, response):
+        timings = timer.timings(time.perf_counter())
+        view = timer.view
+        metrics.request_duration.observe(view, timings['total'])
+        metrics.db_duration.observe(view, timings['db'])
+        metrics.db_queries.observe(view, timer.queries)
+        metrics.serialize_duration.observe(view, timings['serialize'])
+        metrics.render_duration.observe(view, timings['render'])
+        if not response.streaming:
+            metrics.response_size.observe(view, len(response.content))
+
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={seconds * 1000:.1f}'
+                + (f';desc="{timer.queries} queries"' if name == 'db' else '')
+                for name, seconds in timings.items()
+            )
+
+
+class QueryDetectorMiddleware:
+    '''
+    fingerprint the queries of each request; statement shapes run more
+    than QUERY_REPEAT_LIMIT times are logged with QUERY_DETECTOR=log and
+    fail the request with QUERY_DETECTOR=raise, for tests and staging.
+    Statements slower than SLOW_QUERY_MS are logged either way
+    '''
+
+    def __init__(self, get_response):
+        self.mode = getattr(settings, 'QUERY_DETECTOR', '')
+        if not self.mode:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with queries.record() as log:
+            response = self.get_response(request)
+        self.check(request, log)
+        return response
+
+    def check(self, request, log):
+        for sql, milliseconds in log.slow():
+            logger.warning(
+                'slow query in %s %s (%.1fms): %s',
+                request.method, request.path, milliseconds, sql,
+            )
+        repeated = log.repeated()
+        if not repeated:
+            return
+        message = '%s %s repeated queries:\n%s' % (
+            request.method,
+            request.path,
+            '\n'.join(f'  {count}x {shape}' for shape, count in repeated),
+        )
+        if self.mode == 'raise':
+            raise queries.QueryBudgetExceeded(message)
+        logger.warning(message)
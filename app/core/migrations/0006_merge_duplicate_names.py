@@ -0,0 +1,56 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:06
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+# (named model, model owning the relation, relation name)
+NAMED_RELATIONS = [
+    ('Tag', 'Recipe', 'tags'),
+    ('Ingredients', 'Recipe', 'ingredients'),
+    ('Characters', 'Movie', 'characters'),
+]
+
+
+def merge_duplicate_names(apps, schema_editor):
+    '''fold duplicate names per user into the oldest row'''
+    for model_name, owner_name, relation in NAMED_RELATIONS:
+        model = apps.get_model('core', model_name)
+        owner = apps.get_model('core', owner_name)
+        through = owner._meta.get_field(relation).remote_field.through
+        target = f'{model._meta.model_name}_id'
+        source = f'{owner._meta.model_name}_id'
+
+        duplicates = (
+            model.objects.values('user_id', 'name')
+            .annotate(keep=Min('id'), total=Count('id'))
+            .filter(total__gt=1)
+        )
+        for row in duplicates:
+            extra_ids = list(
+                model.objects.filter(user_id=row['user_id'], name=row['name'])
+                .exclude(id=row['keep'])
+                .values_list('id', flat=True)
+            )
+            for extra_id in extra_ids:
+                linked = through.objects.filter(
+                    **{target: row['keep']}
+                ).values(source)
+                through.objects.filter(
+                    **{target: extra_id, f'{source}__in': linked}
+                ).delete()
+                through.objects.filter(
+                    **{target: extra_id}
+                ).update(**{target: row['keep']})
+            model.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_auto_20221026_1738'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:18
+
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+# a frozen copy of core.search.document as of this migration
+
+
+def _names(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(recipe=OuterRef('pk'))
+            .values('recipe')
+            .annotate(names=StringAgg('name', ' '))
+            .values('names')
+        ),
+        Value(''),
+    )
+
+
+def _document(tag_model, ingredient_model):
+    return (
+        SearchVector('title', weight='A', config='english')
+        + SearchVector(_names(tag_model), weight='B', config='english')
+        + SearchVector(_names(ingredient_model), weight='B', config='english')
+        + SearchVector('description', weight='C', config='english')
+    )
+
+
+def create_search_index(apps, schema_editor):
+    '''GIN index the vectors and fill them in, postgres only'''
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX core_recipe_search_vector_idx '
+        'ON core_recipe USING gin (search_vector)'
+    )
+    Recipe = apps.get_model('core', 'Recipe')
+    Recipe.objects.update(search_vector=_document(
+        apps.get_model('core', 'Tag'),
+        apps.get_model('core', 'Ingredients'),
+    ))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX core_recipe_search_vector_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recipe_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+# a frozen copy of core.summary.update_summaries as of this migration
+RELATIONS = {
+    'tags': ('tags', 'tag'),
+    'ingredients': ('ingredients', 'ingredients'),
+}
+BATCH_SIZE = 500
+
+
+def _build(Recipe, recipe_ids, using):
+    summaries = {pk: {key: [] for key in RELATIONS} for pk in recipe_ids}
+    for key, (relation, column) in RELATIONS.items():
+        through = Recipe._meta.get_field(relation).remote_field.through
+        rows = (
+            through.objects.using(using).filter(recipe_id__in=recipe_ids)
+            .order_by(f'{column}_id')
+            .values_list('recipe_id', f'{column}_id', f'{column}__name')
+        )
+        for recipe_id, pk, name in rows:
+            summaries[recipe_id][key].append({'id': pk, 'name': name})
+    return summaries
+
+
+def fill_summaries(apps, schema_editor):
+    Recipe = apps.get_model('core', 'Recipe')
+    using = schema_editor.connection.alias
+    ids = list(
+        Recipe.objects.using(using).order_by().values_list('pk', flat=True)
+    )
+    for start in range(0, len(ids), BATCH_SIZE):
+        summaries = _build(Recipe, ids[start:start + BATCH_SIZE], using)
+        Recipe.objects.using(using).bulk_update(
+            [
+                Recipe(pk=pk, summary=summary)
+                for pk, summary in summaries.items()
+            ],
+            ['summary'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='summary',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:19
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# a frozen copy of core.usage.backfill as of this migration
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('core', 'Recipe')
+    alias = schema_editor.connection.alias
+    for name, relation in (('Tag', 'tags'), ('Ingredients', 'ingredients')):
+        field = Recipe._meta.get_field(relation)
+        column = field.m2m_reverse_field_name()
+        links = (
+            field.remote_field.through.objects.using(alias)
+            .filter(**{column: OuterRef('pk')})
+            .order_by()
+            .values(column)
+            .annotate(count=Count('*'))
+            .values('count')
+        )
+        latest = (
+            Recipe.objects.using(alias)
+            .filter(**{relation: OuterRef('pk')})
+            .order_by('-updated_at')
+            .values('updated_at')[:1]
+        )
+        apps.get_model('core', name).objects.using(alias).update(
+            recipe_count=Coalesce(
+                Subquery(links, output_field=IntegerField()), 0,
+            ),
+            last_used=Subquery(latest),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_recipe_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredients',
+            name='last_used',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ingredients',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='last_used',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_usage_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredients',
+            index=models.Index(fields=['user', '-recipe_count', 'name', 'id'], name='ingredient_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', '-recipe_count', 'name', 'id'], name='tag_popular_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_usage_popular_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='characters',
+            name='last_used',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,353 @@
+'''
+mixins shared by the api views and serializers
+'''
+
+import hashlib
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.utils.translation import gettext_lazy as translate
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
+from rest_framework import serializers, status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from core import cache as api_cache
+
+
+def _concrete_columns(serializer, names=None):
+    '''
+    model columns read by the fields of a model serializer, or by the
+    fields in names only
+    '''
+    opts = serializer.Meta.model._meta
+    columns = []
+    for name, field in serializer.fields.items():
+        if names is not None and name not in names:
+            continue
+        try:
+            model_field = opts.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if model_field.concrete and not model_field.many_to_many:
+            columns.append(model_field.attname)
+    return columns
+
+
+@lru_cache(maxsize=None)
+def related_lookups(serializer_class, names=None):
+    '''
+    work out which relations serializer_class renders through nested
+    serializers, returning (select_related, prefetch_related) where each
+    prefetch entry is (relation, model, columns); names restricts this to
+    the fields rendered by a sparse fieldset
+    '''
+    select = []
+    prefetch = []
+    for name, field in serializer_class().fields.items():
+        if names is not None and name not in names:
+            continue
+        if field.write_only or '.' in field.source or field.source == '*':
+            continue
+        if (isinstance(field, serializers.ListSerializer)
+                and isinstance(field.child, serializers.ModelSerializer)):
+            prefetch.append((
+                field.source,
+                field.child.Meta.model,
+                tuple(_concrete_columns(field.child)),
+            ))
+        elif isinstance(field, serializers.ModelSerializer):
+            select.append(field.source)
+    return tuple(select), tuple(prefetch)
+
+
+class PrefetchRelatedMixin:
+    '''
+    load the relations rendered by the active serializer up front, so a
+    list costs a fixed number of queries whatever the page size
+    '''
+
+    def get_prefetch_lookups(self):
+        '''(select_related, prefetch_related) lookups for this request'''
+        names = None
+        if hasattr(self, 'get_rendered_fields'):
+            names = self.get_rendered_fields()
+        select, prefetch = related_lookups(self.get_serializer_class(), names)
+        # a fresh Prefetch per request, the querysets are not shareable
+        return select, [
+            Prefetch(source, queryset=model.objects.only(*columns))
+            for source, model, columns in prefetch
+        ]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        select, prefetch = self.get_prefetch_lookups()
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch and not getattr(self, 'defer_prefetch', False):
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+@lru_cache(maxsize=None)
+def _readable_fields(serializer_class):
+    return frozenset(
+        name for name, field in serializer_class().fields.items()
+        if not field.write_only
+    )
+
+
+@lru_cache(maxsize=None)
+def _rendered_columns(serializer_class, names):
+    return tuple(_concrete_columns(serializer_class(), names))
+
+
+def _split(value):
+    return {part.strip() for part in (value or '').split(',') if part.strip()}
+
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of the fields to return',
+    ),
+    OpenApiParameter(
+        'omit',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to leave out',
+    ),
+]
+
+
+class SparseFieldsMixin:
+    '''
+    ?fields=a,b renders only the named fields and ?omit=a,b drops some.
+    The columns loaded are narrowed with only() to those fields, the
+    primary key and the ordering, and PrefetchRelatedMixin skips the
+    relations left out, so a narrow read is cheap in SQL and not just
+    trimmed after the fact. Writes always render every field
+
+    the params change the payload, so views caching their responses list
+    them in cache_query_params and etag_query_params
+    '''
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def get_rendered_fields(self):
+        '''frozenset of the serializer fields to render, None for all'''
+        if self.request.method not in SAFE_METHODS:
+            return None
+        if not hasattr(self, '_rendered_fields'):
+            self._rendered_fields = self._parse_rendered_fields()
+        return self._rendered_fields
+
+    def _parse_rendered_fields(self):
+        params = self.request.query_params
+        fields = _split(params.get(self.fields_query_param))
+        omit = _split(params.get(self.omit_query_param))
+        if not fields and not omit:
+            return None
+        available = _readable_fields(self.get_serializer_class())
+        errors = {}
+        for param, names in (
+            (self.fields_query_param, fields),
+            (self.omit_query_param, omit),
+        ):
+            unknown = names - available
+            if unknown:
+                errors[param] = [
+                    translate('Unknown fields: %(fields)s') % {
+                        'fields': ', '.join(sorted(unknown)),
+                    },
+                ]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return frozenset((fields or available) - omit)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = self.get_rendered_fields()
+        if names is not None:
+            fields = getattr(serializer, 'child', serializer).fields
+            for name in list(fields):
+                if name not in names:
+                    fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        names = self.get_rendered_fields()
+        if names is None:
+            return queryset
+        opts = queryset.model._meta
+        columns = {opts.pk.attname}
+        columns.update(_rendered_columns(self.get_serializer_class(), names))
+        # the pagination cursor and the detail ETag read these too
+        etag_field = getattr(self, 'etag_field', None)
+        for name in [*queryset.query.order_by, etag_field]:
+            if not isinstance(name, str):
+                continue
+            try:
+                field = opts.get_field(name.lstrip('-'))
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                columns.add(field.attname)
+        return queryset.only(*columns)
+
+
+class CachedListMixin:
+    '''
+    serve list responses from the per-user response cache, keyed on the
+    query params in cache_query_params and invalidated by version bumps
+    for cache_namespace
+    '''
+    cache_namespace = None
+    cache_query_params = ('cursor', 'page_size')
+    # free text params, kept whole instead of split on commas
+    cache_text_params = ()
+
+    def list_cache_key(self, request):
+        '''cache key of the list response for request'''
+        return api_cache.response_key(
+            type(self).__name__,
+            self.cache_namespace,
+            request,
+            api_cache.normalize_params(
+                request.query_params,
+                self.cache_query_params,
+                self.cache_text_params,
+            ),
+        )
+
+    def list(self, request, *args, **kwargs):
+        timeout = api_cache.get_timeout()
+        if not timeout:
+            return super().list(request, *args, **kwargs)
+
+        cache = api_cache.get_cache()
+        key = self.list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout)
+        return response
+
+
+class ConditionalGetMixin:
+    '''
+    strong ETags on list and retrieve, answering a matching If-None-Match
+    with 304 before any serializer runs
+
+    list ETags come from the response cache version, so this goes before
+    CachedListMixin and lists only get one while that cache is on, i.e.
+    shared between processes; detail ETags come from the etag_field of
+    the row, loaded without the prefetches of PrefetchRelatedMixin. Both
+    cover the negotiated format, each renders differently
+    '''
+    etag_field = 'updated_at'
+    etag_query_params = ()
+
+    def _etag(self, *parts):
+        digest = hashlib.sha1(
+            ':'.join(str(part) for part in parts).encode('utf-8')
+        ).hexdigest()
+        return f'"{digest}"'
+
+    def _not_modified(self, request, etag):
+        header = request.META.get('HTTP_IF_NONE_MATCH')
+        if not header:
+            return False
+        etags = [
+            tag[2:] if tag.startswith('W/') else tag
+            for tag in parse_etags(header)
+        ]
+        return '*' in etags or etag in etags
+
+    def _conditional(self, request, etag, respond):
+        if self._not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = respond()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def get_detail_etag(self, request, instance):
+        return self._etag(
+            self.get_serializer_class().__name__,
+            instance.pk,
+            getattr(instance, self.etag_field),
+            request.get_host(),
+            request.accepted_renderer.format,
+            api_cache.normalize_params(
+                request.query_params, self.etag_query_params,
+            ),
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not api_cache.get_timeout():
+            return super().list(request, *args, **kwargs)
+        etag = self._etag(
+            self.list_cache_key(request), request.accepted_renderer.format,
+        )
+        return self._conditional(
+            request, etag, lambda: super(ConditionalGetMixin, self).list(
+                request, *args, **kwargs,
+            ),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        # load the bare row first, relations are only worth fetching when
+        # the client copy turns out to be stale
+        self.defer_prefetch = True
+        instance = self.get_object()
+        self.defer_prefetch = False
+
+        def respond():
+            if hasattr(self, 'get_prefetch_lookups'):
+                prefetch_related_objects(
+                    [instance], *self.get_prefetch_lookups()[1],
+                )
+            serializer = self.get_serializer(instance)
+            return Response(serializer.data)
+
+        return self._conditional(
+            request,
+            self.get_detail_etag(request, instance),
+            respond,
+        )
+
+
+class UniqueNameMixin:
+    '''
+    reject a name the requesting user already has when the serializer
+    writes the named object directly, nested get-or-create use is fine
+    '''
+
+    def validate_name(self, value):
+        if self.parent is not None:
+            return value
+        queryset = self.Meta.model.objects.filter(
+            user=self.context['request'].user,
+            name=value,
+        )
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            raise serializers.ValidationError(
+                translate('An item with this name already exists'),
+                code='unique',
+            )
+        return value
@@ -8,7 +8,8 @@ from pydoc import describe
 import uuid
 import os
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connection, models
 from django.contrib.auth.models import (
     BaseUserManager,
     AbstractBaseUser,
@@ -47,6 +48,51 @@ class UserManager(BaseUserManager):
         
         return user
 
+
+class OwnedNameManager(models.Manager):
+    '''
+    manager for the per-user named models (tags, ingredients, characters)
+    '''
+
+    def bulk_get_or_create(self, user, names):
+        '''
+        return the objects called names for user in the given order,
+        creating the missing ones with one conflict-safe insert
+
+        the rows are locked FOR KEY SHARE, so within a transaction that
+        goes on to link them core.orphans cannot delete them first;
+        other writers are not held up
+        '''
+        names = list(dict.fromkeys(names))
+        if not names:
+            return []
+        found = {obj.name: obj for obj in self._locked(user, names)}
+        missing = [name for name in names if name not in found]
+        if missing:
+            self.bulk_create(
+                [self.model(user=user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts leaves the primary keys unset and a
+            # concurrent writer may have inserted some names first
+            found.update(
+                (obj.name, obj) for obj in self._locked(user, missing)
+            )
+        return [found[name] for name in names]
+
+    def _locked(self, user, names):
+        if connection.vendor != 'postgresql':
+            # e.g. sqlite, which locks the whole database on write
+            return self.filter(user=user, name__in=names)
+        # the orm only offers FOR UPDATE and FOR NO KEY UPDATE, which
+        # would make writers of the same names wait for each other
+        return self.raw(
+            f'SELECT * FROM {self.model._meta.db_table} '
+            'WHERE user_id = %s AND name = ANY(%s) FOR KEY SHARE',
+            [user.pk, names],
+        )
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     '''
     User Fields
@@ -65,6 +111,15 @@ class Recipe(models.Model):
     ''''
     model for recipe app
     '''
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = [
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    ]
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete = models.CASCADE
@@ -77,7 +132,27 @@ class Recipe(models.Model):
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredients')
     image = models.ImageField(null =True, upload_to =recipe_image_file_path)
-    
+    # resized copies of image rendered by recipe.images,
+    # {rendition: {format: storage name}}
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUS_CHOICES,
+        blank=True,
+    )
+    image_renditions = models.JSONField(default=dict, blank=True)
+    # also touched when tags or ingredients change, used for ETags
+    updated_at = models.DateTimeField(auto_now=True)
+    # maintained by core.signals, see core.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    # tag and ingredient ids and names for the list endpoint, maintained
+    # by core.signals, see core.summary
+    summary = models.JSONField(default=dict, editable=False)
+
+    class Meta:
+        indexes = [
+            # list endpoints read one user's recipes newest first
+            models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -93,6 +168,27 @@ class Tag(models.Model):
         on_delete = models.CASCADE,
     )
     
+    # maintained by core.signals, see core.usage
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+    last_used = models.DateTimeField(null=True, editable=False)
+    
+    objects = OwnedNameManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user',
+            ),
+        ]
+        indexes = [
+            # ?ordering=popular
+            models.Index(
+                fields=['user', '-recipe_count', 'name', 'id'],
+                name='tag_popular_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -105,8 +201,27 @@ class Ingredients(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete = models.CASCADE,
     )
-    
-    
+    # maintained by core.signals, see core.usage
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+    last_used = models.DateTimeField(null=True, editable=False)
+
+    objects = OwnedNameManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_ingredient_name_per_user',
+            ),
+        ]
+        indexes = [
+            # ?ordering=popular
+            models.Index(
+                fields=['user', '-recipe_count', 'name', 'id'],
+                name='ingredient_popular_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -145,6 +260,8 @@ class Movie(models.Model):
     director = models.CharField(max_length = 255,blank=True)
     producer = models.CharField(max_length = 255,blank=True)
     characters = models.ManyToManyField('Characters')
+    # also touched when characters change, used for ETags
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.name
@@ -160,7 +277,20 @@ class Characters(models.Model):
         on_delete = models.CASCADE,
     )
     name = models.CharField(max_length = 255)
-    
+    # when last linked to a movie, maintained by core.signals for the
+    # grace period of core.orphans
+    last_used = models.DateTimeField(null=True, editable=False)
+
+    objects = OwnedNameManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_character_name_per_user',
+            ),
+        ]
+
     def __str__(self):
         return self.name
     
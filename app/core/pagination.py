@@ -0,0 +1,195 @@
+'''
+pagination for the api list endpoints
+'''
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as translate
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# json values a cursor position may hold, dates and decimals are strings
+SCALARS = (str, int, float)
+
+
+class KeysetPagination(BasePagination):
+    '''
+    keyset (seek) pagination over the ordering of the queryset
+
+    the cursor holds the ordering values of the last row served, and the
+    next page is fetched with a WHERE on those values instead of an
+    OFFSET, so deep pages cost the same as the first one. The ordering
+    must end with a unique column, the primary key is appended otherwise
+    '''
+    cursor_query_param = 'cursor'
+    cursor_query_description = translate('The pagination cursor value.')
+    page_size_query_param = 'page_size'
+    page_size_query_description = translate(
+        'Number of results to return per page.'
+    )
+    invalid_cursor_message = translate('Invalid cursor')
+
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', None)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.ordering = self.get_ordering(queryset)
+        position, self.reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self._invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self._seek(ordering, position))
+            except (TypeError, ValueError, ValidationError):
+                # values the ordering fields cannot take
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        self.page = results[:page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, queryset):
+        '''ordering of the queryset with a unique tiebreaker at the end'''
+        ordering = [
+            field for field in queryset.query.order_by
+            if isinstance(field, str)
+        ]
+        if not ordering or ordering[-1].lstrip('-') not in ('pk', 'id'):
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append('-pk' if descending or not ordering else 'pk')
+        return ordering
+
+    def _invert(self, field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _seek(self, ordering, position):
+        '''rows strictly after position in ordering'''
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _position(self, instance):
+        return [
+            getattr(instance, field.lstrip('-')) for field in self.ordering
+        ]
+
+    def decode_cursor(self, request):
+        '''return (position, reverse) from the request cursor'''
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = cursor['p']
+            reverse = bool(cursor.get('r'))
+        except (Base64Error, UnicodeError, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) \
+                or len(position) != len(self.ordering) \
+                or not all(isinstance(v, SCALARS) for v in position):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse=False):
+        cursor = {'p': position}
+        if reverse:
+            cursor['r'] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(cursor, cls=DjangoJSONEncoder).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded,
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # reversed past the start, the next page begins from scratch
+            return remove_query_param(
+                self.base_url, self.cursor_query_param,
+            )
+        return self.encode_cursor(self._position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(
+            self._position(self.page[0]), reverse=True,
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': str(self.cursor_query_description),
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': str(self.page_size_query_description),
+                'schema': {'type': 'integer'},
+            },
+        ]
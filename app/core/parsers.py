@@ -0,0 +1,68 @@
+'''
+request body parsers shared by the apis
+'''
+
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+loads = orjson.loads if orjson is not None else json.loads
+
+
+class FastJSONParser(JSONParser):
+    '''
+    JSONParser decoding with orjson, falling back to it without orjson
+    '''
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class NDJSONParser(BaseParser):
+    '''
+    parse newline delimited JSON lazily, one record per line
+
+    request.data is an iterator of (line number, record, error) tuples so
+    the body is consumed as it is read instead of loaded up front
+    '''
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return self._records(stream, encoding)
+
+    def _records(self, stream, encoding):
+        if stream is None:
+            return
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = loads(line.decode(encoding))
+            except ValueError as exc:
+                yield line_number, None, f'Invalid JSON - {exc}'
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, 'Expected a JSON object'
+                continue
+            yield line_number, record, None
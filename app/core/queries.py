@@ -0,0 +1,116 @@
+'''
+sql fingerprinting, to spot a request running the same statement over
+and over (n+1 loops) and statements slower than SLOW_QUERY_MS
+
+a fingerprint is the statement with its literals, placeholders and
+IN/VALUES lists folded, so queries differing only by their parameters
+share one
+'''
+
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+TOKENS = re.compile(
+    r'''(?P<identifier>"(?:[^"]|"")*")'''
+    r"""|(?P<string>'(?:[^']|'')*')"""
+    r'|(?P<number>\b\d+(?:\.\d+)?\b)'
+    r'|(?P<placeholder>%s)'
+)
+LISTS = re.compile(r'\((?:\s*\?\s*,)*\s*\?\s*\)')
+ROWS = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+SPACES = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _fold(match):
+    if match.lastgroup == 'identifier':
+        return match.group()
+    return '?'
+
+
+def fingerprint(sql):
+    '''the shape of sql, without its parameters'''
+    sql = TOKENS.sub(_fold, sql)
+    sql = LISTS.sub('(...)', sql)
+    sql = ROWS.sub(r'\1', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def get_repeat_limit():
+    return getattr(settings, 'QUERY_REPEAT_LIMIT', 5)
+
+
+def get_slow_query_ms():
+    return getattr(settings, 'SLOW_QUERY_MS', 100)
+
+
+class QueryLog:
+    '''
+    every statement run while recording, as (sql, seconds); an
+    execute_wrapper hook
+    '''
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def __len__(self):
+        return len(self.queries)
+
+    def counts(self):
+        '''Counter of the fingerprints'''
+        return Counter(fingerprint(sql) for sql, _ in self.queries)
+
+    def repeated(self, limit=None):
+        '''(fingerprint, count) of the shapes run more than limit times'''
+        if limit is None:
+            limit = get_repeat_limit()
+        return [
+            (shape, count)
+            for shape, count in self.counts().most_common()
+            if count > limit
+        ]
+
+    def slow(self, milliseconds=None):
+        '''(sql, milliseconds) of the statements slower than milliseconds'''
+        if milliseconds is None:
+            milliseconds = get_slow_query_ms()
+        return [
+            (sql, seconds * 1000)
+            for sql, seconds in self.queries
+            if seconds * 1000 > milliseconds
+        ]
+
+    def summary(self):
+        '''one line per fingerprint, most frequent first'''
+        return '\n'.join(
+            f'  {count}x {shape}'
+            for shape, count in self.counts().most_common()
+        )
+
+
+@contextmanager
+def record(using=None):
+    '''QueryLog of the statements run on the using aliases, all by default'''
+    log = QueryLog()
+    aliases = [using] if isinstance(using, str) else using
+    with ExitStack() as stack:
+        for connection in connections.all():
+            if aliases is None or connection.alias in aliases:
+                stack.enter_context(connection.execute_wrapper(log))
+        yield log
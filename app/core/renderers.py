@@ -0,0 +1,112 @@
+'''
+response renderers shared by the apis
+'''
+
+import csv
+import io
+from itertools import islice
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    '''
+    JSONRenderer encoding with orjson, several times faster on large
+    lists and byte for byte the same output: dates, times, Decimal and
+    lazy strings go through the drf encoder as before. Without orjson,
+    and for indented output such as the browsable api, JSONRenderer
+    does the work
+    '''
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if (orjson is None or data is None
+                or self.get_indent(accepted_media_type, renderer_context)):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # as JSONRenderer, escape the separators javascript rejects
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029',
+        )
+
+
+class StreamingRenderer(BaseRenderer):
+    '''
+    renderer of row exports: stream() encodes an iterator of dicts lazily,
+    rows_per_chunk rows per yielded chunk, for a StreamingHttpResponse;
+    render() takes a dict or a list of them, e.g. an error response
+    '''
+    charset = 'utf-8'
+    rows_per_chunk = 500
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows else []
+        return b''.join(self.stream(rows, fields))
+
+    def stream(self, rows, fields):
+        '''yield the encoded rows, keeping the given fields'''
+        rows = iter(rows)
+        header = self.header(fields)
+        if header:
+            yield header
+        while True:
+            chunk = list(islice(rows, self.rows_per_chunk))
+            if not chunk:
+                return
+            yield self.encode(chunk, fields)
+
+    def header(self, fields):
+        return b''
+
+    def encode(self, rows, fields):
+        raise NotImplementedError
+
+
+class NDJSONRenderer(StreamingRenderer):
+    '''one JSON object per line'''
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def encode(self, rows, fields):
+        renderer = FastJSONRenderer()
+        return b''.join(
+            renderer.render({field: row[field] for field in fields}) + b'\n'
+            for row in rows
+        )
+
+
+class CSVRenderer(StreamingRenderer):
+    '''a header line then one line per row, lists joined with commas'''
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def _write(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode(self.charset)
+
+    def header(self, fields):
+        return self._write([fields])
+
+    def encode(self, rows, fields):
+        return self._write(
+            [
+                ', '.join(map(str, value)) if isinstance(value, list)
+                else '' if value is None else value
+                for value in (row[field] for field in fields)
+            ]
+            for row in rows
+        )
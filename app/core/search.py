@@ -0,0 +1,96 @@
+'''
+full text search over recipes
+
+on postgres every recipe keeps a weighted tsvector of its title, tag and
+ingredient names and description in Recipe.search_vector, GIN indexed
+and refreshed by core.signals. Other databases have no tsvector, there
+search falls back to case insensitive substring matching
+'''
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connections
+from django.db.models import (
+    Exists,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce
+
+from core import models
+
+
+SEARCH_CONFIG = 'english'
+
+
+def is_supported(using='default'):
+    '''whether the database keeps search vectors'''
+    return connections[using].vendor == 'postgresql'
+
+
+def _names(model):
+    '''space separated names of the model rows linked to the recipe'''
+    return Coalesce(
+        Subquery(
+            model.objects.filter(recipe=OuterRef('pk'))
+            .values('recipe')
+            .annotate(names=StringAgg('name', ' '))
+            .values('names')
+        ),
+        Value(''),
+    )
+
+
+def document(tag_model=models.Tag, ingredient_model=models.Ingredients):
+    '''the search vector expression of a recipe row'''
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(_names(tag_model), weight='B', config=SEARCH_CONFIG)
+        + SearchVector(
+            _names(ingredient_model), weight='B', config=SEARCH_CONFIG,
+        )
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(queryset):
+    '''recompute the search vector of the recipes in queryset'''
+    if is_supported(queryset.db):
+        queryset.update(search_vector=document())
+
+
+def search(queryset, text):
+    '''
+    recipes of queryset matching text, best match first on postgres
+    '''
+    if not is_supported(queryset.db):
+        return _search_fallback(queryset, text).order_by('-id')
+
+    query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=query).annotate(
+        # real rounds differently from the float the cursor carries
+        rank=Cast(SearchRank('search_vector', query), FloatField()),
+    ).order_by('-rank', '-id')
+
+
+def _search_fallback(queryset, text):
+    matches = Q()
+    for word in text.split():
+        matches &= (
+            Q(title__icontains=word)
+            | Q(description__icontains=word)
+            | Exists(models.Tag.objects.filter(
+                recipe=OuterRef('pk'), name__icontains=word,
+            ))
+            | Exists(models.Ingredients.objects.filter(
+                recipe=OuterRef('pk'), name__icontains=word,
+            ))
+        )
+    return queryset.filter(matches)
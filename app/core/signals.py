@@ -0,0 +1,262 @@
+'''
+signal handlers keeping derived data in step with the models
+'''
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core import authentication
+from core import cache as api_cache
+from core import models
+from core import search
+from core import summary
+from core import usage
+
+
+CACHE_NAMESPACES = {
+    models.Recipe: api_cache.RECIPES,
+    models.Tag: api_cache.RECIPES,
+    models.Ingredients: api_cache.RECIPES,
+    models.Movie: api_cache.MOVIES,
+    models.Characters: api_cache.MOVIES,
+    models.Recipe.tags.through: api_cache.RECIPES,
+    models.Recipe.ingredients.through: api_cache.RECIPES,
+    models.Movie.characters.through: api_cache.MOVIES,
+}
+
+
+def invalidate_response_cache(sender, instance, **kwargs):
+    '''a write makes the cached lists of the owner stale'''
+    if kwargs.get('action', 'post_').startswith('post_'):
+        api_cache.invalidate(CACHE_NAMESPACES[sender], instance.user_id)
+
+
+for sender in CACHE_NAMESPACES:
+    if sender._meta.auto_created:
+        m2m_changed.connect(invalidate_response_cache, sender=sender)
+    else:
+        post_save.connect(invalidate_response_cache, sender=sender)
+        post_delete.connect(invalidate_response_cache, sender=sender)
+
+
+# (owner model, relation) whose updated_at follows the related rows
+TOUCHED_RELATIONS = [
+    (models.Recipe, 'tags'),
+    (models.Recipe, 'ingredients'),
+    (models.Movie, 'characters'),
+]
+
+
+def touch(model, **lookups):
+    '''bump updated_at on the matching rows without sending signals'''
+    model.objects.filter(**lookups).update(updated_at=timezone.now())
+
+
+def _touch_owners_m2m(owner, relation):
+    def handler(instance, action, reverse, pk_set, **kwargs):
+        if not reverse:
+            if action.startswith('post_'):
+                touch(owner, pk=instance.pk)
+        elif action in ('post_add', 'post_remove'):
+            touch(owner, pk__in=pk_set)
+        elif action == 'pre_clear':
+            touch(owner, **{relation: instance})
+    return handler
+
+
+def _touch_owners_of(owner, relation):
+    def handler(instance, created=False, **kwargs):
+        if not created:
+            touch(owner, **{relation: instance})
+    return handler
+
+
+for owner, relation in TOUCHED_RELATIONS:
+    field = owner._meta.get_field(relation)
+    m2m_changed.connect(
+        _touch_owners_m2m(owner, relation),
+        sender=field.remote_field.through,
+        weak=False,
+    )
+    # renaming or deleting a related row changes the owner payload
+    post_save.connect(
+        _touch_owners_of(owner, relation),
+        sender=field.related_model,
+        weak=False,
+    )
+    pre_delete.connect(
+        _touch_owners_of(owner, relation),
+        sender=field.related_model,
+        weak=False,
+    )
+
+
+# relations whose names are part of the recipe search vector and summary
+RECIPE_RELATIONS = ['tags', 'ingredients']
+
+
+def reindex(**lookups):
+    queryset = models.Recipe.objects.filter(**lookups)
+    search.update_search_vector(queryset)
+    summary.update_summaries(queryset)
+
+
+def _reindex_recipe(instance, **kwargs):
+    # the summary holds no recipe columns, only the search vector does
+    search.update_search_vector(models.Recipe.objects.filter(pk=instance.pk))
+
+
+def _reindex_recipe_m2m(instance):
+    search.update_search_vector(models.Recipe.objects.filter(pk=instance.pk))
+    # set it on the instance too, a later save() of it writes the summary
+    instance.summary = summary.build([instance.pk])[instance.pk]
+    models.Recipe.objects.filter(pk=instance.pk).update(
+        summary=instance.summary,
+    )
+
+
+def _reindex_recipes_m2m(relation):
+    def handler(instance, action, reverse, pk_set, **kwargs):
+        if not reverse:
+            if action.startswith('post_'):
+                _reindex_recipe_m2m(instance)
+        elif action == 'pre_clear':
+            # the links are gone by post_clear, remember the recipes
+            instance._search_recipe_ids = list(
+                models.Recipe.objects.filter(**{relation: instance})
+                .values_list('pk', flat=True)
+            )
+        elif action == 'post_clear':
+            reindex(pk__in=instance.__dict__.pop('_search_recipe_ids', []))
+        elif action in ('post_add', 'post_remove'):
+            reindex(pk__in=pk_set)
+    return handler
+
+
+def _reindex_recipes_of(relation):
+    def handler(instance, created=False, **kwargs):
+        if not created:
+            reindex(**{relation: instance})
+    return handler
+
+
+def _remember_recipes_of(relation):
+    def handler(instance, **kwargs):
+        instance._search_recipe_ids = list(
+            models.Recipe.objects.filter(**{relation: instance})
+            .values_list('pk', flat=True)
+        )
+    return handler
+
+
+def _reindex_remembered(instance, **kwargs):
+    ids = instance.__dict__.pop('_search_recipe_ids', [])
+    if ids:
+        reindex(pk__in=ids)
+
+
+post_save.connect(_reindex_recipe, sender=models.Recipe)
+for relation in RECIPE_RELATIONS:
+    field = models.Recipe._meta.get_field(relation)
+    m2m_changed.connect(
+        _reindex_recipes_m2m(relation),
+        sender=field.remote_field.through,
+        weak=False,
+    )
+    post_save.connect(
+        _reindex_recipes_of(relation),
+        sender=field.related_model,
+        weak=False,
+    )
+    pre_delete.connect(
+        _remember_recipes_of(relation),
+        sender=field.related_model,
+        weak=False,
+    )
+    post_delete.connect(_reindex_remembered, sender=field.related_model)
+
+
+def _count_usage_m2m(relation):
+    field = models.Recipe._meta.get_field(relation)
+    model = field.related_model
+
+    def handler(instance, action, reverse, pk_set, **kwargs):
+        if reverse:
+            if action.startswith('post_'):
+                usage.refresh(
+                    model.objects.filter(pk=instance.pk),
+                    used=action == 'post_add',
+                )
+        elif action == 'pre_clear':
+            # the links are gone by post_clear, remember the items
+            instance.__dict__.setdefault('_usage_ids', {})[relation] = list(
+                getattr(instance, relation).values_list('pk', flat=True)
+            )
+        elif action == 'post_clear':
+            ids = instance.__dict__.get('_usage_ids', {}).pop(relation, [])
+            usage.refresh(model.objects.filter(pk__in=ids))
+        elif action in ('post_add', 'post_remove'):
+            usage.refresh(
+                model.objects.filter(pk__in=pk_set),
+                used=action == 'post_add',
+            )
+    return handler
+
+
+def _remember_recipe_items(instance, **kwargs):
+    # deleting a recipe drops its links without m2m signals
+    instance._usage_ids = {
+        relation: list(
+            getattr(instance, relation).values_list('pk', flat=True)
+        )
+        for relation in usage.RELATIONS.values()
+    }
+
+
+def _recount_recipe_items(instance, **kwargs):
+    for relation, ids in instance.__dict__.pop('_usage_ids', {}).items():
+        if ids:
+            model = models.Recipe._meta.get_field(relation).related_model
+            usage.refresh(model.objects.filter(pk__in=ids))
+
+
+for relation in usage.RELATIONS.values():
+    m2m_changed.connect(
+        _count_usage_m2m(relation),
+        sender=models.Recipe._meta.get_field(relation).remote_field.through,
+        weak=False,
+    )
+pre_delete.connect(_remember_recipe_items, sender=models.Recipe)
+post_delete.connect(_recount_recipe_items, sender=models.Recipe)
+
+
+def _mark_characters_linked(instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_add' and pk_set:
+        models.Characters.objects.filter(
+            pk__in=[instance.pk] if reverse else pk_set,
+        ).update(last_used=timezone.now())
+
+
+m2m_changed.connect(
+    _mark_characters_linked, sender=models.Movie.characters.through,
+)
+
+
+def _forget_token(instance, **kwargs):
+    authentication.invalidate(instance.key)
+
+
+def _forget_user_tokens(instance, created=False, **kwargs):
+    # is_active and the other user fields are cached with the token
+    if not created:
+        authentication.invalidate_user(instance.pk)
+
+
+post_delete.connect(_forget_token, sender=Token)
+post_save.connect(_forget_user_tokens, sender=models.User)
@@ -0,0 +1,87 @@
+'''
+denormalized recipe summaries for the list endpoint
+
+every recipe keeps the id and name of its tags and ingredients in
+Recipe.summary, refreshed by core.signals, so a recipe list is one scan
+of core_recipe with no joins or prefetches
+'''
+
+from core import models
+
+
+# summary key -> (relation, foreign key of the through model)
+RELATIONS = {
+    'tags': ('tags', 'tag'),
+    'ingredients': ('ingredients', 'ingredients'),
+}
+BATCH_SIZE = 500
+
+
+def empty():
+    return {key: [] for key in RELATIONS}
+
+
+def normalize(summary):
+    '''a stored summary with the keys it may lack, {} for a new recipe'''
+    return {key: (summary or {}).get(key, []) for key in RELATIONS}
+
+
+def of(**related):
+    '''the summary of a recipe linked to the given objects by key'''
+    summary = empty()
+    for key, objs in related.items():
+        summary[key] = [
+            {'id': obj.pk, 'name': obj.name}
+            for obj in sorted(objs, key=lambda obj: obj.pk)
+        ]
+    return summary
+
+
+def build(recipe_ids, recipe_model=models.Recipe, using='default'):
+    '''{recipe id: summary} for recipe_ids, one query per relation'''
+    summaries = {pk: empty() for pk in recipe_ids}
+    for key, (relation, column) in RELATIONS.items():
+        through = recipe_model._meta.get_field(relation).remote_field.through
+        rows = (
+            through.objects.using(using).filter(recipe_id__in=recipe_ids)
+            .order_by(f'{column}_id')
+            .values_list('recipe_id', f'{column}_id', f'{column}__name')
+        )
+        for recipe_id, pk, name in rows:
+            summaries[recipe_id][key].append({'id': pk, 'name': name})
+    return summaries
+
+
+def update_summaries(queryset):
+    '''recompute the summary of the recipes in queryset'''
+    model = queryset.model
+    ids = list(queryset.order_by().values_list('pk', flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        summaries = build(ids[start:start + BATCH_SIZE], model, queryset.db)
+        model.objects.using(queryset.db).bulk_update(
+            [
+                model(pk=pk, summary=summary)
+                for pk, summary in summaries.items()
+            ],
+            ['summary'],
+        )
+
+
+def stale(queryset):
+    '''ids of the recipes in queryset whose stored summary is out of date'''
+    model = queryset.model
+    ids = []
+    rows = queryset.order_by('pk').values_list('pk', 'summary')
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            ids.extend(_stale(batch, model, queryset.db))
+            batch = []
+    ids.extend(_stale(batch, model, queryset.db))
+    return ids
+
+
+def _stale(rows, model, using):
+    fresh = build([pk for pk, _ in rows], model, using)
+    return [pk for pk, summary in rows if normalize(summary) != fresh[pk]]
@@ -0,0 +1,51 @@
+'''
+test helpers keeping the query counts of the api in check
+'''
+
+from contextlib import contextmanager
+
+from django.test import override_settings
+
+from core import queries
+
+
+class QueryBudgetMixin:
+    '''
+    for api test cases: any request repeating a statement shape more
+    than query_repeat_limit times fails the test, and query budgets fail
+    with the count difference and the queries that ran, by fingerprint
+    '''
+    query_repeat_limit = None
+
+    @classmethod
+    def setUpClass(cls):
+        detector = override_settings(
+            QUERY_DETECTOR='raise',
+            QUERY_REPEAT_LIMIT=(
+                cls.query_repeat_limit or queries.get_repeat_limit()
+            ),
+        )
+        detector.enable()
+        cls.addClassCleanup(detector.disable)
+        super().setUpClass()
+
+    @contextmanager
+    def assertQueryBudget(self, budget, exact=False, using=None):
+        '''at most budget queries in the block, exactly budget if exact'''
+        with queries.record(using) as log:
+            yield log
+        ran = len(log)
+        if ran > budget or (exact and ran != budget):
+            self.fail(
+                f'{ran} queries, budget {budget} ({ran - budget:+d}):\n'
+                f'{log.summary()}'
+            )
+
+    def assertNumQueries(
+        self, num, func=None, *args, using='default', **kwargs
+    ):
+        if func is not None:
+            return super().assertNumQueries(
+                num, func, *args, using=using, **kwargs,
+            )
+        return self.assertQueryBudget(num, exact=True, using=using)
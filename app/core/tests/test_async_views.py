@@ -0,0 +1,199 @@
+'''
+Testing the async read paths served over ASGI
+'''
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.http import StreamingHttpResponse
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import include, path
+from rest_framework.authtoken.models import Token
+
+from core import async_views
+from core import models
+from recipe import urls as recipe_urls
+from recipe.views import RecipeView
+
+
+class Gate:
+    '''
+    a stream that only resumes once the event loop serving it has run:
+    the body asks the loop to announce it is waiting, the test answers
+    by opening the gate
+    '''
+    loop = None
+    waiting = None
+    opened = threading.Event()
+
+
+def gated_stream(request):
+    def body():
+        yield b'first'
+        Gate.loop.call_soon_threadsafe(Gate.waiting.set)
+        # a handler iterating the body on the loop never gets an answer
+        yield b'resumed' if Gate.opened.wait(5) else b'timed out'
+    return StreamingHttpResponse(body())
+
+
+with override_settings(ASYNC_READS=True):
+    urlpatterns = [
+        path('api/recipe/', include((
+            async_views.async_read_patterns(recipe_urls.router.urls),
+            'recipe',
+        ))),
+        path('gated/', gated_stream),
+    ]
+
+
+async def asgi_get(path, query_string=b'', headers=()):
+    '''(status, body) of a GET served by StreamingASGIHandler'''
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': query_string,
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await async_views.StreamingASGIHandler()(scope, receive, send)
+    return messages[0]['status'], b''.join(
+        message.get('body', b'') for message in messages[1:]
+    )
+
+
+class AsyncReadPatternsTests(SimpleTestCase):
+
+    @override_settings(ASYNC_READS=False)
+    def test_unchanged_when_off(self):
+        patterns = recipe_urls.router.urls
+
+        self.assertIs(async_views.async_read_patterns(patterns), patterns)
+
+    def test_views_keep_their_attributes(self):
+        view = urlpatterns[0].url_patterns[0].callback
+
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertIs(view.cls, RecipeView)
+        self.assertEqual(view.actions['get'], 'list')
+        self.assertTrue(view.csrf_exempt)
+
+
+@override_settings(ROOT_URLCONF=__name__, API_CACHE_TIMEOUT=0)
+class AsyncReadTests(TransactionTestCase):
+
+    def setUp(self):
+        # one thread, so its connection can be closed at the end
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix='async-reads')
+        patcher = patch.object(async_views, '_executor', self.executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.executor.shutdown)
+        self.addCleanup(
+            lambda: self.executor.submit(connections.close_all).result()
+        )
+
+        user = get_user_model().objects.create_user(
+            email='async@example.com', password='pass12345',
+        )
+        self.recipe = models.Recipe.objects.create(
+            user=user,
+            title='sample recipe',
+            time_minutes=5,
+            price=Decimal('1.50'),
+        )
+        token = Token.objects.create(user=user)
+        self.client = AsyncClient()
+        # extra AsyncClient arguments become request headers
+        self.auth = {'authorization': f'Token {token.key}'}
+
+    def _threads(self):
+        threads = []
+        original = RecipeView.dispatch
+
+        def dispatch(view, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return original(view, *args, **kwargs)
+
+        patcher = patch.object(RecipeView, 'dispatch', dispatch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return threads
+
+    async def test_reads_run_on_the_pool(self):
+        threads = self._threads()
+
+        res = await self.client.get('/api/recipe/recipes/', **self.auth)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['results'][0]['title'], 'sample recipe')
+        self.assertTrue(threads[0].startswith('async-reads'))
+
+    async def test_concurrent_reads(self):
+        url = f'/api/recipe/recipes/{self.recipe.id}/'
+
+        responses = await asyncio.gather(
+            *(self.client.get(url, **self.auth) for _ in range(5)),
+        )
+
+        self.assertEqual([res.status_code for res in responses], [200] * 5)
+
+    async def test_writes_stay_off_the_pool(self):
+        threads = self._threads()
+
+        res = await self.client.post(
+            '/api/recipe/recipes/',
+            {'title': 'new', 'time_minutes': 5, 'price': '2.00'},
+            content_type='application/json',
+            **self.auth,
+        )
+
+        self.assertEqual(res.status_code, 201)
+        self.assertFalse(threads[0].startswith('async-reads'))
+
+    async def test_streaming_export(self):
+        status, body = await asgi_get(
+            '/api/recipe/recipes/export/',
+            b'format=csv',
+            [(b'authorization', self.auth['authorization'].encode())],
+        )
+
+        self.assertEqual(status, 200)
+        self.assertIn(b'sample recipe', body)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class StreamingHandlerTests(SimpleTestCase):
+
+    async def test_loop_runs_while_streaming(self):
+        Gate.loop = asyncio.get_running_loop()
+        Gate.waiting = asyncio.Event()
+        Gate.opened.clear()
+
+        async def open_gate():
+            await Gate.waiting.wait()
+            Gate.opened.set()
+
+        opener = asyncio.ensure_future(open_gate())
+        status, body = await asgi_get('/gated/')
+        opener.cancel()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'firstresumed')
@@ -0,0 +1,138 @@
+'''
+Testing the cached token authentication
+'''
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import authentication
+from core.authentication import LRUCache
+
+
+ME_URL = reverse('user:me')
+
+
+class LRUCacheTests(SimpleTestCase):
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 60)
+        cache.get('a')
+
+        cache.set('c', 3, 60)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_entries_expire(self):
+        cache = LRUCache(maxsize=2)
+        with patch('core.authentication.time.monotonic', return_value=100):
+            cache.set('a', 1, 60)
+
+        with patch('core.authentication.time.monotonic', return_value=160):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+@override_settings(TOKEN_CACHE_TIMEOUT=60, TOKEN_CACHE_ALIAS=None)
+class CachedTokenAuthenticationTests(TestCase):
+    '''
+    the token lookup is skipped once the token is known
+    '''
+
+    def setUp(self):
+        authentication.local_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='token@example.com',
+            password='pass1234',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_skips_the_lookup(self):
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_changes_are_seen(self):
+        self.client.get(ME_URL)
+
+        self.user.name = 'renamed'
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'renamed')
+
+    def test_views_get_their_own_user(self):
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'patched'})
+        self.user.refresh_from_db()
+
+        self.assertEqual(self.user.name, 'patched')
+        self.assertEqual(self.client.get(ME_URL).data['name'], 'patched')
+
+    @override_settings(TOKEN_CACHE_ALIAS='default')
+    def test_shared_cache(self):
+        self.client.get(ME_URL)
+        # as seen from another process
+        authentication.local_cache.clear()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(TOKEN_CACHE_ALIAS='default')
+    def test_shared_cache_invalidated(self):
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        authentication.local_cache.clear()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
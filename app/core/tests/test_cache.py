@@ -0,0 +1,168 @@
+'''
+Testing the per-user list response cache
+'''
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import cache as api_cache
+from core import models
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+MOVIE_URL = reverse('movie:movie-list')
+
+
+def create_user(email='cache@example.com', password='pass1234'):
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_recipe(user, title='sample recipe'):
+    return models.Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=5,
+        price=Decimal('1.50'),
+    )
+
+
+class NormalizeParamsTests(TestCase):
+
+    def test_lists_are_sorted_and_deduplicated(self):
+        params = {'tags': '3,1, 2,1', 'other': 'x'}
+
+        self.assertEqual(
+            api_cache.normalize_params(params, ('tags', 'ingredients')),
+            'tags=1,2,3',
+        )
+
+
+@override_settings(API_CACHE_TIMEOUT=60)
+class ResponseCacheTests(TestCase):
+    '''
+    list responses are cached per user and invalidated by writes
+    '''
+
+    def setUp(self):
+        api_cache.get_cache().clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(user=self.user)
+
+    def test_second_list_is_served_from_cache(self):
+        create_recipe(self.user)
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+
+    def test_equivalent_params_share_an_entry(self):
+        tag_1 = models.Tag.objects.create(user=self.user, name='a')
+        tag_2 = models.Tag.objects.create(user=self.user, name='b')
+        self.client.get(RECIPES_URL, {'tags': f'{tag_1.id},{tag_2.id}'})
+
+        with self.assertNumQueries(0):
+            self.client.get(RECIPES_URL, {'tags': f'{tag_2.id},{tag_1.id}'})
+
+    def test_different_params_are_cached_apart(self):
+        tag = models.Tag.objects.create(user=self.user, name='a')
+        create_recipe(self.user).tags.add(tag)
+        create_recipe(self.user)
+        everything = self.client.get(RECIPES_URL)
+
+        filtered = self.client.get(RECIPES_URL, {'tags': f'{tag.id}'})
+
+        self.assertEqual(len(everything.data['results']), 2)
+        self.assertEqual(len(filtered.data['results']), 1)
+
+    def test_cache_is_per_user(self):
+        other = create_user(email='other@example.com')
+        create_recipe(other, 'not yours')
+        other_client = APIClient()
+        other_client.force_authenticate(user=other)
+        other_client.get(RECIPES_URL)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_create_invalidates(self):
+        self.client.get(RECIPES_URL)
+
+        create_recipe(self.user)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_relation_change_invalidates(self):
+        recipe = create_recipe(self.user)
+        self.client.get(RECIPES_URL)
+
+        recipe.tags.add(models.Tag.objects.create(user=self.user, name='new'))
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'new')
+
+    def test_tag_rename_invalidates_recipe_list(self):
+        tag = models.Tag.objects.create(user=self.user, name='old')
+        create_recipe(self.user).tags.add(tag)
+        self.client.get(RECIPES_URL)
+
+        tag.name = 'renamed'
+        tag.save()
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'renamed')
+
+    def test_assigned_only_tag_list(self):
+        tag = models.Tag.objects.create(user=self.user, name='lonely')
+        self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        create_recipe(self.user).tags.add(tag)
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_bulk_import_invalidates(self):
+        self.client.get(RECIPES_URL)
+
+        self.client.post(
+            reverse('recipe:recipe-bulk'),
+            '{"title": "imported", "time_minutes": 1, "price": "1.00"}\n',
+            content_type='application/x-ndjson',
+        )
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_movie_write_invalidates(self):
+        self.client.get(MOVIE_URL)
+
+        movie = models.Movie.objects.create(
+            user=self.user,
+            name='movie',
+            release_date='2020-01-01',
+            ratings=Decimal('4.00'),
+        )
+        res = self.client.get(MOVIE_URL)
+        self.assertEqual(len(res.data['results']), 1)
+
+        movie.delete()
+        res = self.client.get(MOVIE_URL)
+        self.assertEqual(res.data['results'], [])
+
+    @override_settings(API_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(1):
+            self.client.get(RECIPES_URL)
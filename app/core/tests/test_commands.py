@@ -8,8 +8,21 @@ from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
 from django.db.utils import OperationalError
 
+import json
+from io import StringIO
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
-from django.test import SimpleTestCase
+from django.db import connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from core import models
+from core import orphans
 
 @patch('core.management.commands.wait_for_db.Command.check')
 class CommandTests(SimpleTestCase):
@@ -35,4 +48,197 @@ class CommandTests(SimpleTestCase):
         
         self.assertEqual(patch_checks.call_count ,6)
         patch_checks.assert_called_with(databases = ['default'])
-        
\ No newline at end of file
+        
+
+
+class BenchmarkLoginTests(TestCase):
+
+    def test_benchmark_login(self):
+        out = StringIO()
+
+        call_command('benchmark_login', logins=1, stdout=out)
+
+        self.assertIn('repeated bad credentials', out.getvalue())
+        self.assertFalse(get_user_model().objects.exists())
+
+
+class BenchmarkJSONTests(TestCase):
+
+    def test_benchmark_json(self):
+        out = StringIO()
+
+        call_command('benchmark_json', recipes=5, repeat=1, stdout=out)
+
+        self.assertIn('render recipes', out.getvalue())
+        self.assertIn('parse movies', out.getvalue())
+
+
+class SeedBenchmarkTests(TestCase):
+
+    def test_seed_benchmark(self):
+        call_command(
+            'seed_benchmark', recipes=5, tags=4, ingredients=6, movies=3,
+            characters=4, characters_per_movie=2, stdout=StringIO(),
+        )
+        call_command(
+            'seed_benchmark', recipes=5, tags=4, ingredients=6, movies=3,
+            characters=4, characters_per_movie=2, stdout=StringIO(),
+        )
+
+        user = get_user_model().objects.get()
+        self.assertEqual(user.email, 'benchmark-0@example.com')
+        self.assertEqual(user.recipe_set.count(), 5)
+        self.assertEqual(user.recipe_set.first().tags.count(), 4)
+        self.assertEqual(user.recipe_set.first().ingredients.count(), 6)
+        self.assertEqual(user.movie_set.first().characters.count(), 2)
+
+
+class LoadTestTests(TransactionTestCase):
+
+    def test_loadtest_report(self):
+        call_command(
+            'seed_benchmark', recipes=3, tags=3, ingredients=3, movies=2,
+            characters=2, stdout=StringIO(),
+        )
+        out = StringIO()
+
+        call_command(
+            'loadtest', workloads='recipe_list,movie_detail', requests=3,
+            concurrency=2, server_threads=2, stdout=out,
+        )
+
+        report = json.loads(out.getvalue())
+        for name in ('recipe_list', 'movie_detail'):
+            result = report['workloads'][name]
+            self.assertEqual(result['requests'], 3)
+            self.assertEqual(result['errors'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertIsNotNone(result['queries_per_request'])
+
+
+class GCOrphansTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='orphans@example.com', password='pass12345',
+        )
+        self.recipe = models.Recipe.objects.create(
+            user=self.user, title='curry', time_minutes=30, price=5,
+        )
+        self.movie = models.Movie.objects.create(
+            user=self.user, name='heat', release_date='1995-12-15', ratings=8,
+        )
+
+    def _named(self, model, *names):
+        return [
+            model.objects.create(user=self.user, name=name) for name in names
+        ]
+
+    def test_dry_run_deletes_nothing(self):
+        self._named(models.Tag, 'Lunch', 'Dinner')
+        self._named(models.Characters, 'Neil')
+        out = StringIO()
+
+        call_command('gc_orphans', dry_run=True, grace=0, stdout=out)
+
+        self.assertIn('2 orphaned Tag rows', out.getvalue())
+        self.assertIn('1 orphaned Characters rows', out.getvalue())
+        self.assertIn('would delete 3 orphans', out.getvalue())
+        self.assertEqual(models.Tag.objects.count(), 2)
+
+    @patch('time.sleep')
+    def test_deletes_orphans_in_batches(self, patch_sleep):
+        lunch, dinner, brunch = self._named(
+            models.Tag, 'Lunch', 'Dinner', 'Brunch',
+        )
+        rice, salt = self._named(models.Ingredients, 'Rice', 'Salt')
+        neil, vincent = self._named(models.Characters, 'Neil', 'Vincent')
+        self.recipe.tags.add(dinner)
+        self.recipe.ingredients.add(rice)
+        self.movie.characters.add(vincent)
+        out = StringIO()
+
+        call_command(
+            'gc_orphans', batch_size=1, sleep=0.5, grace=0, stdout=out,
+        )
+
+        self.assertEqual(list(models.Tag.objects.all()), [dinner])
+        self.assertEqual(list(models.Ingredients.objects.all()), [rice])
+        self.assertEqual(list(models.Characters.objects.all()), [vincent])
+        self.assertIn('deleted 4 orphans', out.getvalue())
+        # sleeps between the two tag batches only
+        patch_sleep.assert_called_once_with(0.5)
+
+    def test_keeps_recently_used(self):
+        lunch, dinner = self._named(models.Tag, 'Lunch', 'Dinner')
+        self.recipe.tags.add(lunch)
+        self.recipe.tags.clear()
+
+        neil, vincent = self._named(models.Characters, 'Neil', 'Vincent')
+        self.movie.characters.add(neil)
+        self.movie.characters.clear()
+
+        call_command('gc_orphans', stdout=StringIO())
+
+        self.assertEqual(list(models.Tag.objects.all()), [lunch])
+        self.assertEqual(list(models.Characters.objects.all()), [neil])
+
+    def test_delete_rechecks_links(self):
+        tag, = self._named(models.Tag, 'Lunch')
+        ids = next(orphans.batches(models.Tag, 10))
+        self.recipe.tags.add(tag)
+
+        self.assertEqual(orphans.delete(models.Tag, ids), 0)
+        self.assertTrue(models.Tag.objects.filter(pk=tag.pk).exists())
+
+    def test_delete_cost_does_not_grow_with_the_batch(self):
+        '''
+        a batch is one delete statement, a queryset delete would run the
+        delete signal handlers of every row (see orphans.delete)
+        '''
+        few = self._named(models.Tag, 'Lunch', 'Dinner')
+        many = self._named(models.Tag, *(f'tag {i}' for i in range(20)))
+
+        with CaptureQueriesContext(connection) as few_queries:
+            orphans.delete(models.Tag, [tag.pk for tag in few])
+        with CaptureQueriesContext(connection) as many_queries:
+            orphans.delete(models.Tag, [tag.pk for tag in many])
+
+        self.assertEqual(len(few_queries), len(many_queries))
+        self.assertFalse(models.Tag.objects.exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'postgres row locks')
+class OrphanLockTests(TransactionTestCase):
+
+    def test_rows_looked_up_by_a_write_are_kept(self):
+        user = get_user_model().objects.create_user(
+            email='orphans@example.com', password='pass12345',
+        )
+        recipe = models.Recipe.objects.create(
+            user=user, title='curry', time_minutes=30, price=5,
+        )
+        tag = models.Tag.objects.create(user=user, name='Lunch')
+        looked_up, linked = Event(), Event()
+
+        def write():
+            try:
+                with transaction.atomic():
+                    found = models.Tag.objects.bulk_get_or_create(
+                        user, ['Lunch'],
+                    )
+                    looked_up.set()
+                    linked.wait(5)
+                    recipe.tags.add(*found)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(1) as pool:
+            writer = pool.submit(write)
+            looked_up.wait(5)
+            deleted = orphans.delete(models.Tag, [tag.pk])
+            linked.set()
+            writer.result()
+
+        self.assertEqual(deleted, 0)
+        self.assertEqual(list(recipe.tags.all()), [tag])
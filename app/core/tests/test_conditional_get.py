@@ -0,0 +1,215 @@
+'''
+Testing ETags and conditional GET on the recipe and movie endpoints
+'''
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+MOVIE_URL = reverse('movie:movie-list')
+
+
+def recipe_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def movie_url(movie_id):
+    return reverse('movie:movie-detail', args=[movie_id])
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'sample recipe',
+        'time_minutes': 5,
+        'price': Decimal('1.50'),
+    }
+    defaults.update(params)
+    return models.Recipe.objects.create(user=user, **defaults)
+
+
+class UpdatedAtTests(TestCase):
+    '''
+    updated_at follows the rows rendered inside the owner
+    '''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='etag@example.com',
+            password='pass1234',
+        )
+        self.recipe = create_recipe(self.user)
+
+    def _changed(self, recipe):
+        before = recipe.updated_at
+        recipe.refresh_from_db()
+        return recipe.updated_at > before
+
+    def test_adding_tag_touches_recipe(self):
+        self.recipe.tags.add(
+            models.Tag.objects.create(user=self.user, name='tag'),
+        )
+
+        self.assertTrue(self._changed(self.recipe))
+
+    def test_reverse_add_touches_recipe(self):
+        tag = models.Tag.objects.create(user=self.user, name='tag')
+
+        tag.recipe_set.add(self.recipe)
+
+        self.assertTrue(self._changed(self.recipe))
+
+    def test_renaming_ingredient_touches_recipe(self):
+        ingredient = models.Ingredients.objects.create(
+            user=self.user, name='salt',
+        )
+        self.recipe.ingredients.add(ingredient)
+        self.recipe.refresh_from_db()
+
+        ingredient.name = 'sea salt'
+        ingredient.save()
+
+        self.assertTrue(self._changed(self.recipe))
+
+    def test_deleting_tag_touches_recipe(self):
+        tag = models.Tag.objects.create(user=self.user, name='tag')
+        self.recipe.tags.add(tag)
+        self.recipe.refresh_from_db()
+
+        tag.delete()
+
+        self.assertTrue(self._changed(self.recipe))
+
+    def test_unrelated_recipe_untouched(self):
+        other = create_recipe(self.user, title='other')
+        tag = models.Tag.objects.create(user=self.user, name='tag')
+        self.recipe.tags.add(tag)
+
+        tag.name = 'renamed'
+        tag.save()
+
+        self.assertFalse(self._changed(other))
+
+
+@override_settings(API_CACHE_TIMEOUT=60)
+class ConditionalGetTests(TestCase):
+    '''
+    If-None-Match is answered with 304 without serializing
+    '''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='etag@example.com',
+            password='pass1234',
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_detail_not_modified(self):
+        recipe = create_recipe(self.user)
+        res = self.client.get(recipe_url(recipe.id))
+        etag = res['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                recipe_url(recipe.id), HTTP_IF_NONE_MATCH=etag,
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_detail_etag_changes_with_relations(self):
+        recipe = create_recipe(self.user)
+        etag = self.client.get(recipe_url(recipe.id))['ETag']
+
+        recipe.tags.add(models.Tag.objects.create(user=self.user, name='new'))
+        res = self.client.get(recipe_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.data['tags'][0]['name'], 'new')
+
+    def test_detail_etag_changes_on_update(self):
+        recipe = create_recipe(self.user)
+        etag = self.client.get(recipe_url(recipe.id))['ETag']
+
+        self.client.patch(recipe_url(recipe.id), {'title': 'changed'})
+        res = self.client.get(recipe_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'changed')
+
+    def test_missing_detail_is_404(self):
+        res = self.client.get(recipe_url(0), HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_not_modified(self):
+        create_recipe(self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_changes_on_write(self):
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        create_recipe(self.user)
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_etag_covers_the_format(self):
+        recipe = create_recipe(self.user)
+
+        for url in (RECIPES_URL, recipe_url(recipe.id)):
+            etag = self.client.get(url)['ETag']
+            res = self.client.get(
+                url, {'format': 'api'}, HTTP_IF_NONE_MATCH=etag,
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(res['ETag'], etag)
+
+    @override_settings(API_CACHE_TIMEOUT=0)
+    def test_no_list_etag_without_the_response_cache(self):
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.has_header('ETag'))
+
+    def test_movie_detail_not_modified(self):
+        movie = models.Movie.objects.create(
+            user=self.user,
+            name='movie',
+            release_date='2020-01-01',
+            ratings=Decimal('4.00'),
+        )
+        etag = self.client.get(movie_url(movie.id))['ETag']
+
+        res = self.client.get(movie_url(movie.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        movie.characters.add(
+            models.Characters.objects.create(user=self.user, name='hero'),
+        )
+        res = self.client.get(movie_url(movie.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_movie_list_not_modified(self):
+        etag = self.client.get(MOVIE_URL)['ETag']
+
+        res = self.client.get(MOVIE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,79 @@
+'''
+Testing the connection health checks of the postgres backend
+'''
+
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connections
+from django.test import TestCase
+
+from core.backends.postgresql.base import DatabaseWrapper
+
+
+@skipUnless(
+    isinstance(connections['default'], DatabaseWrapper),
+    'core postgres backend',
+)
+class HealthCheckTests(TestCase):
+    '''
+    persistent connections are checked once per request before reuse
+    '''
+
+    def setUp(self):
+        # a connection of its own, outside the test transaction
+        self.db = connections.create_connection('default')
+        self.db.settings_dict = {
+            **self.db.settings_dict,
+            'CONN_MAX_AGE': None,
+            'CONN_HEALTH_CHECKS': True,
+        }
+        self.addCleanup(self.db.close)
+        self.db.ensure_connection()
+
+    def _next_request(self):
+        self.db.close_if_unusable_or_obsolete()
+
+    def test_connection_is_reused(self):
+        first = self.db.connection
+
+        self._next_request()
+        self.db.ensure_connection()
+
+        self.assertIs(self.db.connection, first)
+
+    def test_dropped_connection_is_replaced(self):
+        first = self.db.connection
+        first.close()
+
+        self._next_request()
+        with self.db.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+        self.assertIsNot(self.db.connection, first)
+
+    def test_checked_once_per_request(self):
+        self._next_request()
+
+        with patch.object(self.db, 'is_usable', return_value=True) as usable:
+            self.db.ensure_connection()
+            self.db.ensure_connection()
+
+        usable.assert_called_once_with()
+
+    def test_fresh_connection_is_not_checked(self):
+        self.db.close()
+
+        with patch.object(self.db, 'is_usable') as usable:
+            self.db.ensure_connection()
+
+        usable.assert_not_called()
+
+    def test_disabled(self):
+        self.db.settings_dict['CONN_HEALTH_CHECKS'] = False
+        self._next_request()
+
+        with patch.object(self.db, 'is_usable') as usable:
+            self.db.ensure_connection()
+
+        usable.assert_not_called()
@@ -0,0 +1,61 @@
+'''
+Testing the tuned password hashers
+'''
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import identify_hasher
+from django.test import TestCase, override_settings
+
+
+PBKDF2 = ['core.hashers.TunedPBKDF2PasswordHasher']
+ARGON2_FIRST = [
+    'core.hashers.TunedArgon2PasswordHasher',
+    'core.hashers.TunedPBKDF2PasswordHasher',
+]
+
+
+class TunedHasherTests(TestCase):
+
+    def _user(self):
+        return get_user_model().objects.create_user(
+            email='hash@example.com', password='pass12345',
+        )
+
+    def _stored(self):
+        return get_user_model().objects.get().password
+
+    @override_settings(PASSWORD_HASHERS=ARGON2_FIRST)
+    def test_argon2_costs_from_settings(self):
+        with override_settings(PASSWORD_ARGON2_MEMORY_COST=1024):
+            self._user()
+
+        self.assertTrue(self._stored().startswith('argon2'))
+        self.assertIn('m=1024', self._stored())
+
+    @override_settings(
+        PASSWORD_HASHERS=PBKDF2, PASSWORD_PBKDF2_ITERATIONS=1000,
+    )
+    def test_pbkdf2_iterations_from_settings(self):
+        self._user()
+
+        self.assertTrue(self._stored().startswith('pbkdf2_sha256$1000$'))
+
+    def test_rehashed_with_the_new_hasher_on_login(self):
+        with override_settings(PASSWORD_HASHERS=PBKDF2):
+            self._user()
+
+        with override_settings(PASSWORD_HASHERS=ARGON2_FIRST):
+            user = authenticate(email='hash@example.com', password='pass12345')
+            self.assertIsNotNone(user)
+            self.assertEqual(
+                identify_hasher(self._stored()).algorithm, 'argon2',
+            )
+
+    @override_settings(PASSWORD_HASHERS=ARGON2_FIRST)
+    def test_rehashed_when_the_cost_changes(self):
+        self._user()
+
+        with override_settings(PASSWORD_ARGON2_TIME_COST=3):
+            authenticate(email='hash@example.com', password='pass12345')
+
+        self.assertIn('t=3', self._stored())
@@ -0,0 +1,129 @@
+'''
+Testing the request timing middleware and the metrics endpoint
+'''
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import metrics
+from core import models
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('metrics')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def staff_client():
+    '''client of a staff user, the only ones allowed to read metrics'''
+    client = APIClient()
+    client.force_authenticate(get_user_model().objects.create_user(
+        email='staff@example.com', password='pass12345', is_staff=True,
+    ))
+    return client
+
+
+@override_settings(PERF_METRICS=True, API_CACHE_TIMEOUT=0)
+class PerformanceMiddlewareTests(TestCase):
+
+    def setUp(self):
+        metrics.clear()
+        self.user = get_user_model().objects.create_user(
+            email='perf@example.com', password='pass12345',
+        )
+        self.recipe = models.Recipe.objects.create(
+            user=self.user,
+            title='sample recipe',
+            time_minutes=5,
+            price=Decimal('1.50'),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        res = self.client.get(RECIPES_URL)
+
+        timing = res['Server-Timing']
+        for name in ('total;dur=', 'db;dur=', 'serialize;dur=', 'render;dur='):
+            self.assertIn(name, timing)
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+
+    def test_histograms_by_view(self):
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+        res = self.client.get(detail_url(self.recipe.id))
+
+        text = staff_client().get(METRICS_URL).content.decode()
+
+        self.assertIn(
+            'api_request_duration_seconds_count{view="RecipeView.list"} 2',
+            text,
+        )
+        self.assertIn(
+            'api_request_duration_seconds_count{view="RecipeView.retrieve"} 1',
+            text,
+        )
+        self.assertIn(
+            'api_response_size_bytes_sum{view="RecipeView.retrieve"} '
+            f'{len(res.content)}',
+            text,
+        )
+        self.assertIn(
+            'api_db_queries_bucket{view="RecipeView.list",le="+Inf"} 2',
+            text,
+        )
+
+    def test_query_count(self):
+        self.client.get(detail_url(self.recipe.id))
+
+        samples = {
+            view: count for view, _, count, _ in metrics.db_queries.samples()
+        }
+
+        self.assertGreater(samples['RecipeView.retrieve'], 0)
+
+    @override_settings(PERF_SERVER_TIMING=False)
+    def test_header_can_be_left_out(self):
+        res = staff_client().get(METRICS_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(res.status_code, 200)
+
+    def test_metrics_need_staff(self):
+        self.assertEqual(APIClient().get(METRICS_URL).status_code, 401)
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+
+
+@override_settings(PERF_METRICS=False)
+class DisabledTests(TestCase):
+
+    def test_nothing_recorded(self):
+        metrics.clear()
+
+        res = APIClient().get(RECIPES_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(list(metrics.request_duration.samples()), [])
+
+    def test_metrics_not_found(self):
+        self.assertEqual(staff_client().get(METRICS_URL).status_code, 404)
+
+
+class HistogramTests(TestCase):
+
+    def test_cumulative_buckets(self):
+        histogram = metrics.Histogram('test', 'help', (1, 5))
+        for value in (0, 1, 3, 10):
+            histogram.observe('view', value)
+
+        view, buckets, total, count = next(histogram.samples())
+
+        self.assertEqual(buckets, [(1, 2), (5, 3), ('+Inf', 4)])
+        self.assertEqual((total, count), (14, 4))
@@ -0,0 +1,164 @@
+'''
+Testing keyset pagination
+'''
+
+import json
+from base64 import urlsafe_b64encode
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core import models
+from core.pagination import KeysetPagination
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def create_user(email='pages@example.com', password='pass1234'):
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_recipe(user, title='sample recipe'):
+    return models.Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=5,
+        price=Decimal('1.50'),
+    )
+
+
+class KeysetPaginatorTests(TestCase):
+    '''
+    testing the paginator directly
+    '''
+
+    def setUp(self):
+        self.user = create_user()
+        self.factory = APIRequestFactory()
+
+    def _page(self, queryset, url='/items/', **params):
+        paginator = KeysetPagination()
+        request = Request(self.factory.get(url, params))
+        page = paginator.paginate_queryset(queryset, request)
+        return paginator, page
+
+    def _walk(self, queryset, page_size):
+        '''follow the next links to the end, returning every row seen'''
+        seen = []
+        url, params = '/items/', {'page_size': page_size}
+        while True:
+            paginator, page = self._page(queryset, url, **params)
+            seen.extend(page)
+            link = paginator.get_next_link()
+            if link is None:
+                return seen
+            url, params = link, {}
+
+    def test_walks_every_row_once(self):
+        '''pages cover the whole queryset in order with no repeats'''
+        recipes = [create_recipe(self.user, f'recipe {i}') for i in range(7)]
+        queryset = models.Recipe.objects.order_by('-id')
+
+        seen = self._walk(queryset, page_size=3)
+
+        self.assertEqual(seen, list(reversed(recipes)))
+
+    def test_ties_broken_by_primary_key(self):
+        '''rows sharing the ordering value are neither lost nor repeated'''
+        for title in ['b', 'a', 'b', 'b', 'a', 'c', 'b']:
+            create_recipe(self.user, title)
+        queryset = models.Recipe.objects.order_by('-title')
+
+        seen = self._walk(queryset, page_size=2)
+
+        self.assertEqual(
+            [recipe.id for recipe in seen],
+            list(queryset.order_by('-title', '-pk').values_list(
+                'id', flat=True,
+            )),
+        )
+
+    def test_previous_link(self):
+        '''the previous link returns the page before'''
+        for i in range(6):
+            create_recipe(self.user, f'recipe {i}')
+        queryset = models.Recipe.objects.order_by('-id')
+        first, first_page = self._page(queryset, page_size=2)
+        second, second_page = self._page(queryset, first.get_next_link())
+        self.assertIsNone(first.get_previous_link())
+
+        back, back_page = self._page(queryset, second.get_previous_link())
+
+        self.assertEqual(back_page, first_page)
+        self.assertIsNone(back.get_previous_link())
+        self.assertIsNotNone(back.get_next_link())
+
+    @patch.object(KeysetPagination, 'max_page_size', 3)
+    def test_page_size_is_capped(self):
+        for i in range(5):
+            create_recipe(self.user, f'recipe {i}')
+
+        paginator, page = self._page(
+            models.Recipe.objects.order_by('-id'), page_size=100,
+        )
+
+        self.assertEqual(len(page), 3)
+
+
+class KeysetPaginationAPITests(TestCase):
+    '''
+    testing pagination through the list endpoints
+    '''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(user=self.user)
+
+    def test_paginated_response(self):
+        for i in range(3):
+            create_recipe(self.user, f'recipe {i}')
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_invalid_cursor(self):
+        res = self.client.get(RECIPES_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_crafted_cursor(self):
+        '''well formed cursors with values the ordering cannot take'''
+        create_recipe(self.user)
+
+        for position in (['abc'], [{'a': 1}], [None], [[1]]):
+            cursor = urlsafe_b64encode(
+                json.dumps({'p': position}).encode('utf-8'),
+            ).decode('ascii')
+            res = self.client.get(RECIPES_URL, {'cursor': cursor})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deep_page_costs_the_same(self):
+        '''the last page needs as many queries as the first'''
+        for i in range(9):
+            create_recipe(self.user, f'recipe {i}')
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, {'page_size': 2})
+        while res.data['next']:
+            with self.assertNumQueries(1):
+                res = self.client.get(res.data['next'])
+
+        self.assertEqual(len(res.data['results']), 1)
@@ -0,0 +1,107 @@
+'''
+Testing the repeated and slow query detection
+'''
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+
+from core import queries
+from core.middleware import QueryDetectorMiddleware
+from core.testing import QueryBudgetMixin
+
+
+class FingerprintTests(SimpleTestCase):
+
+    def test_parameters_are_folded(self):
+        self.assertEqual(
+            queries.fingerprint(
+                'SELECT "t"."id" FROM "t" WHERE "t"."id" = %s LIMIT 21'
+            ),
+            'SELECT "t"."id" FROM "t" WHERE "t"."id" = ? LIMIT ?',
+        )
+
+    def test_lists_are_folded(self):
+        self.assertEqual(
+            queries.fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s, %s)'),
+            queries.fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s)'),
+        )
+        self.assertEqual(
+            queries.fingerprint('INSERT INTO "t2" VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO "t2" VALUES (...)',
+        )
+
+    def test_strings_and_identifiers(self):
+        self.assertEqual(
+            queries.fingerprint('SELECT "col1" FROM "t" WHERE a = \'x\'\'y\''),
+            'SELECT "col1" FROM "t" WHERE a = ?',
+        )
+
+
+def lookups(count):
+    '''a view looking users up one by one'''
+    def view(request):
+        for pk in range(count):
+            get_user_model().objects.filter(pk=pk).exists()
+        return HttpResponse()
+    return view
+
+
+@override_settings(QUERY_REPEAT_LIMIT=3, SLOW_QUERY_MS=100)
+class QueryDetectorMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get('/api/recipe/recipes/')
+
+    @override_settings(QUERY_DETECTOR='raise')
+    def test_repeated_queries_raise(self):
+        middleware = QueryDetectorMiddleware(lookups(4))
+
+        with self.assertRaisesRegex(queries.QueryBudgetExceeded, '4x SELECT'):
+            middleware(self.request)
+
+    @override_settings(QUERY_DETECTOR='raise')
+    def test_within_limit(self):
+        middleware = QueryDetectorMiddleware(lookups(3))
+
+        self.assertEqual(middleware(self.request).status_code, 200)
+
+    @override_settings(QUERY_DETECTOR='log')
+    def test_repeated_queries_logged(self):
+        middleware = QueryDetectorMiddleware(lookups(4))
+
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            middleware(self.request)
+
+        self.assertIn('GET /api/recipe/recipes/', logs.output[0])
+
+    @override_settings(QUERY_DETECTOR='log', SLOW_QUERY_MS=-1)
+    def test_slow_queries_logged(self):
+        middleware = QueryDetectorMiddleware(lookups(1))
+
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            middleware(self.request)
+
+        self.assertIn('slow query', logs.output[0])
+
+
+class QueryBudgetMixinTests(QueryBudgetMixin, TestCase):
+
+    def test_budget_failure_shows_the_difference(self):
+        with self.assertRaises(self.failureException) as failure:
+            with self.assertQueryBudget(1):
+                lookups(2)(None)
+
+        message = str(failure.exception)
+        self.assertIn('2 queries, budget 1 (+1)', message)
+        self.assertIn('2x SELECT', message)
+
+    def test_num_queries_is_exact(self):
+        with self.assertRaises(self.failureException):
+            with self.assertNumQueries(3):
+                lookups(2)(None)
@@ -0,0 +1,90 @@
+'''
+Testing the orjson renderer and parser against the drf ones
+'''
+
+import datetime
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+PAYLOAD = {
+    'next': None,
+    'results': [{
+        'id': 1,
+        'price': Decimal('1.50'),
+        'ratings': Decimal('7.5'),
+        'release_date': datetime.date(2001, 2, 3),
+        'updated_at': datetime.datetime(
+            2001, 2, 3, 4, 5, 6, 789123, tzinfo=datetime.timezone.utc,
+        ),
+        'time': datetime.time(4, 5, 6),
+        'duration': datetime.timedelta(minutes=90),
+        'title': 'café\u2028\u2029',
+        'error': gettext_lazy('This field is required.'),
+        'tags': ({'id': 2, 'name': 'Dinner'},),
+        3: 'non string key',
+    }],
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_same_bytes_as_json_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD),
+            JSONRenderer().render(PAYLOAD),
+        )
+
+    def test_indented_and_empty(self):
+        context = {'indent': 4}
+
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD, renderer_context=context),
+            JSONRenderer().render(PAYLOAD, renderer_context=context),
+        )
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_without_orjson(self):
+        with mock.patch('core.renderers.orjson', None):
+            body = FastJSONRenderer().render(PAYLOAD)
+
+        self.assertEqual(body, JSONRenderer().render(PAYLOAD))
+
+
+class FastJSONParserTests(SimpleTestCase):
+
+    def _parse(self, body, **context):
+        return FastJSONParser().parse(io.BytesIO(body), parser_context=context)
+
+    def test_same_data_as_json_parser(self):
+        body = JSONRenderer().render(PAYLOAD)
+
+        self.assertEqual(
+            self._parse(body), JSONParser().parse(io.BytesIO(body)),
+        )
+
+    def test_other_encodings(self):
+        body = '{"title": "café"}'.encode('latin-1')
+
+        self.assertEqual(
+            self._parse(body, encoding='latin-1'), {'title': 'café'},
+        )
+
+    def test_invalid_json(self):
+        for body in (b'{"title": ', b'{"ratings": NaN}', b'\xff'):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                self._parse(body)
+
+    def test_without_orjson(self):
+        with mock.patch('core.parsers.orjson', None):
+            self.assertEqual(self._parse(b'{"id": 1}'), {'id': 1})
@@ -0,0 +1,154 @@
+'''
+Testing ?fields= and ?omit= on the recipe and movie endpoints
+'''
+
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import cache as api_cache
+from core import models
+from core.testing import QueryBudgetMixin
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+MOVIE_URL = reverse('movie:movie-list')
+CHARACTER_URL = reverse('movie:characters-list')
+
+
+def recipe_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def movie_url(movie_id):
+    return reverse('movie:movie-detail', args=[movie_id])
+
+
+class SparseFieldsTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='sparse@example.com', password='pass1234',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = models.Recipe.objects.create(
+            user=self.user,
+            title='sample recipe',
+            time_minutes=5,
+            price=Decimal('1.50'),
+            description='a long description',
+        )
+        self.recipe.tags.add(
+            models.Tag.objects.create(user=self.user, name='Dinner'),
+        )
+        self.recipe.ingredients.add(
+            models.Ingredients.objects.create(user=self.user, name='Salt'),
+        )
+
+    def _get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        return res, len(queries.captured_queries), sql
+
+    def test_list_fields_narrow_the_columns(self):
+        res, count, sql = self._get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': self.recipe.id, 'title': 'sample recipe'}],
+        )
+        self.assertEqual(count, 1)
+        self.assertNotIn('"summary"', sql)
+        self.assertNotIn('"price"', sql)
+
+    def test_list_omit(self):
+        res = self.client.get(RECIPES_URL, {'omit': 'tags,ingredients'})
+
+        self.assertEqual(
+            set(res.data['results'][0]),
+            {'id', 'title', 'time_minutes', 'price', 'link'},
+        )
+
+    def test_detail_skips_the_prefetches_left_out(self):
+        _, full, _ = self._get(recipe_url(self.recipe.id), {})
+        res, count, sql = self._get(
+            recipe_url(self.recipe.id), {'fields': 'id,title,tags'},
+        )
+
+        self.assertEqual(set(res.data), {'id', 'title', 'tags'})
+        self.assertEqual(res.data['tags'][0]['name'], 'Dinner')
+        self.assertEqual(count, full - 1)
+        self.assertNotIn('core_ingredients', sql)
+        self.assertNotIn('"description"', sql)
+
+    def test_unknown_field_is_rejected(self):
+        res = self.client.get(RECIPES_URL, {'fields': 'id,secret'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_pagination_keeps_working(self):
+        second = models.Recipe.objects.create(
+            user=self.user, title='second', time_minutes=1,
+            price=Decimal('1.00'),
+        )
+
+        first = self.client.get(
+            RECIPES_URL, {'fields': 'title', 'page_size': 1},
+        )
+        rest = self.client.get(first.data['next'])
+
+        self.assertEqual(first.data['results'], [{'title': second.title}])
+        self.assertEqual(rest.data['results'], [{'title': 'sample recipe'}])
+
+    def test_writes_return_every_field(self):
+        res = self.client.patch(
+            recipe_url(self.recipe.id) + '?fields=id', {'title': 'renamed'},
+        )
+
+        self.assertEqual(res.data['title'], 'renamed')
+        self.assertIn('description', res.data)
+
+    @override_settings(API_CACHE_TIMEOUT=60)
+    def test_cached_lists_vary_on_the_fieldset(self):
+        api_cache.get_cache().clear()
+        full = self.client.get(RECIPES_URL)
+        narrow = self.client.get(RECIPES_URL, {'fields': 'id'})
+
+        self.assertIn('tags', full.data['results'][0])
+        self.assertEqual(narrow.data['results'], [{'id': self.recipe.id}])
+        self.assertNotEqual(full['ETag'], narrow['ETag'])
+
+    def test_movies_and_characters(self):
+        character = models.Characters.objects.create(
+            user=self.user, name='Hero',
+        )
+        movie = models.Movie.objects.create(
+            user=self.user,
+            name='Film',
+            release_date=datetime.date(2000, 1, 1),
+            ratings=Decimal('7.5'),
+        )
+        movie.characters.add(character)
+
+        res, count, _ = self._get(MOVIE_URL, {'fields': 'id,name'})
+        self.assertEqual(
+            res.data['results'], [{'id': movie.id, 'name': 'Film'}],
+        )
+        self.assertEqual(count, 1)
+
+        res = self.client.get(movie_url(movie.id), {'omit': 'characters'})
+        self.assertNotIn('characters', res.data)
+
+        res = self.client.get(CHARACTER_URL, {'fields': 'name'})
+        self.assertEqual(res.data['results'], [{'name': 'Hero'}])
@@ -0,0 +1,133 @@
+'''
+Testing the denormalized recipe summaries
+'''
+
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import models
+from core import summary
+from recipe.serializers import RecipeSerializer
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RecipeSummaryTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='summary@example.com', password='pass12345',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _recipe(self, **kwargs):
+        return models.Recipe.objects.create(
+            user=self.user,
+            title='sample recipe',
+            time_minutes=5,
+            price=Decimal('1.50'),
+            **kwargs,
+        )
+
+    def _tag(self, name):
+        return models.Tag.objects.create(user=self.user, name=name)
+
+    def _summary(self, recipe):
+        recipe.refresh_from_db()
+        return summary.normalize(recipe.summary)
+
+    def test_created_through_the_api(self):
+        res = self.client.post(RECIPES_URL, {
+            'title': 'curry',
+            'time_minutes': 30,
+            'price': '5.00',
+            'tags': [{'name': 'Dinner'}],
+            'ingredients': [{'name': 'Rice'}, {'name': 'Lentils'}],
+        }, format='json')
+
+        recipe = models.Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(self._summary(recipe), {
+            'tags': [{'id': recipe.tags.get().id, 'name': 'Dinner'}],
+            'ingredients': [
+                {'id': ingredient.id, 'name': ingredient.name}
+                for ingredient in recipe.ingredients.order_by('id')
+            ],
+        })
+
+    def test_updated_through_the_api(self):
+        recipe = self._recipe()
+        recipe.tags.add(self._tag('Lunch'))
+
+        self.client.patch(
+            detail_url(recipe.id), {'tags': [{'name': 'Dinner'}]},
+            format='json',
+        )
+
+        self.assertEqual(
+            [tag['name'] for tag in self._summary(recipe)['tags']],
+            ['Dinner'],
+        )
+
+    def test_reverse_side_and_clear(self):
+        recipe = self._recipe()
+        tag = self._tag('Vegan')
+
+        tag.recipe_set.add(recipe)
+        self.assertEqual(self._summary(recipe)['tags'][0]['name'], 'Vegan')
+
+        tag.recipe_set.clear()
+        self.assertEqual(self._summary(recipe)['tags'], [])
+
+    def test_rename_and_delete(self):
+        recipe = self._recipe()
+        tag = self._tag('Vegan')
+        recipe.tags.add(tag)
+
+        tag.name = 'Plant based'
+        tag.save()
+        self.assertEqual(
+            self._summary(recipe)['tags'][0]['name'], 'Plant based',
+        )
+
+        tag.delete()
+        self.assertEqual(self._summary(recipe)['tags'], [])
+
+    def test_list_matches_the_nested_serializer(self):
+        recipe = self._recipe()
+        recipe.tags.add(self._tag('b'), self._tag('a'))
+        recipe.ingredients.add(
+            models.Ingredients.objects.create(user=self.user, name='salt'),
+        )
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            res.data['results'], [RecipeSerializer(recipe).data],
+        )
+
+    def test_verify_and_backfill(self):
+        recipe = self._recipe()
+        recipe.tags.add(self._tag('Dinner'))
+        models.Recipe.objects.update(summary={})
+
+        with self.assertRaisesRegex(CommandError, f'recipes {recipe.id}'):
+            call_command('recipe_summaries', verify=True, stdout=StringIO())
+
+        call_command('recipe_summaries', stdout=StringIO())
+        out = StringIO()
+        call_command('recipe_summaries', verify=True, stdout=out)
+
+        self.assertIn('up to date', out.getvalue())
+        self.assertEqual(len(self._summary(recipe)['tags']), 1)
@@ -0,0 +1,124 @@
+'''
+Testing the recipe usage counters of tags and ingredients
+'''
+
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import models
+from core import usage
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class UsageCounterTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='usage@example.com', password='pass12345',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _recipe(self, **kwargs):
+        return models.Recipe.objects.create(
+            user=self.user,
+            title='sample recipe',
+            time_minutes=5,
+            price=Decimal('1.50'),
+            **kwargs,
+        )
+
+    def _tag(self, name):
+        return models.Tag.objects.create(user=self.user, name=name)
+
+    def _count(self, obj):
+        obj.refresh_from_db()
+        return obj.recipe_count
+
+    def test_forward_and_reverse_changes(self):
+        tag = self._tag('Dinner')
+        first, second = self._recipe(), self._recipe()
+
+        first.tags.add(tag)
+        tag.recipe_set.add(second)
+        self.assertEqual(self._count(tag), 2)
+        self.assertIsNotNone(tag.last_used)
+
+        first.tags.remove(tag)
+        self.assertEqual(self._count(tag), 1)
+
+        second.tags.clear()
+        self.assertEqual(self._count(tag), 0)
+
+        tag.recipe_set.add(first, second)
+        tag.recipe_set.clear()
+        self.assertEqual(self._count(tag), 0)
+
+    def test_recipe_save_and_delete(self):
+        tag = self._tag('Dinner')
+        recipe = self._recipe()
+        recipe.tags.add(tag)
+        tag.refresh_from_db()
+        linked = tag.last_used
+
+        recipe.title = 'renamed'
+        with CaptureQueriesContext(connection) as queries:
+            recipe.save()
+        self.assertFalse(
+            [q for q in queries if q['sql'].startswith('UPDATE "core_tag"')],
+        )
+        tag.refresh_from_db()
+        self.assertEqual(tag.last_used, linked)
+
+        recipe.delete()
+        self.assertEqual(self._count(tag), 0)
+
+    def test_api_writes(self):
+        res = self.client.post(RECIPES_URL, {
+            'title': 'curry',
+            'time_minutes': 30,
+            'price': '5.00',
+            'tags': [{'name': 'Dinner'}],
+            'ingredients': [{'name': 'Rice'}],
+        }, format='json')
+        recipe_id = res.data['id']
+        self.client.post(
+            reverse('recipe:recipe-bulk'),
+            json.dumps({'title': 'pilaf', 'time_minutes': 20, 'price': '4.00',
+                        'ingredients': [{'name': 'Rice'}]}) + '\n',
+            content_type='application/x-ndjson',
+        )
+        rice = models.Ingredients.objects.get(name='Rice')
+        self.assertEqual(self._count(rice), 2)
+
+        self.client.patch(
+            reverse('recipe:recipe-batch'),
+            [{'id': recipe_id, 'ingredients': [{'name': 'Lentils'}]}],
+            format='json',
+        )
+        self.assertEqual(self._count(rice), 1)
+        self.assertEqual(
+            self._count(models.Ingredients.objects.get(name='Lentils')), 1,
+        )
+
+    def test_backfill(self):
+        tag = self._tag('Dinner')
+        recipe = self._recipe()
+        recipe.tags.add(tag)
+        models.Tag.objects.update(recipe_count=0, last_used=None)
+
+        usage.backfill(models.Tag.objects.all())
+
+        tag.refresh_from_db()
+        recipe.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+        self.assertEqual(tag.last_used, recipe.updated_at)
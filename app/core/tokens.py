@@ -0,0 +1,93 @@
+'''
+signed, expiring api tokens
+
+a token carries the user id, its kind, its expiry and a random id,
+signed (HMAC) with SECRET_KEY, so verifying one needs no database.
+Access tokens are short lived; a refresh token is traded in once for a
+new pair. Tokens given up before they expire are listed by id in the
+TOKEN_REVOCATION_ALIAS cache until they would have expired anyway.
+That cache must be shared by every process and never evict entries
+early, or a revoked token would work again; without one configured no
+signed tokens are issued or accepted
+'''
+
+import secrets
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as translate
+
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+SALT = 'core.tokens'
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def get_lifetime(kind):
+    if kind == REFRESH:
+        return getattr(settings, 'SIGNED_TOKEN_REFRESH_LIFETIME', 86400)
+    return getattr(settings, 'SIGNED_TOKEN_LIFETIME', 3600)
+
+
+def is_enabled():
+    return getattr(settings, 'TOKEN_REVOCATION_ALIAS', None) is not None
+
+
+def get_revocations():
+    return caches[settings.TOKEN_REVOCATION_ALIAS]
+
+
+def _revocation_key(payload):
+    return f'revoked-token:{payload["j"]}'
+
+
+def issue(user, kind=ACCESS):
+    '''a new signed token of kind for user'''
+    return signing.dumps({
+        'u': user.pk,
+        'k': kind,
+        'e': int(time.time()) + get_lifetime(kind),
+        'j': secrets.token_urlsafe(12),
+    }, salt=SALT)
+
+
+def issue_pair(user):
+    '''the access and refresh tokens returned to clients'''
+    return {
+        'access': issue(user, ACCESS),
+        'refresh': issue(user, REFRESH),
+        'expires_in': get_lifetime(ACCESS),
+    }
+
+
+def verify(token, kinds=(ACCESS,)):
+    '''the payload of a valid token of one of kinds, InvalidToken otherwise'''
+    if not is_enabled():
+        raise InvalidToken(translate('Signed tokens are not enabled.'))
+    try:
+        payload = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        raise InvalidToken(translate('Invalid token.'))
+    if not isinstance(payload, dict) or payload.get('k') not in kinds:
+        raise InvalidToken(translate('Invalid token.'))
+    if payload['e'] <= time.time():
+        raise InvalidToken(translate('Token has expired.'))
+    if get_revocations().get(_revocation_key(payload)):
+        raise InvalidToken(translate('Token has been revoked.'))
+    return payload
+
+
+def revoke(payload):
+    '''
+    list the token as revoked until it expires, returning False when it
+    already was, so a token can be given up exactly once
+    '''
+    timeout = max(int(payload['e'] - time.time()), 1)
+    return get_revocations().add(_revocation_key(payload), True, timeout)
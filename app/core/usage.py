@@ -0,0 +1,67 @@
+'''
+recipe usage counters of tags and ingredients
+
+Tag and Ingredients keep recipe_count, the number of recipes linked to
+them, and last_used, when a recipe was last linked to them, refreshed
+by core.signals so listing items by popularity reads no links. Counts
+are recomputed from the links rather than adjusted, so every refresh
+also repairs them
+
+two transactions changing the links of one item at the same time each
+count without the links of the other, under READ COMMITTED, and the
+later commit wins; the count stays off by those links until the next
+change of the item, or until backfill recounts everything
+'''
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core import models
+
+
+# model name of the counted items -> Recipe relation linking them
+RELATIONS = {'tag': 'tags', 'ingredients': 'ingredients'}
+
+
+def _field(model, recipe_model):
+    return recipe_model._meta.get_field(RELATIONS[model._meta.model_name])
+
+
+def refresh(queryset, used=False, recipe_model=models.Recipe):
+    '''
+    recount the recipes of the items in queryset, in one UPDATE, and
+    mark them used now if used
+    '''
+    field = _field(queryset.model, recipe_model)
+    column = field.m2m_reverse_field_name()
+    links = (
+        field.remote_field.through.objects.using(queryset.db)
+        .filter(**{column: OuterRef('pk')})
+        .order_by()
+        .values(column)
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    changes = {'recipe_count': Coalesce(
+        Subquery(links, output_field=IntegerField()), 0,
+    )}
+    if used:
+        changes['last_used'] = timezone.now()
+    queryset.update(**changes)
+
+
+def backfill(queryset, recipe_model=models.Recipe):
+    '''
+    refresh the items in queryset from scratch, last_used from the
+    latest change of their recipes; the repair for counts gone wrong
+    '''
+    refresh(queryset, recipe_model=recipe_model)
+    relation = RELATIONS[queryset.model._meta.model_name]
+    latest = (
+        recipe_model.objects.using(queryset.db)
+        .filter(**{relation: OuterRef('pk')})
+        .order_by('-updated_at')
+        .values('updated_at')[:1]
+    )
+    queryset.update(last_used=Subquery(latest))
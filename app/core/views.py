@@ -0,0 +1,31 @@
+'''
+views served by the core app
+'''
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.permissions import IsAdminUser
+
+from core import metrics as request_metrics
+from core.authentication import CachedTokenAuthentication
+
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    '''
+    the request histograms of this process, for scrapers holding the
+    token of a staff user
+    '''
+    if not getattr(settings, 'PERF_METRICS', False):
+        raise Http404
+    return HttpResponse(
+        request_metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
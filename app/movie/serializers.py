@@ -5,12 +5,14 @@ Serializers for Movie APIs
 from dataclasses import field
 from email.errors import NonPrintableDefect
 from pyexpat import model
+from django.db import transaction
 from rest_framework import serializers
 
 from core import models
+from core.mixins import UniqueNameMixin
 
 
-class CharacterSerializer(serializers.ModelSerializer):
+class CharacterSerializer(UniqueNameMixin, serializers.ModelSerializer):
     
     class Meta:
         model = models.Characters
@@ -21,20 +23,26 @@ class MovieSerializer(serializers.ModelSerializer):
     
     characters = CharacterSerializer(many = True, required = False)
     
-    def get_or_create(self,characters,movie):
+    def get_or_create(self,characters,movie,replace=False):
         user = self.context['request'].user
-        for character in characters:
-            character_obj,create = models.Characters.objects.get_or_create(
-                user = user,
-                **character
-            )
-            movie.characters.add(character_obj)
+        character_objs = models.Characters.objects.bulk_get_or_create(
+            user,
+            [character['name'] for character in characters],
+        )
+        if replace:
+            # only the links that differ are deleted and inserted
+            movie.characters.set(character_objs)
+        elif character_objs:
+            movie.characters.add(*character_objs)
         
     class Meta:
         model = models.Movie
         fields = ['id','name','release_date','ratings','director','producer','characters']
         read_only_fields = ['id']
         
+    # one transaction, so the characters stay locked against
+    # core.orphans until they are linked (see OwnedNameManager)
+    @transaction.atomic(savepoint=False)
     def create(self,validated_data):
         ''' Create character with movie'''
         characters = validated_data.pop('characters',[])
@@ -42,13 +50,13 @@ class MovieSerializer(serializers.ModelSerializer):
         self.get_or_create(characters, movie)
         return movie
     
+    @transaction.atomic(savepoint=False)
     def update(self,instance, validated_data):
         ''' updating movie and characters'''
         
-        characters = validated_data.pop('characters',[])
+        characters = validated_data.pop('characters',None)
         if characters is not None:
-            instance.characters.clear()
-            self.get_or_create(characters, instance)
+            self.get_or_create(characters, instance, replace=True)
             
         for k,v in validated_data.items():
             setattr(instance,k,v)
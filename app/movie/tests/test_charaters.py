@@ -12,6 +12,7 @@ from django.urls import reverse
 
 from core.models import Characters
 from movie.serializers import CharacterSerializer,CharacterDetailSerializer
+from core.testing import QueryBudgetMixin
 
 
 CHARACTER_URL  = reverse('movie:characters-list')
@@ -28,7 +29,7 @@ def create_user(email = "test@gmail.com",password="pass123"):
     )
 
 
-class PublicUserTests(TestCase):
+class PublicUserTests(QueryBudgetMixin, TestCase):
     '''Test get list of character with unauthorized user '''
     
     def setUp(self):
@@ -41,7 +42,7 @@ class PublicUserTests(TestCase):
         
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
         
-class PrivateUserTests(TestCase):
+class PrivateUserTests(QueryBudgetMixin, TestCase):
     '''Test get list of character with authorized user '''
     
     def setUp(self):
@@ -85,7 +86,7 @@ class PrivateUserTests(TestCase):
         actual_characters = Characters.objects.all().order_by('-name')
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         serializer = CharacterSerializer(actual_characters)
-        self.assertEqual(len(res.data),1)
+        self.assertEqual(len(res.data['results']),1)
         
         
     def test_create_character(self):
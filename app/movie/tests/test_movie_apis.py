@@ -13,6 +13,7 @@ from django.urls import reverse
 from django.contrib.auth import get_user_model
 from core import models
 from movie.serializers import MovieSerializer,MovieDetailSerializer
+from core.testing import QueryBudgetMixin
 
 
 MOVIE_URL  = reverse('movie:movie-list')
@@ -46,7 +47,7 @@ def create_movie(user, **movie_object):
     
     
     
-class PublicUserTests(TestCase):
+class PublicUserTests(QueryBudgetMixin, TestCase):
     ''' Class to test unauthorized users'''
     
     def setUp(self):
@@ -58,7 +59,7 @@ class PublicUserTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
         
         
-class PrivateUserTests(TestCase):
+class PrivateUserTests(QueryBudgetMixin, TestCase):
     ''' Tests With authorized users'''
     
     def setUp(self):
@@ -76,7 +77,7 @@ class PrivateUserTests(TestCase):
         movies = models.Movie.objects.all().order_by('-id')
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         serializer = MovieSerializer(movies, many =True)
-        self.assertEqual(res.data,serializer.data)
+        self.assertEqual(res.data['results'],serializer.data)
         
     def test_get_movie_list_limited(self):
         '''Test get list of movies for authorized user'''
@@ -93,7 +94,7 @@ class PrivateUserTests(TestCase):
         movies = models.Movie.objects.filter(user =self.user)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         serializer = MovieSerializer(movies, many =True)
-        self.assertEqual(res.data,serializer.data)
+        self.assertEqual(res.data['results'],serializer.data)
         
     def test_create_movie(self):
         '''test create movie'''
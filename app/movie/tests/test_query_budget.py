@@ -0,0 +1,113 @@
+'''
+query budget tests for the movie apis
+'''
+
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from core.testing import QueryBudgetMixin
+
+
+MOVIE_URL = reverse('movie:movie-list')
+
+# one query for the movies plus one for the characters
+MOVIE_LIST_BUDGET = 2
+MOVIE_DETAIL_BUDGET = 2
+
+
+def detail_url(movie_id):
+    return reverse('movie:movie-detail', args=[movie_id])
+
+
+def create_movies(user, count, characters=3):
+    '''create movies sharing a few characters'''
+    cast = [
+        models.Characters.objects.create(user=user, name=f'character {i}')
+        for i in range(characters)
+    ]
+    movies = []
+    for i in range(count):
+        movie = models.Movie.objects.create(
+            user=user,
+            name=f'movie {i}',
+            release_date='2009-09-10',
+            ratings=Decimal('4.5'),
+        )
+        movie.characters.add(*cast)
+        movies.append(movie)
+    return movies
+
+
+class MovieQueryBudgetTests(QueryBudgetMixin, TestCase):
+    '''
+    the number of queries must not grow with the number of movies
+    '''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='budget@example.com',
+            password='test123',
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_budget(self):
+        '''list with many movies costs a fixed number of queries'''
+        create_movies(self.user, 20)
+
+        with self.assertNumQueries(MOVIE_LIST_BUDGET):
+            res = self.client.get(MOVIE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 20)
+        self.assertEqual(len(res.data['results'][0]['characters']), 3)
+
+    def test_detail_budget(self):
+        '''detail view prefetches the characters'''
+        movie = create_movies(self.user, 1, characters=8)[0]
+
+        with self.assertNumQueries(MOVIE_DETAIL_BUDGET):
+            res = self.client.get(detail_url(movie.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['characters']), 8)
+
+    def test_unchanged_characters_are_not_rewritten(self):
+        '''a PUT with the same cast writes no links'''
+        movie = create_movies(self.user, 1)[0]
+        payload = {
+            'name': 'movie 0',
+            'release_date': '2009-09-10',
+            'ratings': '4.5',
+            'characters': [{'name': f'character {i}'} for i in range(3)],
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.put(
+                detail_url(movie.id), payload, format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'core_movie_characters' in query['sql']
+            and query['sql'].startswith(('INSERT', 'DELETE'))
+        ])
+
+    def test_patch_without_characters_keeps_them(self):
+        movie = create_movies(self.user, 1)[0]
+
+        res = self.client.patch(
+            detail_url(movie.id), {'name': 'renamed'}, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(movie.characters.count(), 3)
@@ -5,6 +5,7 @@ urls for movie APIs
 from django.urls import path,include
 
 
+from core.async_views import async_read_patterns
 from movie import views
 from rest_framework.routers import DefaultRouter
 
@@ -16,7 +17,7 @@ router.register('character', views.CharacterView)
 app_name ='movie'
 
 urlpatterns = [
-    path(' ',include(router.urls))
+    path(' ',include(async_read_patterns(router.urls)))
 ]
 
 
@@ -2,23 +2,51 @@
 Views for Movie APIs
 '''
 
+from drf_spectacular.utils import extend_schema, extend_schema_view
 from movie import serializers
 from rest_framework import viewsets 
 from core import models
+from core import cache as api_cache
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+)
+from core.mixins import (
+    CachedListMixin,
+    ConditionalGetMixin,
+    PrefetchRelatedMixin,
+    SPARSE_FIELDS_PARAMETERS,
+    SparseFieldsMixin,
+)
 
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 
 
-class MovieView(viewsets.ModelViewSet):
+@extend_schema_view(
+    list = extend_schema(parameters = SPARSE_FIELDS_PARAMETERS),
+    retrieve = extend_schema(parameters = SPARSE_FIELDS_PARAMETERS),
+)
+class MovieView(
+    SparseFieldsMixin,
+    PrefetchRelatedMixin,
+    ConditionalGetMixin,
+    CachedListMixin,
+    viewsets.ModelViewSet,
+    ):
     
     ''' View set for Movie'''
     
     serializer_class = serializers.MovieDetailSerializer
     queryset = models.Movie.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [IsAuthenticated]
+    cache_namespace = api_cache.MOVIES
+    cache_query_params = ('cursor', 'page_size', 'fields', 'omit')
+    etag_query_params = ('fields', 'omit')
     
     
     def get_queryset(self):
@@ -35,19 +63,28 @@ class MovieView(viewsets.ModelViewSet):
         
         return self.serializer_class
     
-class CharacterView(viewsets.ModelViewSet):
+@extend_schema_view(
+    list = extend_schema(parameters = SPARSE_FIELDS_PARAMETERS),
+    retrieve = extend_schema(parameters = SPARSE_FIELDS_PARAMETERS),
+)
+class CharacterView(SparseFieldsMixin, viewsets.ModelViewSet):
     
     ''' View set for Character'''
     
     serializer_class = serializers.CharacterDetailSerializer
     queryset = models.Characters.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [IsAuthenticated]
     
     
     def get_queryset(self):
         ''' filter with authorized user'''
-        return self.queryset.filter(user = self.request.user).order_by('-name')
+        return self.queryset.filter(
+            user = self.request.user,
+        ).order_by('-name', '-id')
     
     def perform_create(self, serializer):
         ''' save serializer'''
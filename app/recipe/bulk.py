@@ -0,0 +1,330 @@
+'''
+bulk import of recipes
+'''
+
+from collections import defaultdict
+from itertools import islice
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as translate
+from rest_framework.exceptions import ValidationError
+
+from core import cache as api_cache
+from core import models
+from core import search
+from core import summary
+from core import usage
+from recipe import serializers
+
+
+def chunked(iterable, size):
+    '''yield lists of at most size items from iterable'''
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resolve(user, cache, model, item_lists):
+    '''map every name in item_lists to its object with one lookup'''
+    names = [
+        item['name']
+        for items in item_lists
+        for item in items
+        if item['name'] not in cache
+    ]
+    for obj in model.objects.bulk_get_or_create(user, names):
+        cache[obj.name] = obj
+    return [
+        list(dict.fromkeys(cache[item['name']] for item in items))
+        for items in item_lists
+    ]
+
+
+class RecipeImporter:
+    '''
+    validate and write recipe records chunk by chunk
+
+    tag and ingredient names are resolved once per import, so records
+    sharing names across the whole batch do not repeat the lookups
+    '''
+
+    serializer_class = serializers.RecipeDetailSerializer
+
+    def __init__(self, request, chunk_size=500):
+        self.request = request
+        self.user = request.user
+        self.chunk_size = chunk_size
+        self.tags = {}
+        self.ingredients = {}
+        # one serializer validates every record, as the child of a list
+        # serializer does, so its fields are built once per import
+        self.serializer = self.serializer_class(
+            context={'request': request},
+        )
+
+    def run(self, records):
+        '''import (line, record, error) tuples, returning per-row results'''
+        results = []
+        for chunk in chunked(records, self.chunk_size):
+            results.extend(self._import_chunk(chunk))
+        return results
+
+    def _validate(self, chunk):
+        valid = []
+        results = {}
+        for line, record, error in chunk:
+            if error is not None:
+                results[line] = {'line': line, 'errors': {
+                    'non_field_errors': [error],
+                }}
+                continue
+            try:
+                data = self.serializer.run_validation(record)
+            except ValidationError as exc:
+                results[line] = {'line': line, 'errors': exc.detail}
+            else:
+                valid.append((line, data))
+        return valid, results
+
+    def _resolve(self, cache, model, item_lists):
+        return resolve(self.user, cache, model, item_lists)
+
+    def _import_chunk(self, chunk):
+        valid, results = self._validate(chunk)
+        if valid:
+            try:
+                with transaction.atomic():
+                    created = self._write(valid)
+            except DatabaseError as exc:
+                # names created inside the rolled back chunk are gone
+                self.tags.clear()
+                self.ingredients.clear()
+                for line, data in valid:
+                    results[line] = {'line': line, 'errors': {
+                        'non_field_errors': [str(exc)],
+                    }}
+            else:
+                # bulk_create sends no signals, so invalidate here
+                api_cache.invalidate(api_cache.RECIPES, self.user.pk)
+                for (line, data), recipe in zip(valid, created):
+                    results[line] = {'line': line, 'id': recipe.id}
+        return [results[line] for line, record, error in chunk]
+
+    def _write(self, valid):
+        rows = [dict(data) for line, data in valid]
+        tag_lists = self._resolve(
+            self.tags, models.Tag,
+            [row.pop('tags', []) for row in rows],
+        )
+        ingredient_lists = self._resolve(
+            self.ingredients, models.Ingredients,
+            [row.pop('ingredients', []) for row in rows],
+        )
+        # the summaries are known here, no need to read them back
+        recipes = [
+            models.Recipe(
+                user=self.user,
+                summary=summary.of(tags=tags, ingredients=ingredients),
+                **row,
+            )
+            for row, tags, ingredients in zip(
+                rows, tag_lists, ingredient_lists,
+            )
+        ]
+        if connection.features.can_return_rows_from_bulk_insert:
+            models.Recipe.objects.bulk_create(recipes)
+        else:
+            # the primary keys are needed for the links below
+            for recipe in recipes:
+                recipe.save()
+
+        tag_through = models.Recipe.tags.through
+        ingredient_through = models.Recipe.ingredients.through
+        tag_through.objects.bulk_create([
+            tag_through(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe, tags in zip(recipes, tag_lists)
+            for tag in tags
+        ])
+        ingredient_through.objects.bulk_create([
+            ingredient_through(
+                recipe_id=recipe.id,
+                ingredients_id=ingredient.id,
+            )
+            for recipe, ingredients in zip(recipes, ingredient_lists)
+            for ingredient in ingredients
+        ])
+        search.update_search_vector(models.Recipe.objects.filter(
+            pk__in=[recipe.id for recipe in recipes],
+        ))
+        for model, item_lists in (
+            (models.Tag, tag_lists),
+            (models.Ingredients, ingredient_lists),
+        ):
+            usage.refresh(model.objects.filter(pk__in={
+                obj.id for items in item_lists for obj in items
+            }), used=True)
+        return recipes
+
+
+class RecipeBatchUpdater:
+    '''
+    apply a list of partial recipe updates in one transaction
+
+    each item is a PATCH body plus the recipe id, and nothing is written
+    unless every item is valid. Scalar fields go out in one bulk_update,
+    and tags or ingredients replace the current ones as in a PATCH but by
+    inserting and deleting only the links that differ
+    '''
+
+    serializer_class = serializers.RecipeDetailSerializer
+
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+
+    def run(self, items):
+        '''return (per item results, whether the batch was applied)'''
+        with transaction.atomic():
+            valid, results = self._validate(items)
+            applied = len(valid) == len(items)
+            if applied:
+                self._write(valid)
+        if applied:
+            # bulk writes send no signals, so invalidate here
+            api_cache.invalidate(api_cache.RECIPES, self.user.pk)
+        return results, applied
+
+    def _ids(self, items):
+        ids = []
+        for item in items:
+            recipe_id = item.get('id') if isinstance(item, dict) else None
+            ids.append(recipe_id if type(recipe_id) is int else None)
+        return ids
+
+    def _validate(self, items):
+        ids = self._ids(items)
+        # locked, so concurrent updates wait instead of being overwritten
+        recipes = models.Recipe.objects.filter(user=self.user).defer(
+            'search_vector', 'summary',
+        ).select_for_update().in_bulk(
+            [recipe_id for recipe_id in ids if recipe_id is not None],
+        )
+        seen = set()
+        valid = []
+        results = []
+        for index, (item, recipe_id) in enumerate(zip(items, ids)):
+            result = {'index': index, 'id': recipe_id}
+            recipe = recipes.get(recipe_id)
+            if not isinstance(item, dict):
+                result['errors'] = {'non_field_errors': [
+                    translate('Expected a JSON object'),
+                ]}
+            elif recipe_id is None:
+                result['errors'] = {'id': [
+                    translate('A valid recipe id is required.'),
+                ]}
+            elif recipe is None:
+                result['errors'] = {'id': [translate('Not found.')]}
+            elif recipe_id in seen:
+                result['errors'] = {'id': [
+                    translate('This recipe is listed more than once.'),
+                ]}
+            else:
+                serializer = self.serializer_class(
+                    recipe,
+                    data=item,
+                    partial=True,
+                    context={'request': self.request},
+                )
+                if serializer.is_valid():
+                    valid.append((recipe, serializer.validated_data))
+                else:
+                    result['errors'] = serializer.errors
+            seen.add(recipe_id)
+            results.append(result)
+        return valid, results
+
+    def _write(self, valid):
+        now = timezone.now()
+        fields = {'updated_at'}
+        relations = defaultdict(dict)
+        for recipe, data in valid:
+            data = dict(data)
+            for key in summary.RELATIONS:
+                items = data.pop(key, None)
+                if items is not None:
+                    relations[key][recipe.id] = items
+            for field, value in data.items():
+                setattr(recipe, field, value)
+                fields.add(field)
+            recipe.updated_at = now
+        recipes = [recipe for recipe, data in valid]
+        models.Recipe.objects.bulk_update(recipes, sorted(fields))
+
+        changed = {
+            key: self._replace_links(key, wanted)
+            for key, wanted in relations.items()
+        }
+
+        recipe_ids = [recipe.id for recipe in recipes]
+        for key, (added, removed) in changed.items():
+            model = models.Recipe._meta.get_field(
+                summary.RELATIONS[key][0],
+            ).related_model
+            if added:
+                usage.refresh(model.objects.filter(pk__in=added), used=True)
+            if removed - added:
+                usage.refresh(model.objects.filter(pk__in=removed - added))
+
+        updated = models.Recipe.objects.filter(pk__in=recipe_ids)
+        search.update_search_vector(updated)
+        if relations:
+            summary.update_summaries(models.Recipe.objects.filter(pk__in={
+                recipe_id
+                for wanted in relations.values()
+                for recipe_id in wanted
+            }))
+
+    def _replace_links(self, key, wanted):
+        '''
+        make the links of each recipe in wanted the named objects,
+        returning the ids of the objects linked and of those unlinked
+        '''
+        relation, column = summary.RELATIONS[key]
+        field = models.Recipe._meta.get_field(relation)
+        through = field.remote_field.through
+        model = field.related_model
+        column = f'{column}_id'
+        wanted = {
+            recipe_id: {obj.id for obj in objs}
+            for recipe_id, objs in zip(
+                wanted, resolve(self.user, {}, model, wanted.values()),
+            )
+        }
+        current = defaultdict(set)
+        rows = through.objects.filter(recipe_id__in=wanted).values_list(
+            'recipe_id', column,
+        )
+        for recipe_id, linked in rows:
+            current[recipe_id].add(linked)
+
+        linked, unlinked = set(), set()
+        added = []
+        stale = Q()
+        for recipe_id, ids in wanted.items():
+            for pk in ids - current[recipe_id]:
+                added.append(through(recipe_id=recipe_id, **{column: pk}))
+                linked.add(pk)
+            removed = current[recipe_id] - ids
+            if removed:
+                stale |= Q(recipe_id=recipe_id, **{f'{column}__in': removed})
+                unlinked.update(removed)
+        through.objects.bulk_create(added)
+        if stale:
+            through.objects.filter(stale).delete()
+        return linked, unlinked
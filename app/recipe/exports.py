@@ -0,0 +1,28 @@
+'''
+export of recipes as a stream of rows
+'''
+
+from core import summary
+
+
+# columns of an exported recipe, tags and ingredients are lists of names
+FIELDS = [
+    'id', 'title', 'time_minutes', 'price', 'link', 'description',
+    'tags', 'ingredients',
+]
+COLUMNS = [field for field in FIELDS if field not in summary.RELATIONS]
+
+
+def rows(queryset, chunk_size=2000):
+    '''
+    yield one dict per recipe of queryset, reading chunk_size rows at a
+    time through a server side cursor; tags and ingredients come from
+    the recipe summary, so there is one query whatever the size
+    '''
+    values = queryset.values_list(*COLUMNS, 'summary')
+    for *columns, stored in values.iterator(chunk_size=chunk_size):
+        row = dict(zip(COLUMNS, columns))
+        row['price'] = str(row['price'])
+        for key, items in summary.normalize(stored).items():
+            row[key] = [item['name'] for item in items]
+        yield row
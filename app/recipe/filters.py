@@ -0,0 +1,54 @@
+'''
+filtering recipes by their tags and ingredients
+
+each relation is tested with a correlated EXISTS on the through table
+instead of joining it, so matching several ids never duplicates recipe
+rows and no DISTINCT is needed
+'''
+
+from django.db.models import Exists, OuterRef
+from rest_framework.exceptions import ValidationError
+
+from core import models
+
+
+ANY = 'any'
+ALL = 'all'
+MATCH_MODES = (ANY, ALL)
+
+# query param -> (through table, column holding the related id)
+RELATIONS = {
+    'tags': (models.Recipe.tags.through, 'tag_id'),
+    'ingredients': (models.Recipe.ingredients.through, 'ingredients_id'),
+}
+
+
+def _exists(through, column, ids):
+    return Exists(through.objects.filter(
+        recipe_id=OuterRef('pk'),
+        **{f'{column}__in': ids},
+    ))
+
+
+def get_match(query_params):
+    '''the ?match= mode, any unless given'''
+    match = query_params.get('match', ANY)
+    if match not in MATCH_MODES:
+        raise ValidationError(
+            {'match': f'Expected one of: {", ".join(MATCH_MODES)}'}
+        )
+    return match
+
+
+def filter_related(queryset, param, ids, match=ANY):
+    '''
+    keep the recipes linked to any (or all) of ids through param
+    '''
+    through, column = RELATIONS[param]
+    ids = sorted(set(ids))
+    if match == ALL:
+        # one probe of the (recipe_id, related id) unique index per id
+        for related_id in ids:
+            queryset = queryset.filter(_exists(through, column, [related_id]))
+        return queryset
+    return queryset.filter(_exists(through, column, ids))
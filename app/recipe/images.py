@@ -0,0 +1,166 @@
+'''
+background processing of uploaded recipe images
+
+the upload request only stores the original; resized renditions with
+the metadata stripped are rendered by a small thread pool once the
+upload is committed, and recorded on the recipe with its image_status.
+Jobs queued when the process stops are lost, the render_images command
+renders the recipes they left pending
+'''
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from core import cache as api_cache
+from core import models
+
+
+logger = logging.getLogger(__name__)
+
+# rendition name -> longest side in pixels
+RENDITIONS = {
+    'thumbnail': 200,
+    'medium': 800,
+    'full': 1600,
+}
+
+# format -> (extension, save options), webp only when pillow has it
+FORMATS = {
+    'webp': ('webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_lock = Lock()
+
+
+def available_formats():
+    return [
+        name for name in FORMATS
+        if name != 'webp' or features.check('webp')
+    ]
+
+
+def get_workers():
+    return getattr(settings, 'RECIPE_IMAGE_WORKERS', 2)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_workers(),
+                thread_name_prefix='recipe-images',
+            )
+        return _executor
+
+
+def schedule(recipe):
+    '''
+    render the renditions of the recipe image once the upload commits;
+    with RECIPE_IMAGE_WORKERS = 0 they are rendered in the request
+    '''
+    args = (recipe.pk, recipe.image.name)
+    if get_workers():
+        transaction.on_commit(lambda: get_executor().submit(_run, *args))
+    else:
+        transaction.on_commit(lambda: process(*args))
+
+
+def _run(recipe_id, name):
+    try:
+        process(recipe_id, name)
+    finally:
+        # worker threads hold their own connections
+        close_old_connections()
+
+
+def _rendition_name(name, rendition, extension):
+    root = os.path.splitext(name)[0]
+    return f'{root}_{rendition}.{extension}'
+
+
+def render(source, name):
+    '''
+    save every rendition of the source image, returning
+    {rendition: {format: storage name}}
+    '''
+    image = Image.open(source)
+    largest = max(RENDITIONS.values())
+    # lets jpeg decode at a reduced scale, big originals load much faster
+    image.draft('RGB', (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info
+                              else 'RGB')
+
+    renditions = {}
+    for rendition, size in sorted(
+            RENDITIONS.items(), key=lambda item: -item[1]):
+        # shrink from the previous, larger rendition
+        image = image.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+        renditions[rendition] = {}
+        for format_name in available_formats():
+            extension, options = FORMATS[format_name]
+            frame = image
+            if format_name == 'jpeg' and frame.mode != 'RGB':
+                frame = frame.convert('RGB')
+            buffer = BytesIO()
+            # no exif or icc passed on, so the metadata is dropped
+            frame.save(buffer, format=format_name.upper(), **options)
+            renditions[rendition][format_name] = default_storage.save(
+                _rendition_name(name, rendition, extension),
+                ContentFile(buffer.getvalue()),
+            )
+    return renditions
+
+
+def delete_renditions(renditions):
+    '''remove the files of {rendition: {format: storage name}}'''
+    for formats in renditions.values():
+        for name in formats.values():
+            default_storage.delete(name)
+
+
+def process(recipe_id, name):
+    '''
+    render and record the renditions of image name of the recipe,
+    returning its image_status or None when the recipe is gone
+    '''
+    try:
+        recipe = models.Recipe.objects.only('user_id').get(pk=recipe_id)
+    except models.Recipe.DoesNotExist:
+        logger.info('recipe %s deleted before its image %s', recipe_id, name)
+        return None
+    try:
+        with default_storage.open(name, 'rb') as source:
+            renditions = render(source, name)
+    except Exception:
+        logger.exception('processing image %s of recipe %s', name, recipe_id)
+        status, renditions = models.Recipe.IMAGE_FAILED, {}
+    else:
+        status = models.Recipe.IMAGE_READY
+
+    # update sends no signals; skip it when a newer upload replaced name
+    updated = models.Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_status=status,
+        image_renditions=renditions,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        api_cache.invalidate(api_cache.RECIPES, recipe.user_id)
+    else:
+        delete_renditions(renditions)
+    return status
@@ -3,13 +3,32 @@ serializers for our recipe app
 '''
 
 from pyexpat import model
+from django.core.files.storage import default_storage
+from django.db import transaction
 from rest_framework import serializers
 from core import models
+from core import summary
+from core.mixins import UniqueNameMixin
 
 
+class ImageRenditionsField(serializers.ReadOnlyField):
+    '''urls of the rendered image renditions by name and format'''
 
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for rendition, formats in value.items():
+            urls[rendition] = {}
+            for format_name, name in formats.items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[rendition][format_name] = url
+        return urls
 
-class IngredientSerializer(serializers.ModelSerializer):
+
+
+class IngredientSerializer(UniqueNameMixin, serializers.ModelSerializer):
     ''' serializers for Ingredients'''
     
     class Meta:
@@ -17,7 +36,7 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ['id','name']
         read_only_fields = ['id']
         
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(UniqueNameMixin, serializers.ModelSerializer):
     ''' serializers for tag '''
     
     class Meta:
@@ -25,6 +44,24 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id','name']
         read_only_fields = ['id']
 
+
+class IngredientUsageSerializer(IngredientSerializer):
+    ''' ingredient with the number of recipes using it'''
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + [
+            'recipe_count', 'last_used',
+        ]
+        read_only_fields = fields
+
+
+class TagUsageSerializer(TagSerializer):
+    ''' tag with the number of recipes using it'''
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['recipe_count', 'last_used']
+        read_only_fields = fields
+
 class RecipeSerializer(serializers.ModelSerializer):
     '''
     Serializers for recipe app
@@ -39,29 +76,36 @@ class RecipeSerializer(serializers.ModelSerializer):
                   ]
         read_only_fields = ['id']
         
-    def _get_or_create_tags(self,tags,recipe):
-        ''' create or get the tags'''
+    def _get_or_create_tags(self,tags,recipe,replace=False):
+        ''' create or get the tags, replacing the current ones if asked'''
         requested_user = self.context['request'].user
-        
-        for tag in tags:
-            tag_obj,created = models.Tag.objects.get_or_create(
-                user = requested_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
+        tag_objs = models.Tag.objects.bulk_get_or_create(
+            requested_user,
+            [tag['name'] for tag in tags],
+        )
+        if replace:
+            # set() only deletes and inserts the links that differ, and
+            # sends no m2m signals when there are none
+            recipe.tags.set(tag_objs)
+        elif tag_objs:
+            recipe.tags.add(*tag_objs)
             
-    def _get_or_create_ingredients(self,ingredients,recipe):
-        ''' create or get the ingredients'''
+    def _get_or_create_ingredients(self,ingredients,recipe,replace=False):
+        ''' create or get the ingredients, as _get_or_create_tags'''
         requested_user = self.context['request'].user
-        
-        for ingredients in ingredients:
-            ingredient_obj,created = models.Ingredients.objects.get_or_create(
-                user = requested_user,
-                **ingredients,
-            )
-            recipe.ingredients.add(ingredient_obj)
+        ingredient_objs = models.Ingredients.objects.bulk_get_or_create(
+            requested_user,
+            [ingredient['name'] for ingredient in ingredients],
+        )
+        if replace:
+            recipe.ingredients.set(ingredient_objs)
+        elif ingredient_objs:
+            recipe.ingredients.add(*ingredient_objs)
         
         
+    # one transaction, so the tags and ingredients stay locked against
+    # core.orphans until they are linked (see OwnedNameManager)
+    @transaction.atomic(savepoint=False)
     def create(self,validated_data):
         ''' creating recipe with tags'''
         tags = validated_data.pop('tags',[])
@@ -72,16 +116,17 @@ class RecipeSerializer(serializers.ModelSerializer):
         
         return recipe
     
+    @transaction.atomic(savepoint=False)
     def update(self,instance, validated_data):
         ''' updating the tags'''
         tags = validated_data.pop('tags',None)
         ingredients = validated_data.pop('ingredients',None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._get_or_create_tags(tags, instance, replace=True)
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            self._get_or_create_ingredients(
+                ingredients, instance, replace=True,
+            )
             
         for attrs, value in validated_data.items():
             setattr(instance,attrs,value)
@@ -90,19 +135,52 @@ class RecipeSerializer(serializers.ModelSerializer):
         return instance
             
         
+class SummaryField(serializers.ReadOnlyField):
+    '''one list of the denormalized Recipe.summary'''
+
+    def __init__(self, key, **kwargs):
+        self.key = key
+        kwargs['source'] = 'summary'
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return summary.normalize(value)[self.key]
+
+
+class RecipeSummarySerializer(serializers.ModelSerializer):
+    '''
+    the RecipeSerializer payload read from Recipe.summary, for the list
+    endpoint: no joins and no prefetches
+    '''
+    tags = SummaryField('tags')
+    ingredients = SummaryField('ingredients')
+
+    class Meta:
+        model = models.Recipe
+        fields = RecipeSerializer.Meta.fields
+        read_only_fields = fields
+
+
 class RecipeDetailSerializer(RecipeSerializer):
     '''
     Serializer for detail api
     '''
+    image_renditions = ImageRenditionsField()
+
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields+['description']+['image']
+        fields = RecipeSerializer.Meta.fields+['description']+['image'] + [
+            'image_status', 'image_renditions',
+        ]
+        read_only_fields = ['id', 'image_status']
         
 class RecipeImageSerializer(serializers.ModelSerializer):
     
+    image_renditions = ImageRenditionsField()
+
     class Meta:
         model = models.Recipe
-        fields =['id','image']
-        read_only_fields = ['id']
+        fields =['id','image','image_status','image_renditions']
+        read_only_fields = ['id','image_status']
         extra_kwargs ={'image':{'required':'True'}}
         
 
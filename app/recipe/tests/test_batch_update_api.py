@@ -0,0 +1,177 @@
+'''
+testing the batch partial update api
+'''
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from core import summary
+from core.testing import QueryBudgetMixin
+
+
+BATCH_URL = reverse('recipe:recipe-batch')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def create_recipe(user, title='sample recipe'):
+    return models.Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=5,
+        price=Decimal('1.50'),
+    )
+
+
+class PublicBatchUpdateTests(QueryBudgetMixin, TestCase):
+
+    def test_auth_required(self):
+        res = APIClient().patch(BATCH_URL, [], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateBatchUpdateTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='batch@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _patch(self, items):
+        return self.client.patch(BATCH_URL, items, format='json')
+
+    def test_scalar_updates(self):
+        first = create_recipe(self.user, 'first')
+        second = create_recipe(self.user, 'second')
+        updated_at = first.updated_at
+
+        res = self._patch([
+            {'id': first.id, 'price': '2.25'},
+            {'id': second.id, 'time_minutes': 45, 'title': 'renamed'},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['updated'], 2)
+        self.assertEqual(
+            res.data['results'],
+            [{'index': 0, 'id': first.id}, {'index': 1, 'id': second.id}],
+        )
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.price, Decimal('2.25'))
+        self.assertEqual(first.time_minutes, 5)
+        self.assertEqual((second.title, second.time_minutes), ('renamed', 45))
+        self.assertGreater(first.updated_at, updated_at)
+
+    def test_tags_are_replaced_by_difference(self):
+        recipe = create_recipe(self.user)
+        keep = models.Tag.objects.create(user=self.user, name='keep')
+        drop = models.Tag.objects.create(user=self.user, name='drop')
+        recipe.tags.add(keep, drop)
+        link = models.Recipe.tags.through.objects.get(tag=keep)
+
+        res = self._patch([{
+            'id': recipe.id,
+            'tags': [{'name': 'keep'}, {'name': 'new'}],
+            'ingredients': [{'name': 'salt'}],
+        }])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(recipe.tags.values_list('name', flat=True)),
+            ['keep', 'new'],
+        )
+        # the unchanged link was left alone
+        self.assertTrue(
+            models.Recipe.tags.through.objects.filter(pk=link.pk).exists()
+        )
+        recipe.refresh_from_db()
+        self.assertEqual(
+            [tag['name'] for tag in summary.normalize(recipe.summary)['tags']],
+            ['keep', 'new'],
+        )
+        self.assertEqual(
+            summary.normalize(recipe.summary)['ingredients'][0]['name'],
+            'salt',
+        )
+
+    def test_invalid_items_apply_nothing(self):
+        recipe = create_recipe(self.user)
+        other = create_recipe(get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123',
+        ))
+
+        res = self._patch([
+            {'id': recipe.id, 'price': '9.99'},
+            {'id': recipe.id, 'price': '1.00'},
+            {'id': other.id, 'price': '1.00'},
+            {'price': '1.00'},
+            {'id': recipe.id + other.id, 'time_minutes': 'soon'},
+            'not an object',
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['updated'], 0)
+        self.assertEqual(res.data['failed'], 5)
+        results = res.data['results']
+        self.assertNotIn('errors', results[0])
+        self.assertIn('more than once', str(results[1]['errors']['id']))
+        self.assertIn('Not found', str(results[2]['errors']['id']))
+        self.assertIn('id', results[3]['errors'])
+        self.assertIn('id', results[4]['errors'])
+        self.assertIn('non_field_errors', results[5]['errors'])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.price, Decimal('1.50'))
+
+    def test_field_errors_are_reported(self):
+        recipe = create_recipe(self.user)
+
+        res = self._patch([{'id': recipe.id, 'time_minutes': 'soon'}])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('time_minutes', res.data['results'][0]['errors'])
+
+    def test_body_must_be_a_bounded_list(self):
+        for body in ({'id': 1}, []):
+            res = self._patch(body)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self._patch([{'id': number} for number in range(501)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_lists_are_refreshed(self):
+        recipe = create_recipe(self.user)
+        self.client.get(RECIPES_URL)
+
+        self._patch([{'id': recipe.id, 'title': 'renamed'}])
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'][0]['title'], 'renamed')
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        def batch(count):
+            recipes = [create_recipe(self.user) for _ in range(count)]
+            return [
+                {
+                    'id': recipe.id,
+                    'price': '3.00',
+                    'tags': [{'name': f'tag {recipe.id}'}, {'name': 'all'}],
+                }
+                for recipe in recipes
+            ]
+
+        small, large = batch(2), batch(20)
+        with self.assertQueryBudget(30) as queries:
+            self._patch(small)
+        with self.assertNumQueries(len(queries)):
+            self._patch(large)
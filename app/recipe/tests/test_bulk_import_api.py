@@ -0,0 +1,178 @@
+'''
+testing the bulk recipe import api
+'''
+
+import json
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from recipe.views import RecipeView
+from core.testing import QueryBudgetMixin
+
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def ndjson(*records):
+    '''encode records as newline delimited JSON'''
+    return '\n'.join(
+        record if isinstance(record, str) else json.dumps(record)
+        for record in records
+    ) + '\n'
+
+
+def sample_record(**params):
+    record = {
+        'title': 'sample recipe',
+        'time_minutes': 10,
+        'price': '4.50',
+    }
+    record.update(params)
+    return record
+
+
+class PublicBulkImportTests(QueryBudgetMixin, TestCase):
+    '''bulk import requires authentication'''
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.post(
+            BULK_URL, ndjson(sample_record()),
+            content_type='application/x-ndjson',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateBulkImportTests(QueryBudgetMixin, TestCase):
+    '''bulk import for an authenticated user'''
+    # name lookups run once per chunk, and the tests use tiny chunks
+    query_repeat_limit = 10
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='bulk@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _post(self, body):
+        return self.client.post(
+            BULK_URL, body, content_type='application/x-ndjson',
+        )
+
+    def test_import_recipes(self):
+        '''every valid line becomes a recipe with its relations'''
+        body = ndjson(
+            sample_record(
+                title='pancakes',
+                description='fluffy',
+                tags=[{'name': 'Breakfast'}, {'name': 'Sweet'}],
+                ingredients=[{'name': 'flour'}, {'name': 'milk'}],
+            ),
+            sample_record(
+                title='omelette',
+                tags=[{'name': 'Breakfast'}],
+                ingredients=[{'name': 'egg'}, {'name': 'milk'}],
+            ),
+        )
+
+        res = self._post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['failed'], 0)
+        pancakes = models.Recipe.objects.get(id=res.data['results'][0]['id'])
+        self.assertEqual(pancakes.user, self.user)
+        self.assertEqual(pancakes.description, 'fluffy')
+        self.assertEqual(pancakes.price, Decimal('4.50'))
+        self.assertEqual(pancakes.tags.count(), 2)
+        omelette = models.Recipe.objects.get(id=res.data['results'][1]['id'])
+        self.assertEqual(
+            sorted(omelette.ingredients.values_list('name', flat=True)),
+            ['egg', 'milk'],
+        )
+        self.assertEqual(models.Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            models.Ingredients.objects.filter(user=self.user).count(), 3,
+        )
+
+    def test_reuses_existing_names(self):
+        '''names the user already has are attached, not duplicated'''
+        tag = models.Tag.objects.create(user=self.user, name='Dinner')
+
+        res = self._post(ndjson(sample_record(tags=[{'name': 'Dinner'}])))
+
+        self.assertEqual(res.data['created'], 1)
+        recipe = models.Recipe.objects.get(id=res.data['results'][0]['id'])
+        self.assertEqual(list(recipe.tags.all()), [tag])
+        self.assertEqual(models.Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_reports_invalid_rows(self):
+        '''invalid rows are reported per line and do not block the rest'''
+        body = ndjson(
+            sample_record(title='good'),
+            sample_record(time_minutes='soon'),
+            '{not json',
+            '[1, 2]',
+            sample_record(title='also good'),
+        )
+
+        res = self._post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['failed'], 3)
+        results = res.data['results']
+        self.assertEqual([r['line'] for r in results], [1, 2, 3, 4, 5])
+        self.assertIn('id', results[0])
+        self.assertIn('time_minutes', results[1]['errors'])
+        self.assertIn('non_field_errors', results[2]['errors'])
+        self.assertIn('non_field_errors', results[3]['errors'])
+        self.assertIn('id', results[4])
+        self.assertEqual(
+            models.Recipe.objects.filter(user=self.user).count(), 2,
+        )
+
+    def test_blank_lines_are_skipped(self):
+        body = '\n' + ndjson(sample_record()) + '\n\n'
+
+        res = self._post(body)
+
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(res.data['results'][0]['line'], 2)
+
+    @skipUnless(
+        connection.features.can_return_rows_from_bulk_insert,
+        'recipes are inserted one by one',
+    )
+    @patch.object(RecipeView, 'bulk_chunk_size', 3)
+    def test_queries_grow_per_chunk_not_per_row(self):
+        '''writes are batched, so query count depends on chunks only'''
+        records = [
+            sample_record(
+                title=f'recipe {i}',
+                tags=[{'name': f'tag {i % 2}'}],
+                ingredients=[{'name': f'ingredient {i}'}],
+            )
+            for i in range(9)
+        ]
+
+        with self.assertNumQueries(36):
+            res = self._post(ndjson(*records))
+
+        self.assertEqual(res.data['created'], 9)
+        self.assertEqual(models.Tag.objects.filter(user=self.user).count(), 2)
@@ -0,0 +1,211 @@
+'''
+testing the background rendering of recipe image renditions
+'''
+
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from recipe import images
+from core.testing import QueryBudgetMixin
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+# exif tags
+MAKE = 0x010F
+ORIENTATION = 0x0112
+
+
+def image_url(recipe_id):
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def jpeg(size=(400, 200), **exif_tags):
+    '''an in memory jpeg upload with the given exif tags'''
+    exif = Image.Exif()
+    for tag, value in exif_tags.items():
+        exif[int(tag)] = value
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(
+        buffer, format='JPEG', exif=exif.tobytes(),
+    )
+    buffer.name = 'upload.jpg'
+    buffer.seek(0)
+    return buffer
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, RECIPE_IMAGE_WORKERS=0)
+class ImageRenditionTests(QueryBudgetMixin, TestCase):
+    '''
+    uploads are rendered into resized copies without metadata
+    '''
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='images@example.com',
+            password='pass1234',
+        )
+        self.client.force_authenticate(user=self.user)
+        self.recipe = models.Recipe.objects.create(
+            user=self.user,
+            title='sample recipe',
+            time_minutes=5,
+            price=Decimal('1.50'),
+        )
+
+    def _upload(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                image_url(self.recipe.id), {'image': image},
+                format='multipart',
+            )
+        self.recipe.refresh_from_db()
+        return res
+
+    def _open(self, rendition, format_name='jpeg'):
+        name = self.recipe.image_renditions[rendition][format_name]
+        with default_storage.open(name, 'rb') as stored:
+            image = Image.open(stored)
+            image.load()
+        return image
+
+    def test_upload_is_pending_until_committed(self):
+        res = self.client.post(
+            image_url(self.recipe.id), {'image': jpeg()}, format='multipart',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], models.Recipe.IMAGE_PENDING)
+        self.assertEqual(res.data['image_renditions'], {})
+
+    def test_renditions_are_resized(self):
+        self._upload(jpeg(size=(400, 200)))
+
+        self.assertEqual(self.recipe.image_status, models.Recipe.IMAGE_READY)
+        self.assertEqual(self._open('thumbnail').size, (200, 100))
+        # never enlarged past the original
+        self.assertEqual(self._open('medium').size, (400, 200))
+        self.assertEqual(self._open('full').size, (400, 200))
+
+    def test_every_available_format_is_rendered(self):
+        self._upload(jpeg())
+
+        for formats in self.recipe.image_renditions.values():
+            self.assertEqual(
+                sorted(formats), sorted(images.available_formats()),
+            )
+
+    def test_metadata_is_stripped(self):
+        self._upload(jpeg(**{str(MAKE): 'Camera'}))
+
+        self.assertNotIn(MAKE, self._open('thumbnail').getexif())
+
+    def test_orientation_is_applied(self):
+        # 6: the camera was turned, rotate 90 degrees clockwise
+        self._upload(jpeg(size=(400, 200), **{str(ORIENTATION): 6}))
+
+        self.assertEqual(self._open('thumbnail').size, (100, 200))
+
+    def test_detail_exposes_rendition_urls(self):
+        self._upload(jpeg())
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.data['image_status'], models.Recipe.IMAGE_READY)
+        url = res.data['image_renditions']['thumbnail']['jpeg']
+        self.assertTrue(url.startswith('http://testserver/static/media/'))
+        self.assertTrue(url.endswith('_thumbnail.jpg'))
+
+    def test_unreadable_image_fails(self):
+        name = default_storage.save(
+            'uploads/recipe/bad.jpg', ContentFile(b'x'),
+        )
+        models.Recipe.objects.filter(pk=self.recipe.pk).update(image=name)
+
+        with self.assertLogs('recipe.images', 'ERROR'):
+            result = images.process(self.recipe.pk, name)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(result, models.Recipe.IMAGE_FAILED)
+        self.assertEqual(self.recipe.image_status, models.Recipe.IMAGE_FAILED)
+
+    def test_replaced_image_is_left_alone(self):
+        self._upload(jpeg())
+        first = self.recipe.image.name
+        self._upload(jpeg(size=(50, 50)))
+
+        images.process(self.recipe.pk, first)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self._open('full').size, (50, 50))
+
+    def test_replaced_renditions_are_deleted(self):
+        self._upload(jpeg())
+        replaced = [
+            name
+            for formats in self.recipe.image_renditions.values()
+            for name in formats.values()
+        ]
+
+        self._upload(jpeg(size=(50, 50)))
+
+        self.assertTrue(replaced)
+        for name in replaced:
+            self.assertFalse(default_storage.exists(name))
+        self.assertTrue(default_storage.exists(
+            self.recipe.image_renditions['full']['jpeg'],
+        ))
+
+    def test_deleted_recipe_is_skipped(self):
+        self._upload(jpeg())
+        recipe_id, name = self.recipe.pk, self.recipe.image.name
+        self.recipe.delete()
+
+        self.assertIsNone(images.process(recipe_id, name))
+
+    def test_pending_images_are_rendered(self):
+        '''images whose job was lost are rendered by render_images'''
+        self.client.post(
+            image_url(self.recipe.id), {'image': jpeg()}, format='multipart',
+        )
+
+        out = StringIO()
+        call_command('render_images', stdout=out)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, models.Recipe.IMAGE_READY)
+        self.assertIn('rendered 1 pending images', out.getvalue())
+
+    @override_settings(RECIPE_IMAGE_WORKERS=2)
+    def test_rendered_by_the_worker_pool(self):
+        with patch.object(images, 'get_executor') as get_executor:
+            self._upload(jpeg())
+
+        get_executor.return_value.submit.assert_called_once_with(
+            images._run, self.recipe.pk, self.recipe.image.name,
+        )
+        self.assertEqual(self.recipe.image_status, models.Recipe.IMAGE_PENDING)
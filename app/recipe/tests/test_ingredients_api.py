@@ -12,6 +12,7 @@ from rest_framework.test import APIClient
 
 from core.models import Ingredients,Recipe
 from recipe.serializers import IngredientSerializer
+from core.testing import QueryBudgetMixin
 
 
 
@@ -25,7 +26,7 @@ def create_user(email = 'test_user@gmail.com',password= 'test123'):
     '''creating user for testing'''
     return get_user_model().objects.create(email=email, password=password)
 
-class PublicIngredientApiTests(TestCase):
+class PublicIngredientApiTests(QueryBudgetMixin, TestCase):
     ''' Testing Ingredients with public user'''
 
     def setUp(self):
@@ -39,7 +40,7 @@ class PublicIngredientApiTests(TestCase):
         
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
         
-class PrivateIngredientApiTests(TestCase):
+class PrivateIngredientApiTests(QueryBudgetMixin, TestCase):
     ''' Testing Ingredients api with authorized user'''
     
     def setUp(self) :
@@ -59,7 +60,7 @@ class PrivateIngredientApiTests(TestCase):
         ingredients = Ingredients.objects.all().order_by('-name')
         serializer = IngredientSerializer(ingredients, many = True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
         
         
     def test_retrieve_limited_to_user(self):
@@ -77,9 +78,9 @@ class PrivateIngredientApiTests(TestCase):
         
         
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data),1)
-        self.assertEqual(res.data[0]['name'],ingredient.name)
-        self.assertEqual(res.data[0]['id'],ingredient.id)
+        self.assertEqual(len(res.data['results']),1)
+        self.assertEqual(res.data['results'][0]['name'],ingredient.name)
+        self.assertEqual(res.data['results'][0]['id'],ingredient.id)
         
     def test_update_ingredients(self):
         ''' test update ingredients'''
@@ -123,8 +124,8 @@ class PrivateIngredientApiTests(TestCase):
         serializer_1 = IngredientSerializer(ingredient_1)
         serializer_2 = IngredientSerializer(ingredient_2)
         
-        self.assertIn(serializer_1.data, res.data)
-        self.assertNotIn(serializer_2.data, res.data)
+        self.assertIn(serializer_1.data, res.data['results'])
+        self.assertNotIn(serializer_2.data, res.data['results'])
         
         
     def test_filter_ingredients_unique(self):
@@ -151,8 +152,27 @@ class PrivateIngredientApiTests(TestCase):
         
         res = self.client.get(INGREDIENTS_URL,{'assigned_only':1})
         
-        self.assertEqual(len(res.data),1)
+        self.assertEqual(len(res.data['results']),1)
         
     
         
-        
\ No newline at end of file
+        
+    def test_ingredient_counts(self):
+        ''' Test counts and popular ordering of ingredients'''
+        salt = Ingredients.objects.create(user = self.user, name = 'salt')
+        Ingredients.objects.create(user = self.user, name = 'pepper')
+        recipe = Recipe.objects.create(
+            user = self.user,
+            title = 'soup',
+            time_minutes = 20,
+            price = Decimal('2.5'),
+        )
+        recipe.ingredients.add(salt)
+
+        res = self.client.get(INGREDIENTS_URL, {'ordering': 'popular'})
+
+        self.assertEqual(
+            [(item['name'], item['recipe_count'])
+             for item in res.data['results']],
+            [('salt', 1), ('pepper', 0)],
+        )
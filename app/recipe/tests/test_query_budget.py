@@ -0,0 +1,222 @@
+'''
+query budget tests for the recipe apis
+'''
+
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from core.testing import QueryBudgetMixin
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+# lists read tags and ingredients from the recipe summary
+RECIPE_LIST_BUDGET = 1
+# one query for the recipe plus one per prefetched relation
+RECIPE_DETAIL_BUDGET = 3
+
+
+def detail_url(recipe_id):
+    '''return detail url for a recipe'''
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipes(user, count, related=3):
+    '''create recipes each linked to a few tags and ingredients'''
+    tags = [
+        models.Tag.objects.create(user=user, name=f'tag {i}')
+        for i in range(related)
+    ]
+    ingredients = [
+        models.Ingredients.objects.create(user=user, name=f'ingredient {i}')
+        for i in range(related)
+    ]
+    recipes = []
+    for i in range(count):
+        recipe = models.Recipe.objects.create(
+            user=user,
+            title=f'recipe {i}',
+            time_minutes=5,
+            price=Decimal('2.50'),
+            description='sample description',
+        )
+        recipe.tags.add(*tags)
+        recipe.ingredients.add(*ingredients)
+        recipes.append(recipe)
+    return recipes
+
+
+class RecipeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    '''
+    the number of queries must not grow with the number of recipes
+    '''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='budget@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_budget_with_single_recipe(self):
+        '''list with one recipe stays within budget'''
+        create_recipes(self.user, 1)
+
+        with self.assertNumQueries(RECIPE_LIST_BUDGET):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_budget_with_many_recipes(self):
+        '''list with many recipes costs the same as with one'''
+        create_recipes(self.user, 25)
+
+        with self.assertNumQueries(RECIPE_LIST_BUDGET):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 25)
+        self.assertEqual(len(res.data['results'][0]['tags']), 3)
+        self.assertEqual(len(res.data['results'][0]['ingredients']), 3)
+
+    def test_filtered_list_budget(self):
+        '''filtering by tags and ingredients keeps the budget'''
+        recipes = create_recipes(self.user, 10)
+        tag = recipes[0].tags.first()
+        ingredient = recipes[0].ingredients.first()
+
+        with self.assertNumQueries(RECIPE_LIST_BUDGET):
+            res = self.client.get(RECIPES_URL, {
+                'tags': f'{tag.id}',
+                'ingredients': f'{ingredient.id}',
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 10)
+
+    def test_detail_budget(self):
+        '''detail view prefetches the nested relations'''
+        recipe = create_recipes(self.user, 1, related=10)[0]
+
+        with self.assertNumQueries(RECIPE_DETAIL_BUDGET):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 10)
+
+    def _count_create_queries(self, title, names):
+        '''number of queries to create a recipe with the given names'''
+        payload = {
+            'title': title,
+            'time_minutes': 10,
+            'price': Decimal('3.00'),
+            'tags': [{'name': name} for name in names],
+            'ingredients': [{'name': name} for name in names],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPES_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return len(queries)
+
+    def test_create_cost_independent_of_nested_items(self):
+        '''creating with 30 new ingredients costs the same as with 3'''
+        few = self._count_create_queries(
+            'few', [f'few {i}' for i in range(3)],
+        )
+        many = self._count_create_queries(
+            'many', [f'many {i}' for i in range(30)],
+        )
+
+        self.assertEqual(few, many)
+        recipe = models.Recipe.objects.get(title='many')
+        self.assertEqual(recipe.ingredients.count(), 30)
+        self.assertEqual(recipe.tags.count(), 30)
+
+    def test_create_reuses_existing_names(self):
+        '''existing names are reused and duplicates collapse'''
+        existing = models.Tag.objects.create(user=self.user, name='Dinner')
+        payload = {
+            'title': 'pasta',
+            'time_minutes': 10,
+            'price': Decimal('3.00'),
+            'tags': [{'name': 'Dinner'}, {'name': 'Quick'}, {'name': 'Quick'}],
+        }
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = models.Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertIn(existing, recipe.tags.all())
+        self.assertEqual(
+            models.Tag.objects.filter(user=self.user, name='Quick').count(), 1,
+        )
+
+    def _link_writes(self, payload, recipe):
+        '''statements writing recipe links during a PUT of payload'''
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.put(
+                detail_url(recipe.id), payload, format='json',
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith(('INSERT', 'DELETE'))
+            and ('core_recipe_tags' in query['sql']
+                 or 'core_recipe_ingredients' in query['sql'])
+        ]
+
+    def _put_payload(self, tags, ingredients):
+        return {
+            'title': 'recipe 0',
+            'time_minutes': 5,
+            'price': '2.50',
+            'tags': [{'name': name} for name in tags],
+            'ingredients': [{'name': name} for name in ingredients],
+        }
+
+    def test_unchanged_put_writes_no_links(self):
+        '''saving the same recipe again leaves its links alone'''
+        recipe = create_recipes(self.user, 1)[0]
+        payload = self._put_payload(
+            [f'tag {i}' for i in range(3)],
+            [f'ingredient {i}' for i in range(3)],
+        )
+        link_ids = set(
+            models.Recipe.tags.through.objects.values_list('id', flat=True)
+        )
+
+        self.assertEqual(self._link_writes(payload, recipe), [])
+        self.assertEqual(link_ids, set(
+            models.Recipe.tags.through.objects.values_list('id', flat=True)
+        ))
+
+    def test_put_writes_only_the_difference(self):
+        '''one tag swapped is one delete and one insert'''
+        recipe = create_recipes(self.user, 1)[0]
+        payload = self._put_payload(
+            ['tag 0', 'tag 1', 'tag 9'],
+            [f'ingredient {i}' for i in range(3)],
+        )
+
+        writes = self._link_writes(payload, recipe)
+
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(
+            sorted(recipe.tags.values_list('name', flat=True)),
+            ['tag 0', 'tag 1', 'tag 9'],
+        )
+        recipe.refresh_from_db()
+        self.assertEqual(
+            sorted(tag['name'] for tag in recipe.summary['tags']),
+            ['tag 0', 'tag 1', 'tag 9'],
+        )
@@ -18,6 +18,7 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from core import models
 from recipe import serializers
+from core.testing import QueryBudgetMixin
 
 
 RECIPES_URL = reverse('recipe:recipe-list')
@@ -54,7 +55,7 @@ def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
-class PublicRecipeAPITests(TestCase):
+class PublicRecipeAPITests(QueryBudgetMixin, TestCase):
     '''
     Test creating recipe with public user
     
@@ -72,7 +73,7 @@ class PublicRecipeAPITests(TestCase):
         
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
         
-class PrivateRecipeAPITests(TestCase):
+class PrivateRecipeAPITests(QueryBudgetMixin, TestCase):
     
     '''
     Test API with authorized user
@@ -92,7 +93,7 @@ class PrivateRecipeAPITests(TestCase):
         recipes = models.Recipe.objects.all().order_by('-id')
         serializer = serializers.RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
         
     def test_retrieve_recipes_limited_to_users(self):
         '''
@@ -113,7 +114,7 @@ class PrivateRecipeAPITests(TestCase):
         serializer = serializers.RecipeSerializer(recipes, many=True)
         
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
         
     def test_get_detail_recipe(self):
         '''
@@ -379,9 +380,9 @@ class PrivateRecipeAPITests(TestCase):
         serializer_2 = serializers.RecipeSerializer(french_fries_recipe)
         serializer_3 = serializers.RecipeSerializer(fish_recipe)
         
-        self.assertIn(serializer_1.data, res.data)
-        self.assertIn(serializer_2.data, res.data)
-        self.assertNotIn(serializer_3.data, res.data)
+        self.assertIn(serializer_1.data, res.data['results'])
+        self.assertIn(serializer_2.data, res.data['results'])
+        self.assertNotIn(serializer_3.data, res.data['results'])
         
     def test_filter_by_ingredients(self):
         ''' Testing recipes by ingredients tags'''
@@ -403,11 +404,11 @@ class PrivateRecipeAPITests(TestCase):
         
         res = self.client.get(RECIPES_URL, payload)
         
-        self.assertIn(serializer_1.data, res.data)
-        self.assertIn(serializer_2.data, res.data)
-        self.assertNotIn(serializer_3.data, res.data)
+        self.assertIn(serializer_1.data, res.data['results'])
+        self.assertIn(serializer_2.data, res.data['results'])
+        self.assertNotIn(serializer_3.data, res.data['results'])
         
-class ImageUploadTests(TestCase):
+class ImageUploadTests(QueryBudgetMixin, TestCase):
     ''' Testing upload images'''
     
     def setUp(self):
@@ -0,0 +1,129 @@
+'''
+testing the streaming recipe export
+'''
+
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from core.testing import QueryBudgetMixin
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def create_recipe(user, title='sample recipe', **params):
+    return models.Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=5,
+        price=Decimal('1.50'),
+        **params,
+    )
+
+
+class PublicRecipeExportTests(TestCase):
+
+    def test_auth_required(self):
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateRecipeExportTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='export@example.com',
+            password='pass1234',
+        )
+        self.client.force_authenticate(user=self.user)
+        self.recipe = create_recipe(
+            self.user, 'curry', description='hot, "spicy"\nand red',
+        )
+        self.recipe.tags.add(
+            models.Tag.objects.create(user=self.user, name='Dinner'),
+            models.Tag.objects.create(user=self.user, name='Vegan'),
+        )
+        self.recipe.ingredients.add(
+            models.Ingredients.objects.create(user=self.user, name='Rice'),
+        )
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='pass1234',
+        )
+        create_recipe(other, 'not mine')
+
+    def _export(self, **params):
+        res = self.client.get(EXPORT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        return res, b''.join(res.streaming_content).decode('utf-8')
+
+    def test_ndjson_by_default(self):
+        res, body = self._export()
+
+        self.assertEqual(
+            res['Content-Type'], 'application/x-ndjson; charset=utf-8',
+        )
+        self.assertIn('recipes.ndjson', res['Content-Disposition'])
+        self.assertEqual([json.loads(line) for line in body.splitlines()], [{
+            'id': self.recipe.id,
+            'title': 'curry',
+            'time_minutes': 5,
+            'price': '1.50',
+            'link': '',
+            'description': 'hot, "spicy"\nand red',
+            'tags': ['Dinner', 'Vegan'],
+            'ingredients': ['Rice'],
+        }])
+
+    def test_csv(self):
+        res, body = self._export(format='csv')
+
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['description'], 'hot, "spicy"\nand red')
+        self.assertEqual(rows[0]['tags'], 'Dinner, Vegan')
+        self.assertEqual(rows[0]['price'], '1.50')
+
+    def test_list_filters_apply(self):
+        create_recipe(self.user, 'toast')
+
+        _, body = self._export(tags=str(self.recipe.tags.first().id))
+
+        self.assertEqual(
+            [json.loads(line)['title'] for line in body.splitlines()],
+            ['curry'],
+        )
+
+    def test_one_query_in_chunks(self):
+        for number in range(30):
+            create_recipe(self.user, f'recipe {number}')
+
+        with CaptureQueriesContext(connection) as queries:
+            _, body = self._export()
+
+        self.assertEqual(len(body.splitlines()), 31)
+        recipe_queries = [
+            query for query in queries.captured_queries
+            if 'core_recipe' in query['sql']
+        ]
+        self.assertEqual(len(recipe_queries), 1)
+
+    def test_unknown_format(self):
+        res = self.client.get(EXPORT_URL, {'format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
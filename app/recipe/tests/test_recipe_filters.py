@@ -0,0 +1,179 @@
+'''
+testing tag and ingredient filtering of recipes
+'''
+
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from recipe import filters
+from core.testing import QueryBudgetMixin
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+# added by migration 0009
+TAG_INDEX = 'core_recipe_tags_tag_recipe_idx'
+INGREDIENT_INDEX = 'core_recipe_ingredients_ingredient_recipe_idx'
+
+
+def create_recipe(user, title='sample recipe'):
+    return models.Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=5,
+        price=Decimal('1.50'),
+    )
+
+
+class RecipeFilterAPITests(QueryBudgetMixin, TestCase):
+    '''
+    ?tags=, ?ingredients= and ?match=
+    '''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='filter@example.com',
+            password='pass1234',
+        )
+        self.client.force_authenticate(user=self.user)
+        self.veg = models.Tag.objects.create(user=self.user, name='veg')
+        self.quick = models.Tag.objects.create(user=self.user, name='quick')
+        self.both = create_recipe(self.user, 'salad')
+        self.both.tags.add(self.veg, self.quick)
+        self.veg_only = create_recipe(self.user, 'stew')
+        self.veg_only.tags.add(self.veg)
+        self.untagged = create_recipe(self.user, 'toast')
+
+    def _titles(self, **params):
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_any_returns_each_recipe_once(self):
+        titles = self._titles(tags=f'{self.veg.id},{self.quick.id}')
+
+        self.assertEqual(titles, ['stew', 'salad'])
+
+    def test_all(self):
+        titles = self._titles(
+            tags=f'{self.veg.id},{self.quick.id}', match='all',
+        )
+
+        self.assertEqual(titles, ['salad'])
+
+    def test_all_combines_tags_and_ingredients(self):
+        salt = models.Ingredients.objects.create(user=self.user, name='salt')
+        self.veg_only.ingredients.add(salt)
+
+        titles = self._titles(
+            tags=f'{self.veg.id}', ingredients=f'{salt.id}', match='all',
+        )
+
+        self.assertEqual(titles, ['stew'])
+
+    def test_invalid_match(self):
+        res = self.client.get(RECIPES_URL, {'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('match', res.data)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'postgres query plans')
+class RecipeFilterPlanTests(QueryBudgetMixin, TransactionTestCase):
+    '''
+    the filters are served by the (related id, recipe_id) indexes of
+    migration 0009, never by scanning a table
+
+    a transaction test case, since VACUUM cannot run in a transaction:
+    the planner only prices index only scans low once VACUUM has set
+    the visibility map, as autovacuum does on a live database
+    '''
+
+    def setUp(self):
+        users = [
+            get_user_model().objects.create_user(
+                email=f'plan{i}@example.com', password='pass1234',
+            )
+            for i in range(5)
+        ]
+        self.user = users[0]
+        for user in users:
+            tags = models.Tag.objects.bulk_get_or_create(
+                user, [f'tag {i}' for i in range(20)],
+            )
+            ingredients = models.Ingredients.objects.bulk_get_or_create(
+                user, [f'ingredient {i}' for i in range(20)],
+            )
+            recipes = models.Recipe.objects.bulk_create(
+                models.Recipe(
+                    user=user,
+                    title=f'recipe {i}',
+                    time_minutes=5,
+                    price=Decimal('1.50'),
+                )
+                for i in range(400)
+            )
+            models.Recipe.tags.through.objects.bulk_create(
+                models.Recipe.tags.through(
+                    recipe_id=recipe.id, tag_id=tags[(i + n) % 20].id,
+                )
+                for i, recipe in enumerate(recipes)
+                for n in range(3)
+            )
+            models.Recipe.ingredients.through.objects.bulk_create(
+                models.Recipe.ingredients.through(
+                    recipe_id=recipe.id,
+                    ingredients_id=ingredients[(i + n) % 20].id,
+                )
+                for i, recipe in enumerate(recipes)
+                for n in range(3)
+            )
+        self.tag_ids = list(
+            models.Tag.objects.filter(user=self.user)
+            .values_list('id', flat=True)[:2]
+        )
+        self.ingredient_ids = list(
+            models.Ingredients.objects.filter(user=self.user)
+            .values_list('id', flat=True)[:2]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM ANALYZE')
+
+    def _plan(self, match):
+        queryset = models.Recipe.objects.filter(user=self.user)
+        queryset = filters.filter_related(
+            queryset, 'tags', self.tag_ids, match,
+        )
+        queryset = filters.filter_related(
+            queryset, 'ingredients', self.ingredient_ids, match,
+        )
+        return queryset.order_by('-id')[:100].explain()
+
+    def test_any_uses_indexes(self):
+        plan = self._plan(filters.ANY)
+
+        self.assertNotIn('Seq Scan', plan)
+        self.assertIn(f'Index Only Scan using {TAG_INDEX}', plan)
+        self.assertIn(f'Index Only Scan using {INGREDIENT_INDEX}', plan)
+
+    def test_all_uses_indexes(self):
+        '''
+        one id is looked up in a 0009 index, the recipes found probe the
+        (recipe_id, related id) unique indexes for the others
+        '''
+        plan = self._plan(filters.ALL)
+
+        self.assertNotIn('Seq Scan', plan)
+        self.assertRegex(
+            plan, f'Index Only Scan (Backward )?using '
+                  f'({TAG_INDEX}|{INGREDIENT_INDEX})',
+        )
@@ -0,0 +1,187 @@
+'''
+testing recipe search
+'''
+
+import json
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from core import search
+from core.testing import QueryBudgetMixin
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def create_recipe(user, title='sample recipe', **params):
+    return models.Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=5,
+        price=Decimal('1.50'),
+        **params,
+    )
+
+
+class RecipeSearchTests(QueryBudgetMixin, TestCase):
+    '''
+    ?q= on every database
+    '''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='search@example.com',
+            password='pass1234',
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _titles(self, q, **params):
+        res = self.client.get(RECIPES_URL, {'q': q, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_title(self):
+        create_recipe(self.user, 'Lemon Cake')
+        create_recipe(self.user, 'Tomato Soup')
+
+        self.assertEqual(self._titles('cake'), ['Lemon Cake'])
+
+    def test_description(self):
+        create_recipe(self.user, 'Pasta', description='finish with basil')
+        create_recipe(self.user, 'Rice')
+
+        self.assertEqual(self._titles('basil'), ['Pasta'])
+
+    def test_tag_and_ingredient_names(self):
+        curry = create_recipe(self.user, 'Curry')
+        curry.tags.add(models.Tag.objects.create(user=self.user, name='spicy'))
+        stew = create_recipe(self.user, 'Stew')
+        stew.ingredients.add(
+            models.Ingredients.objects.create(user=self.user, name='lentils'),
+        )
+
+        self.assertEqual(self._titles('spicy'), ['Curry'])
+        self.assertEqual(self._titles('lentils'), ['Stew'])
+
+    def test_every_word_must_match(self):
+        create_recipe(self.user, 'Chocolate Cake')
+        create_recipe(self.user, 'Lemon Cake')
+
+        self.assertEqual(self._titles('lemon cake'), ['Lemon Cake'])
+
+    def test_other_users_recipes_not_found(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='pass1234',
+        )
+        create_recipe(other, 'Cake')
+
+        self.assertEqual(self._titles('cake'), [])
+
+    def test_combines_with_tag_filter(self):
+        tag = models.Tag.objects.create(user=self.user, name='dessert')
+        create_recipe(self.user, 'Cake').tags.add(tag)
+        create_recipe(self.user, 'Fish Cake')
+
+        self.assertEqual(self._titles('cake', tags=f'{tag.id}'), ['Cake'])
+
+
+@skipUnless(search.is_supported(), 'postgres full text search')
+class RecipeSearchVectorTests(QueryBudgetMixin, TestCase):
+    '''
+    the stored vectors follow the recipes and rank the results
+    '''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='vector@example.com',
+            password='pass1234',
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _titles(self, q, **params):
+        res = self.client.get(RECIPES_URL, {'q': q, **params})
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_title_outranks_description(self):
+        create_recipe(self.user, 'Rice', description='served with curry')
+        create_recipe(self.user, 'Curry')
+
+        self.assertEqual(self._titles('curry'), ['Curry', 'Rice'])
+
+    def test_stemming(self):
+        create_recipe(self.user, 'Baked Potatoes')
+
+        self.assertEqual(self._titles('potato bake'), ['Baked Potatoes'])
+
+    def test_title_update_reindexes(self):
+        recipe = create_recipe(self.user, 'Soup')
+
+        recipe.title = 'Noodles'
+        recipe.save()
+
+        self.assertEqual(self._titles('noodles'), ['Noodles'])
+        self.assertEqual(self._titles('soup'), [])
+
+    def test_tag_rename_reindexes(self):
+        tag = models.Tag.objects.create(user=self.user, name='mild')
+        create_recipe(self.user, 'Curry').tags.add(tag)
+
+        tag.name = 'spicy'
+        tag.save()
+
+        self.assertEqual(self._titles('spicy'), ['Curry'])
+
+    def test_tag_delete_reindexes(self):
+        tag = models.Tag.objects.create(user=self.user, name='spicy')
+        create_recipe(self.user, 'Curry').tags.add(tag)
+
+        tag.delete()
+
+        self.assertEqual(self._titles('spicy'), [])
+
+    def test_reverse_clear_reindexes(self):
+        ingredient = models.Ingredients.objects.create(
+            user=self.user, name='lentils',
+        )
+        create_recipe(self.user, 'Stew').ingredients.add(ingredient)
+
+        ingredient.recipe_set.clear()
+
+        self.assertEqual(self._titles('lentils'), [])
+
+    def test_bulk_import_is_searchable(self):
+        self.client.post(
+            reverse('recipe:recipe-bulk'),
+            json.dumps({
+                'title': 'Imported Pie',
+                'time_minutes': 1,
+                'price': '1.00',
+                'tags': [{'name': 'baking'}],
+            }),
+            content_type='application/x-ndjson',
+        )
+
+        self.assertEqual(self._titles('baking'), ['Imported Pie'])
+
+    def test_ranked_pages(self):
+        '''the cursor carries the rank, pages neither skip nor repeat'''
+        for i in range(5):
+            create_recipe(self.user, f'Curry {i}', description='curry ' * i)
+
+        res = self.client.get(RECIPES_URL, {'q': 'curry', 'page_size': 2})
+        titles = [recipe['title'] for recipe in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            titles.extend(recipe['title'] for recipe in res.data['results'])
+
+        self.assertEqual(titles, self._titles('curry'))
+        self.assertEqual(len(set(titles)), 5)
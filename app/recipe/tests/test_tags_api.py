@@ -14,6 +14,7 @@ from rest_framework.test import APIClient
 
 from core.models import Tag,Recipe
 from recipe.serializers import TagSerializer
+from core.testing import QueryBudgetMixin
 
 
 
@@ -30,7 +31,7 @@ def create_user(email = 'test@example.com', password = 'test123'):
     return get_user_model().objects.create_user(email = email, password = password)
 
 
-class PulicUserAPITests(TestCase):
+class PulicUserAPITests(QueryBudgetMixin, TestCase):
     '''
     Testing unauthenticate user
     '''
@@ -46,7 +47,7 @@ class PulicUserAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
         
         
-class PrivateTagsAPITests(TestCase):
+class PrivateTagsAPITests(QueryBudgetMixin, TestCase):
     
     ''' Tests for authorized users'''
     
@@ -67,7 +68,7 @@ class PrivateTagsAPITests(TestCase):
         serializer = TagSerializer(tags, many =True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         
-        self.assertEqual(res.data,serializer.data)
+        self.assertEqual(res.data['results'],serializer.data)
         
     def test_retrieve_limited_tags(self):
         '''
@@ -83,7 +84,7 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.get(TAGS_URL)
         
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data),1)
+        self.assertEqual(len(res.data['results']),1)
         
     def test_update_tag(self):
         ''' updating perticular tag'''
@@ -100,7 +101,18 @@ class PrivateTagsAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         tag.refresh_from_db()
         self.assertEqual(tag.name,payload['name'])
-        
+
+    def test_update_tag_to_existing_name(self):
+        ''' renaming onto another tag of the user is rejected'''
+        Tag.objects.create(user = self.user, name ='Burgers')
+        tag = Tag.objects.create(user = self.user, name ='Pizzas')
+
+        res = self.client.patch(detail_url(tag.id), {'name':'Burgers'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name,'Pizzas')
+
     def test_delete_tag(self):
         ''' Self delete tag'''
         tag = Tag.objects.create(user= self.user, name="Pancake")
@@ -132,8 +144,8 @@ class PrivateTagsAPITests(TestCase):
         serializer_1 = TagSerializer(tag_1)
         serializer_2 = TagSerializer(tag_2)
         
-        self.assertIn(serializer_1.data, res.data)
-        self.assertNotIn(serializer_2.data, res.data)
+        self.assertIn(serializer_1.data, res.data['results'])
+        self.assertNotIn(serializer_2.data, res.data['results'])
         
         
     def test_filter_tags_unique(self):
@@ -160,7 +172,81 @@ class PrivateTagsAPITests(TestCase):
         
         res = self.client.get(TAGS_URL,{'assigned_only':1})
         
-        self.assertEqual(len(res.data),1)
+        self.assertEqual(len(res.data['results']),1)
+        
         
         
-        
\ No newline at end of file
+    def _recipe(self, title, *tags):
+        recipe = Recipe.objects.create(
+            user = self.user,
+            title = title,
+            time_minutes = 10,
+            price = Decimal('1.2'),
+        )
+        recipe.tags.add(*tags)
+        return recipe
+
+    def test_tag_counts(self):
+        ''' Test counting the recipes of each tag in one query'''
+        breakfast = Tag.objects.create(user = self.user, name ='breakfast')
+        dinner = Tag.objects.create(user = self.user, name ='dinner')
+        Tag.objects.create(user = self.user, name ='unused')
+        self._recipe('eggs', breakfast, dinner)
+        self._recipe('toast', breakfast)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL, {'counts': 1})
+
+        tags = {tag['name']: tag for tag in res.data['results']}
+        self.assertEqual(
+            {name: tag['recipe_count'] for name, tag in tags.items()},
+            {'unused': 0, 'dinner': 1, 'breakfast': 2},
+        )
+        self.assertIsNone(tags['unused']['last_used'])
+        self.assertGreater(
+            tags['breakfast']['last_used'], tags['dinner']['last_used'],
+        )
+
+    def test_popular_ordering_pages(self):
+        ''' Test most used tags come first, page after page'''
+        tags = [
+            Tag.objects.create(user = self.user, name = name)
+            for name in ('a', 'b', 'c', 'd')
+        ]
+        self._recipe('one', tags[2], tags[3], tags[1])
+        self._recipe('two', tags[2], tags[3])
+        self._recipe('three', tags[2])
+
+        names = []
+        url, params = TAGS_URL, {'ordering': 'popular', 'page_size': 1}
+        while url:
+            res = self.client.get(url, params)
+            names += [tag['name'] for tag in res.data['results']]
+            url, params = res.data['next'], None
+
+        self.assertEqual(names, ['c', 'd', 'b', 'a'])
+
+    def test_assigned_only_with_counts(self):
+        ''' Test combining assigned_only and counts'''
+        breakfast = Tag.objects.create(user = self.user, name ='breakfast')
+        Tag.objects.create(user = self.user, name ='unused')
+        self._recipe('toast', breakfast)
+        self._recipe('jam', breakfast)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1, 'counts': 1})
+
+        self.assertEqual(
+            [
+                (tag['name'], tag['recipe_count'])
+                for tag in res.data['results']
+            ],
+            [('breakfast', 2)],
+        )
+
+    def test_malformed_flags(self):
+        ''' Test flags that are not numbers are rejected'''
+        for params in ({'counts': 'yes'}, {'counts': ''},
+                       {'assigned_only': 'x'}):
+            res = self.client.get(TAGS_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
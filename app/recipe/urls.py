@@ -4,6 +4,7 @@ urls for recipe
 
 from rest_framework.routers import DefaultRouter
 
+from core.async_views import async_read_patterns
 from recipe import views
 
 from django.urls import (
@@ -18,5 +19,5 @@ router.register('ingredients',views.IngredientView)
 app_name ='recipe'
 
 urlpatterns = [
-    path('',include(router.urls)),
+    path('',include(async_read_patterns(router.urls))),
 ]
\ No newline at end of file
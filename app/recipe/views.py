@@ -3,6 +3,9 @@ view for recipe
 '''
 
 import enum
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.http import StreamingHttpResponse
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -12,12 +15,28 @@ from drf_spectacular.utils import (
 from rest_framework import viewsets,mixins,status
 
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 from core import models
-from recipe import serializers
+from core import cache as api_cache
+from core import search
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+)
+from core.mixins import (
+    CachedListMixin,
+    ConditionalGetMixin,
+    PrefetchRelatedMixin,
+    SPARSE_FIELDS_PARAMETERS,
+    SparseFieldsMixin,
+)
+from core.parsers import NDJSONParser
+from core.renderers import CSVRenderer, NDJSONRenderer
+from recipe import exports, filters, images, serializers
+from recipe.bulk import RecipeBatchUpdater, RecipeImporter
 
 
 
@@ -34,19 +53,53 @@ from recipe import serializers
                 'ingredients',
                 OpenApiTypes.STR,
                 description = 'Comma separated list of ingredient ids'
-            )
+            ),
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                description = 'Search titles, descriptions, tags and '
+                              'ingredients, best matches first'
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR,
+                enum = filters.MATCH_MODES,
+                description = 'Return recipes matching any (default) or '
+                              'all of the given tags and ingredients'
+            ),
+            *SPARSE_FIELDS_PARAMETERS,
         ],
     ),
+    retrieve = extend_schema(parameters = SPARSE_FIELDS_PARAMETERS),
 )
-class RecipeView(viewsets.ModelViewSet):
+class RecipeView(
+    SparseFieldsMixin,
+    PrefetchRelatedMixin,
+    ConditionalGetMixin,
+    CachedListMixin,
+    viewsets.ModelViewSet,
+    ):
     '''
     View for manage recipe
     '''
     
     serializer_class = serializers.RecipeDetailSerializer
-    queryset = models.Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    queryset = models.Recipe.objects.defer('search_vector')
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [IsAuthenticated]
+    cache_namespace = api_cache.RECIPES
+    cache_query_params = (
+        'tags', 'ingredients', 'match', 'q', 'cursor', 'page_size',
+        'fields', 'omit',
+    )
+    cache_text_params = ('q',)
+    etag_query_params = ('fields', 'omit')
+    bulk_chunk_size = 500
+    batch_max_size = 500
+    export_chunk_size = 2000
     
     def _params_to_int(self,qs):
         '''convert list of strings to int'''
@@ -54,25 +107,25 @@ class RecipeView(viewsets.ModelViewSet):
     
     def get_queryset(self):
         '''Retrieve recipe for authentication'''
-        tags = self.request.query_params.get('tags')   
-        ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
-        if tags:
-            tag_ids = self._params_to_int(tags)
-            queryset = queryset.filter(
-                tags__id__in =tag_ids
-            )     
-        if ingredients:
-            ingredient_ids = self._params_to_int(ingredients)
-            queryset = queryset.filter(ingredients__id__in = ingredient_ids)
-        return queryset.filter(user=self.request.user).order_by('-id').distinct()
+        queryset = self.queryset.filter(user=self.request.user)
+        match = filters.get_match(self.request.query_params)
+        for param in ('tags', 'ingredients'):
+            value = self.request.query_params.get(param)
+            if value:
+                queryset = filters.filter_related(
+                    queryset, param, self._params_to_int(value), match,
+                )
+        text = self.request.query_params.get('q', '').strip()
+        if text:
+            return search.search(queryset, text)
+        return queryset.order_by('-id')
     
     def get_serializer_class(self):
         '''
         change serializer depending on the endpoint
         '''
         if self.action == 'list':
-            return serializers.RecipeSerializer
+            return serializers.RecipeSummarySerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
         return self.serializer_class
@@ -88,76 +141,191 @@ class RecipeView(viewsets.ModelViewSet):
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            replaced = recipe.image_renditions
+            recipe = serializer.save(
+                image_status=models.Recipe.IMAGE_PENDING,
+                image_renditions={},
+            )
+            transaction.on_commit(
+                lambda: images.delete_renditions(replaced),
+            )
+            images.schedule(recipe)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
 
-@extend_schema_view(
-    list = extend_schema(
-        parameters = [
+    @extend_schema(request=OpenApiTypes.STR, responses=OpenApiTypes.OBJECT)
+    @action(
+        methods=['POST'],
+        detail=False,
+        url_path='bulk',
+        parser_classes=[NDJSONParser],
+    )
+    def bulk(self, request):
+        """Import recipes from a newline delimited JSON body."""
+        importer = RecipeImporter(request, chunk_size=self.bulk_chunk_size)
+        results = importer.run(request.data)
+        created = sum('id' in result for result in results)
+
+        return Response({
+            'created': created,
+            'failed': len(results) - created,
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+    @extend_schema(request=OpenApiTypes.OBJECT, responses=OpenApiTypes.OBJECT)
+    @action(methods=['PATCH'], detail=False, url_path='batch')
+    def batch(self, request):
+        """Apply a list of partial updates, each with a recipe id."""
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'non_field_errors': [
+                'Expected a non empty list of updates.',
+            ]})
+        if len(items) > self.batch_max_size:
+            raise ValidationError({'non_field_errors': [
+                f'At most {self.batch_max_size} updates per batch.',
+            ]})
+        results, applied = RecipeBatchUpdater(request).run(items)
+        failed = sum('errors' in result for result in results)
+
+        return Response({
+            'updated': len(results) if applied else 0,
+            'failed': failed,
+            'results': results,
+        }, status=(
+            status.HTTP_200_OK if applied else status.HTTP_400_BAD_REQUEST
+        ))
+
+    @extend_schema(
+        parameters=[
             OpenApiParameter(
-                'assigned_only',
-                OpenApiTypes.INT,
-                description ='filter by items assigned to recipe'
+                'format',
+                OpenApiTypes.STR,
+                enum=[NDJSONRenderer.format, CSVRenderer.format],
+                description='Export format, ndjson by default',
             ),
-        ]
-    ),
-)
-class TageView(
+        ],
+        responses=OpenApiTypes.STR,
+    )
+    @action(
+        methods=['GET'],
+        detail=False,
+        url_path='export',
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """Stream every recipe matching the list filters."""
+        renderer = request.accepted_renderer
+        rows = exports.rows(
+            self.get_queryset(), chunk_size=self.export_chunk_size,
+        )
+        response = StreamingHttpResponse(
+            renderer.stream(rows, exports.FIELDS),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{renderer.format}"'
+        )
+        return response
+    
+
+class BaseRecipeAttrView(
+    CachedListMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet
     ):
-    ''' views for tags'''
-    serializer_class = serializers.TagSerializer
-    queryset = models.Tag.objects.all()
-    authentication_classes =[TokenAuthentication]
+    ''' base view for the items linked to recipes'''
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [IsAuthenticated]
-    
+    cache_namespace = api_cache.RECIPES
+    cache_query_params = (
+        'assigned_only', 'counts', 'ordering', 'cursor', 'page_size',
+    )
+    # Recipe relation holding the items
+    recipe_relation = None
+    usage_serializer_class = None
+
+    def _flag(self, name):
+        try:
+            return bool(int(self.request.query_params.get(name, 0)))
+        except ValueError:
+            raise ValidationError({name: 'Expected 0 or 1'})
+
+    def _popular(self):
+        return self.request.query_params.get('ordering') == 'popular'
+
+    def _with_usage(self):
+        return self.action == 'list' and (
+            self._flag('counts') or self._popular()
+        )
+
     def get_queryset(self):
         ''' filter for current user'''
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only',0))
-        )
-        queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
-        return queryset.filter(user = self.request.user).order_by('-name').distinct()
-    
-    
-@extend_schema_view(
-    list = extend_schema(
-        parameters = [
-            OpenApiParameter(
-                'assigned_only',
-                OpenApiTypes.INT,
-                description ='filter by items assigned to recipe'
-            ),
-        ]
+        queryset = self.queryset.filter(user = self.request.user)
+        if self._flag('assigned_only'):
+            field = models.Recipe._meta.get_field(self.recipe_relation)
+            # a semi join, no DISTINCT over the links needed
+            queryset = queryset.filter(Exists(
+                field.remote_field.through.objects.filter(**{
+                    field.m2m_reverse_field_name(): OuterRef('pk'),
+                })
+            ))
+        if self._popular():
+            # counters kept by core.signals, no links are read
+            return queryset.order_by('-recipe_count', 'name', 'id')
+        return queryset.order_by('-name', '-id')
+
+    def get_serializer_class(self):
+        if self._with_usage():
+            return self.usage_serializer_class
+        return self.serializer_class
+
+
+ATTR_LIST_PARAMETERS = [
+    OpenApiParameter(
+        'assigned_only',
+        OpenApiTypes.INT,
+        description ='filter by items assigned to recipe'
     ),
-)    
-class IngredientView(
-    mixins.DestroyModelMixin,
-    mixins.UpdateModelMixin,
-    mixins.ListModelMixin,
-    viewsets.GenericViewSet
-    ):
+    OpenApiParameter(
+        'counts',
+        OpenApiTypes.INT,
+        description ='add the number of recipes using each item and when '
+                     'one of them last changed'
+    ),
+    OpenApiParameter(
+        'ordering',
+        OpenApiTypes.STR,
+        enum = ['popular'],
+        description ='popular lists the most used items first, with '
+                     'their counts'
+    ),
+]
+
+
+@extend_schema_view(
+    list = extend_schema(parameters = ATTR_LIST_PARAMETERS),
+)
+class TageView(BaseRecipeAttrView):
+    ''' views for tags'''
+    serializer_class = serializers.TagSerializer
+    usage_serializer_class = serializers.TagUsageSerializer
+    queryset = models.Tag.objects.all()
+    recipe_relation = 'tags'
+
+
+@extend_schema_view(
+    list = extend_schema(parameters = ATTR_LIST_PARAMETERS),
+)
+class IngredientView(BaseRecipeAttrView):
     ''' views for Ingredients'''
     serializer_class = serializers.IngredientSerializer
+    usage_serializer_class = serializers.IngredientUsageSerializer
     queryset = models.Ingredients.objects.all()
-    authentication_classes =[TokenAuthentication]
-    permission_classes = [IsAuthenticated]
-    
-    def get_queryset(self):
-        ''' filter for current user'''
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only',0))
-        )
-        queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
-        return queryset.filter(user = self.request.user).order_by('-name').distinct()
-    
\ No newline at end of file
+    recipe_relation = 'ingredients'
@@ -0,0 +1,63 @@
+'''
+guards keeping repeated logins off the password hasher
+
+a client address may try an email LOGIN_THROTTLE_RATE times, and an
+email and password pair that just failed is refused again without
+hashing for LOGIN_FAILURE_CACHE_TIMEOUT seconds. The stored hash and
+is_active are part of that key, so a password change or reactivation
+lets the next attempt through
+'''
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    '''token requests per client address and email'''
+    scope = 'login'
+
+    def get_rate(self):
+        return getattr(settings, 'LOGIN_THROTTLE_RATE', None)
+
+    def get_cache_key(self, request, view):
+        # a body that is not an object is keyed on the address alone
+        data = request.data if isinstance(request.data, dict) else {}
+        email = str(data.get('email', '')).strip().lower()
+        digest = salted_hmac(self.scope, email).hexdigest()
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': f'{self.get_ident(request)}:{digest}',
+        }
+
+
+def _failure_key(email, password):
+    # one cheap query next to the hashing it may save
+    stored = get_user_model().objects.filter(email=email).values_list(
+        'password', 'is_active',
+    ).first()
+    digest = salted_hmac(
+        'user.login.failure', f'{email}\0{password}\0{stored}',
+    ).hexdigest()
+    return f'login-failure:{digest}'
+
+
+def check_failure(email, password):
+    '''
+    (known_failure, key): whether the pair failed recently, and the key
+    to pass to remember_failure when it fails now
+    '''
+    timeout = getattr(settings, 'LOGIN_FAILURE_CACHE_TIMEOUT', 0)
+    if not timeout:
+        return False, None
+    key = _failure_key(email, password)
+    return bool(cache.get(key)), key
+
+
+def remember_failure(key):
+    if key is not None:
+        cache.set(
+            key, True, getattr(settings, 'LOGIN_FAILURE_CACHE_TIMEOUT', 0),
+        )
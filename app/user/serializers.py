@@ -7,6 +7,15 @@ from django.utils.translation import gettext_lazy as translate
 
 from rest_framework import serializers
 
+from core import tokens
+from core.authentication import get_user
+from user import login
+
+
+# token_type of TokenSerializer
+AUTH_TOKEN = 'token'
+SIGNED_TOKEN = 'signed'
+
 class UserSerializer(serializers.ModelSerializer):
     
     
@@ -41,11 +50,21 @@ class TokenSerializer(serializers.Serializer):
         style ={'input_type':'password'},
         trim_whitespace = False
         ) 
+    token_type = serializers.ChoiceField(
+        choices=[AUTH_TOKEN, SIGNED_TOKEN],
+        default=AUTH_TOKEN,
+        help_text='"signed" for expiring access and refresh tokens',
+    )
     
     def validate(self,args):
         email = args.get('email')
         password = args.get('password')
-        
+        message = translate('Unable authenticate with these credentials')
+
+        known_failure, failure_key = login.check_failure(email, password)
+        if known_failure:
+            raise serializers.ValidationError(message, code='authorization')
+
         user = authenticate(
             request=self.context.get('request'),
             username = email,
@@ -53,9 +72,45 @@ class TokenSerializer(serializers.Serializer):
         )
         
         if not user:
-            message = translate('Unable authenticate with these credentials')
+            login.remember_failure(failure_key)
             raise serializers.ValidationError(message, code='authorization')
         
         args['user'] = user
         return args
-    
\ No newline at end of file
+
+    def validate_token_type(self, value):
+        if value == SIGNED_TOKEN and not tokens.is_enabled():
+            raise serializers.ValidationError(
+                translate('Signed tokens are not enabled.'),
+            )
+        return value
+
+
+class SignedTokenSerializer(serializers.Serializer):
+    '''
+    a signed token and the active user it belongs to
+    '''
+
+    token_kinds = (tokens.REFRESH,)
+
+    token = serializers.CharField()
+
+    def validate(self, args):
+        try:
+            payload = tokens.verify(args['token'], self.token_kinds)
+        except tokens.InvalidToken as exc:
+            raise serializers.ValidationError(str(exc), code='authorization')
+
+        user = get_user(payload['u'])
+        if user is None or not user.is_active:
+            message = translate('User inactive or deleted.')
+            raise serializers.ValidationError(message, code='authorization')
+
+        args['payload'] = payload
+        args['user'] = user
+        return args
+
+
+class RevokeTokenSerializer(SignedTokenSerializer):
+
+    token_kinds = (tokens.REFRESH, tokens.ACCESS)
@@ -0,0 +1,100 @@
+'''
+Tests for the guards in front of the token endpoint
+'''
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+TOKEN_URL = reverse('user:token')
+
+
+@override_settings(LOGIN_THROTTLE_RATE=None, LOGIN_FAILURE_CACHE_TIMEOUT=60)
+class LoginFailureCacheTests(TestCase):
+    '''
+    a pair that just failed is refused without hashing
+    '''
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='guard@example.com', password='pass12345',
+        )
+
+    def _login(self, password):
+        return self.client.post(TOKEN_URL, {
+            'email': 'guard@example.com', 'password': password,
+        })
+
+    def test_repeated_failure_skips_the_hasher(self):
+        self._login('wrong')
+
+        with patch('user.serializers.authenticate') as authenticate:
+            res = self._login('wrong')
+
+        authenticate.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_password_is_checked(self):
+        self._login('wrong')
+
+        res = self._login('pass12345')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_password_change_clears_the_failure(self):
+        self._login('new-pass12345')
+
+        self.user.set_password('new-pass12345')
+        self.user.save()
+        res = self._login('new-pass12345')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_unknown_email(self):
+        self.client.post(
+            TOKEN_URL, {'email': 'x@example.com', 'password': 'x'},
+        )
+
+        with patch('user.serializers.authenticate') as authenticate:
+            self.client.post(
+                TOKEN_URL, {'email': 'x@example.com', 'password': 'x'},
+            )
+
+        authenticate.assert_not_called()
+
+
+@override_settings(LOGIN_THROTTLE_RATE='2/min', LOGIN_FAILURE_CACHE_TIMEOUT=0)
+class LoginThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def _login(self, email):
+        return self.client.post(TOKEN_URL, {'email': email, 'password': 'x'})
+
+    def test_throttled_per_email(self):
+        self._login('a@example.com')
+        self._login('a@example.com')
+
+        throttled = self._login('a@example.com')
+        other = self._login('b@example.com')
+
+        self.assertEqual(
+            throttled.status_code, status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        self.assertEqual(other.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_body_not_an_object(self):
+        for body in ([], 'x'):
+            res = self.client.post(TOKEN_URL, body, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,201 @@
+'''
+Tests for the signed token api
+'''
+
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import authentication
+from core import tokens
+
+
+TOKEN_URL = reverse('user:token')
+REFRESH_URL = reverse('user:token-refresh')
+REVOKE_URL = reverse('user:token-revoke')
+ME_URL = reverse('user:me')
+
+# a store of revocations apart from the evicting default cache
+TOKEN_CACHES = {
+    **settings.CACHES,
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'revocations',
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+    },
+}
+
+
+@override_settings(
+    TOKEN_CACHE_TIMEOUT=60,
+    SIGNED_TOKEN_LIFETIME=600,
+    CACHES=TOKEN_CACHES,
+    TOKEN_REVOCATION_ALIAS='tokens',
+)
+class SignedTokenApiTests(TestCase):
+
+    def setUp(self):
+        authentication.local_cache.clear()
+        tokens.get_revocations().clear()
+        self.user = get_user_model().objects.create_user(
+            email='signed@example.com',
+            password='pass12345',
+        )
+        self.client = APIClient()
+
+    def _issue(self):
+        res = self.client.post(TOKEN_URL, {
+            'email': 'signed@example.com',
+            'password': 'pass12345',
+            'token_type': 'signed',
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def _me(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return self.client.get(ME_URL)
+
+    def test_issue_pair(self):
+        pair = self._issue()
+
+        self.assertEqual(set(pair), {'access', 'refresh', 'expires_in'})
+        self.assertEqual(pair['expires_in'], 600)
+
+    def test_permanent_token_is_still_the_default(self):
+        res = self.client.post(TOKEN_URL, {
+            'email': 'signed@example.com',
+            'password': 'pass12345',
+        })
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {res.data["token"]}',
+        )
+
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+
+    def test_verified_without_database(self):
+        access = self._issue()['access']
+        self._me(access)
+
+        with self.assertNumQueries(0):
+            res = self._me(access)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_expired(self):
+        access = self._issue()['access']
+
+        with patch('core.tokens.time.time', return_value=2 ** 40):
+            res = self._me(access)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Token')
+
+    def test_tampered(self):
+        access = self._issue()['access']
+
+        res = self._me(access[:-2] + 'xx')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_token_is_not_an_access_token(self):
+        res = self._me(self._issue()['refresh'])
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user(self):
+        access = self._issue()['access']
+        self._me(access)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self._me(access).status_code, 401)
+
+    def test_refresh_rotates(self):
+        refresh = self._issue()['refresh']
+
+        res = self.client.post(REFRESH_URL, {'token': refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['refresh'], refresh)
+        self.assertEqual(self._me(res.data['access']).status_code, 200)
+
+    def test_refresh_token_is_used_once(self):
+        refresh = self._issue()['refresh']
+        self.client.post(REFRESH_URL, {'token': refresh})
+
+        res = self.client.post(REFRESH_URL, {'token': refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_access_token_cannot_refresh(self):
+        res = self.client.post(REFRESH_URL, {'token': self._issue()['access']})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_revoke_access_token(self):
+        access = self._issue()['access']
+
+        res = self.client.post(REVOKE_URL, {'token': access})
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._me(access).status_code, 401)
+
+    def test_revocation_outlives_the_default_cache(self):
+        pair = self._issue()
+        self.client.post(REVOKE_URL, {'token': pair['access']})
+        self.client.post(REFRESH_URL, {'token': pair['refresh']})
+
+        cache.clear()
+        res = self.client.post(REFRESH_URL, {'token': pair['refresh']})
+
+        self.assertEqual(self._me(pair['access']).status_code, 401)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_revoke_refresh_token(self):
+        refresh = self._issue()['refresh']
+        self.client.post(REVOKE_URL, {'token': refresh})
+
+        res = self.client.post(REFRESH_URL, {'token': refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(TOKEN_REVOCATION_ALIAS=None)
+class SignedTokensDisabledTests(TestCase):
+    '''
+    without a revocation store no signed token is issued or accepted
+    '''
+
+    def setUp(self):
+        get_user_model().objects.create_user(
+            email='signed@example.com',
+            password='pass12345',
+        )
+        self.client = APIClient()
+
+    def test_not_issued(self):
+        res = self.client.post(TOKEN_URL, {
+            'email': 'signed@example.com',
+            'password': 'pass12345',
+            'token_type': 'signed',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('token_type', res.data)
+
+    def test_not_accepted(self):
+        access = tokens.issue(get_user_model().objects.get())
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -4,13 +4,17 @@ Tests for user api
 '''
 
 import email
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
 from rest_framework import status
 
+from core import authentication
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -182,5 +186,30 @@ class PrivateUserAPITests(TestCase):
         self.user.refresh_from_db()
         self.assertEqual(self.user.email, payoad['email'])
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(TOKEN_CACHE_TIMEOUT=60, TOKEN_CACHE_ALIAS=None)
+    def test_update_keeps_changes_made_elsewhere(self):
+        '''
+        Testing an update through the cached token user keeps changes
+        saved since it was cached, e.g. by another process
+        '''
+        authentication.local_cache.clear()
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        client.get(ME_URL)
+        self.assertIsNotNone(authentication.local_cache.get(token.key))
+        # no signal, as the invalidation of another process never
+        # reaches the cache of this one
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            password=make_password('changed123'),
+        )
+
+        res = client.patch(ME_URL, {'name': 'new name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'new name')
+        self.assertTrue(self.user.check_password('changed123'))
         
         
\ No newline at end of file
@@ -10,5 +10,15 @@ app_name ='user'
 urlpatterns = [
     path('create/', views.UserView.as_view(),name ='create'),
     path('token/', views.TokenView.as_view(),name ='token'),
+    path(
+        'token/refresh/',
+        views.RefreshTokenView.as_view(),
+        name='token-refresh',
+    ),
+    path(
+        'token/revoke/',
+        views.RevokeTokenView.as_view(),
+        name='token-revoke',
+    ),
     path('me/', views.ManageUserView.as_view(),name ='me'),
 ]
\ No newline at end of file
@@ -3,10 +3,21 @@
 Viewesets for users
 '''
 
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as translate
+from rest_framework import generics, permissions, status
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from core import tokens
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+)
 from user import serializers
+from user.login import LoginRateThrottle
 
 
 class UserView(generics.CreateAPIView):
@@ -19,14 +30,66 @@ class TokenView(ObtainAuthToken):
     '''
     serializer_class = serializers.TokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = [LoginRateThrottle]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        if serializer.validated_data['token_type'] == serializers.SIGNED_TOKEN:
+            return Response(tokens.issue_pair(user))
+        token, created = Token.objects.get_or_create(user=user)
+        return Response({'token': token.key})
+
+
+class RefreshTokenView(generics.GenericAPIView):
+    '''
+    trade a signed refresh token in for a new access and refresh token
+    '''
+    serializer_class = serializers.SignedTokenSerializer
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # each refresh token is good for one rotation only
+        if not tokens.revoke(serializer.validated_data['payload']):
+            raise ValidationError(
+                {'token': [translate('Token has been revoked.')]},
+                code='authorization',
+            )
+        return Response(tokens.issue_pair(serializer.validated_data['user']))
+
+
+class RevokeTokenView(generics.GenericAPIView):
+    '''
+    give up a signed access or refresh token before it expires
+    '''
+    serializer_class = serializers.RevokeTokenSerializer
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens.revoke(serializer.validated_data['payload'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
     
     
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = serializers.UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Retrieve and return the authenticated user."""
-        return self.request.user
\ No newline at end of file
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        # request.user may be a cached copy, possibly from before changes
+        # made by another process, and saving it would write those back
+        return get_user_model().objects.get(pk=self.request.user.pk)
\ No newline at end of file
@@ -5,5 +5,14 @@ set -e
 python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
+python manage.py createcachetable
+# jobs of the images uploaded before a restart died with the old process
+python manage.py render_images
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file
+if [ "$APP_SERVER" = "asgi" ]; then
+    # one event loop per worker, reads on ASYNC_READ_THREADS threads each
+    uvicorn app.asgi:application --host 0.0.0.0 --port 9000 --workers 4 \
+        --proxy-headers --no-access-log
+else
+    uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+fi